@@ -0,0 +1,139 @@
+"""
+Payload size and parse time per scholarly source, before and after lean parsing.
+
+"Before" requests the full records the original vers4 code asked for and parses
+them with json + the sort-based OpenAlex abstract rebuild. "After" requests only
+the rendered fields (trackb_core.parsing) and parses with decode_json +
+rebuild_abstract.
+
+Usage:
+    python benchmarks/bench_parsing.py                       # live APIs
+    python benchmarks/bench_parsing.py --save-fixtures fx/   # live, and keep the bodies
+    python benchmarks/bench_parsing.py --fixtures fx/        # re-time saved bodies offline
+    python benchmarks/bench_parsing.py --json results.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from trackb_core.parsing import (CROSSREF_SELECT, OPENALEX_SELECT, SEMANTIC_SCHOLAR_FIELDS,
+                                 decode_json, rebuild_abstract)
+
+QUERIES = [
+    "battery cell technology",
+    "large language model evaluation",
+    "perovskite solar cells stability",
+    "graph neural networks for molecules",
+    "carbon capture materials",
+]
+LIMIT = 5
+REPEAT = 50
+
+SOURCES = {
+    "semantic_scholar": {
+        "url": "https://api.semanticscholar.org/graph/v1/paper/search",
+        "before": lambda q: {"query": q, "limit": LIMIT, "fields": "title,authors,year,citationCount,abstract,url,venue,publicationDate"},
+        "after": lambda q: {"query": q, "limit": LIMIT, "fields": SEMANTIC_SCHOLAR_FIELDS},
+    },
+    "openalex": {
+        "url": "https://api.openalex.org/works",
+        "before": lambda q: {"search": q, "per_page": LIMIT, "mailto": "research@trackb.ai"},
+        "after": lambda q: {"search": q, "per_page": LIMIT, "select": OPENALEX_SELECT, "mailto": "research@trackb.ai"},
+    },
+    "crossref": {
+        "url": "https://api.crossref.org/works",
+        "before": lambda q: {"query": q, "rows": LIMIT, "mailto": "research@trackb.ai"},
+        "after": lambda q: {"query": q, "rows": LIMIT, "select": CROSSREF_SELECT, "mailto": "research@trackb.ai"},
+    },
+}
+
+
+def legacy_abstract(inverted):
+    """The original vers4 rebuild: sort every word by its first position, then truncate."""
+    if not inverted:
+        return "No abstract available."
+    words = [word for word, positions in sorted(inverted.items(), key=lambda x: min(x[1]) if x[1] else 0)]
+    abstract = " ".join(words[:50])
+    return abstract + "..." if len(words) > 50 else abstract
+
+
+def parse_before(source, body):
+    data = json.loads(body)
+    if source == "openalex":
+        for work in data.get("results") or []:
+            legacy_abstract(work.get("abstract_inverted_index"))
+    return data
+
+
+def parse_after(source, body):
+    data = decode_json(body)
+    if source == "openalex":
+        for work in data.get("results") or []:
+            rebuild_abstract(work.get("abstract_inverted_index"))
+    return data
+
+
+def time_parse(parse, source, body):
+    samples = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        parse(source, body)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def load_bodies(args, source, variant):
+    bodies = []
+    for i, query in enumerate(QUERIES):
+        path = os.path.join(args.fixtures or args.save_fixtures or "", f"{source}.{variant}.{i}.json")
+        if args.fixtures:
+            with open(path, "rb") as f:
+                bodies.append(f.read())
+            continue
+        spec = SOURCES[source]
+        response = requests.get(spec["url"], params=spec[variant](query), timeout=30)
+        response.raise_for_status()
+        bodies.append(response.content)
+        if args.save_fixtures:
+            os.makedirs(args.save_fixtures, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(response.content)
+    return bodies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="directory of saved response bodies (offline mode)")
+    parser.add_argument("--save-fixtures", help="directory to save live response bodies into")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'source':<18}{'bytes before':>14}{'bytes after':>13}{'parse before':>15}{'parse after':>14}")
+    for source in SOURCES:
+        before = load_bodies(args, source, "before")
+        after = load_bodies(args, source, "after")
+        row = {
+            "bytes_before": sum(len(b) for b in before) // len(before),
+            "bytes_after": sum(len(b) for b in after) // len(after),
+            "parse_ms_before": statistics.mean(time_parse(parse_before, source, b) for b in before),
+            "parse_ms_after": statistics.mean(time_parse(parse_after, source, b) for b in after),
+        }
+        results[source] = row
+        print(f"{source:<18}{row['bytes_before']:>14,}{row['bytes_after']:>13,}"
+              f"{row['parse_ms_before']:>13.3f}ms{row['parse_ms_after']:>12.3f}ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"queries": QUERIES, "limit": LIMIT, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
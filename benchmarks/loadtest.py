@@ -0,0 +1,306 @@
+"""
+Open-loop load test of trackB_api against local mock upstreams.
+
+Starts benchmarks/mock_upstreams.py and trackB_api.py (pointed at the mocks,
+with a fresh state directory), then sends /chat (and /experts) requests at each target rate
+for a fixed duration. Arrivals follow a Poisson process and never wait for
+earlier requests to finish, so queueing under overload shows up in the
+latencies instead of silently lowering the offered load. Reports throughput,
+p50/p95/p99 latency and error rate per rate step and per route.
+
+Usage:
+    python benchmarks/loadtest.py --rates 1,2,4 --duration 30 --json run.json
+    python benchmarks/loadtest.py --workers 4 --errors openalex=0.1 --latency bedrock=1:3
+    python benchmarks/loadtest.py --json new.json --baseline run.json   # exits 1 on a regression
+    python benchmarks/loadtest.py --target http://127.0.0.1:5000        # an already running API
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from mock_upstreams import upstream_env
+from trackb_core.llm import is_error_answer
+
+TOPICS = [
+    "battery cell technology", "large language model evaluation", "perovskite solar cells",
+    "graph neural networks", "carbon capture materials", "quantum error correction",
+    "protein structure prediction", "federated learning privacy", "urban heat islands",
+    "microplastics in rivers",
+]
+# route -> message template; each template matches exactly one route of the default router
+# ("experts" posts the topic to /experts with a location filter instead of /chat)
+TEMPLATES = {
+    "academic": "Find research papers on {topic}",
+    "live": "What is the latest news on {topic}?",
+    "direct": "Explain {topic} in simple terms.",
+    "experts": "{topic}",
+}
+EXPERT_LOCATIONS = ["Any", "United Kingdom", "London", "United States", "Europe", "Asia"]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, weight = item.partition("=")
+        if route not in TEMPLATES:
+            raise ValueError(f"unknown route {route!r}; expected one of {', '.join(TEMPLATES)}")
+        mix[route] = float(weight)
+    return mix
+
+
+def quantile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# --- PROCESSES UNDER TEST ---
+
+def wait_ready(url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f} s")
+
+
+def start_stack(args) -> Tuple[str, List[subprocess.Popen]]:
+    """Start the mocks and the API; returns (API base URL, processes to stop)."""
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    mock_cmd = [sys.executable, os.path.join(ROOT, "benchmarks", "mock_upstreams.py"), "--port", str(args.mock_port)]
+    if args.latency:
+        mock_cmd += ["--latency", args.latency]
+    if args.errors:
+        mock_cmd += ["--errors", args.errors]
+    if args.seed is not None:
+        mock_cmd += ["--seed", str(args.seed)]
+    processes = [subprocess.Popen(mock_cmd, stderr=subprocess.DEVNULL)]
+    wait_ready(f"{mock_url}/stats")
+
+    env = dict(os.environ, **upstream_env(mock_url))
+    env.update({
+        "TRACKB_PORT": str(args.api_port),
+        "TRACKB_WORKERS": str(args.workers),
+        "TRACKB_STATE_DIR": tempfile.mkdtemp(prefix="trackb-loadtest-"),
+    })
+    log = open(os.path.join(env["TRACKB_STATE_DIR"], "api.log"), "w")
+    processes.append(subprocess.Popen([sys.executable, os.path.join(ROOT, "trackB_api.py")], env=env,
+                                      stdout=log, stderr=subprocess.STDOUT, cwd=ROOT))
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    wait_ready(f"{api_url}/health")
+    return api_url, processes
+
+
+def stop_stack(processes: List[subprocess.Popen]):
+    for process in reversed(processes):
+        process.terminate()
+        try:
+            process.wait(timeout=40)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# --- LOAD GENERATION ---
+
+def build_request(route: str, message: str, use_cache: bool, rng: random.Random) -> Tuple[str, dict]:
+    """(path, JSON body) of one request on `route`."""
+    if route == "experts":
+        return "/experts", {"category": message, "location": rng.choice(EXPERT_LOCATIONS), "use_cache": use_cache}
+    return "/chat", {"message": message, "use_cache": use_cache}
+
+
+def answered(route: str, body: dict) -> bool:
+    if route == "experts":
+        return not body.get("error")
+    return not is_error_answer(str(body.get("answer", "")))
+
+
+async def send(client: httpx.AsyncClient, url: str, route: str, path: str, payload: dict, samples: list):
+    started = time.perf_counter()
+    status, ok = 0, False
+    try:
+        response = await client.post(f"{url}{path}", json=payload)
+        status = response.status_code
+        ok = status == 200 and answered(route, response.json())
+    except (httpx.HTTPError, ValueError):
+        pass
+    samples.append({"route": route, "status": status, "ok": ok, "latency_s": time.perf_counter() - started})
+
+
+async def run_step(url: str, rate: float, duration: float, mix: Dict[str, float], unique: float,
+                   use_cache: bool, rng: random.Random, timeout: float) -> dict:
+    """Offer `rate` requests/s for `duration` seconds (Poisson arrivals) and summarise the outcome."""
+    routes, weights = zip(*mix.items())
+    samples: List[dict] = []
+    tasks = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        next_at = 0.0
+        sent = 0
+        while True:
+            next_at += rng.expovariate(rate)
+            if next_at >= duration:
+                break
+            await asyncio.sleep(max(0.0, started + next_at - time.perf_counter()))
+            route = rng.choices(routes, weights)[0]
+            topic = rng.choice(TOPICS)
+            if rng.random() < unique:
+                topic += f" ({sent})"  # a question no cache has seen
+            path, payload = build_request(route, TEMPLATES[route].format(topic=topic), use_cache, rng)
+            tasks.append(asyncio.ensure_future(send(client, url, route, path, payload, samples)))
+            sent += 1
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    step = {"offered_rps": rate, "duration_s": duration, "sent": sent, "elapsed_s": round(elapsed, 2),
+            "overall": summarise(samples, elapsed), "routes": {}}
+    for route in routes:
+        step["routes"][route] = summarise([s for s in samples if s["route"] == route], elapsed)
+    return step
+
+
+def summarise(samples: List[dict], elapsed: float) -> dict:
+    latencies = [s["latency_s"] * 1000 for s in samples if s["ok"]]
+    errors = sum(1 for s in samples if not s["ok"])
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+
+    def ms(value):
+        return round(value, 1) if value is not None else None
+
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "p50_ms": ms(quantile(latencies, 0.50)),
+        "p95_ms": ms(quantile(latencies, 0.95)),
+        "p99_ms": ms(quantile(latencies, 0.99)),
+        "statuses": statuses,
+    }
+
+
+# --- REPORTING ---
+
+def print_step(step: dict):
+    print(f"\n== {step['offered_rps']:g} req/s for {step['duration_s']:g} s ({step['sent']} sent) ==")
+    print(f"{'route':<10}{'reqs':>6}{'tput/s':>9}{'err%':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = dict(step["routes"], overall=step["overall"])
+    for route, row in rows.items():
+        def cell(value):
+            return f"{value:>10.0f}" if value is not None else f"{'-':>10}"
+        print(f"{route:<10}{row['requests']:>6}{row['throughput_rps']:>9.2f}{row['error_rate'] * 100:>6.1f}%"
+              f"{cell(row['p50_ms'])}{cell(row['p95_ms'])}{cell(row['p99_ms'])}")
+
+
+def compare(result: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Regressions of this run against `baseline`, matched by offered rate and route."""
+    problems = []
+    old_steps = {step["offered_rps"]: step for step in baseline.get("steps", [])}
+    for step in result["steps"]:
+        old = old_steps.get(step["offered_rps"])
+        if old is None:
+            continue
+        for route, row in dict(step["routes"], overall=step["overall"]).items():
+            before = old["routes"].get(route) if route != "overall" else old["overall"]
+            if not before:
+                continue
+            label = f"{step['offered_rps']:g} req/s {route}"
+            if before["p95_ms"] and row["p95_ms"] and row["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+                problems.append(f"{label}: p95 {before['p95_ms']:.0f} -> {row['p95_ms']:.0f} ms")
+            if before["throughput_rps"] and row["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+                problems.append(f"{label}: throughput {before['throughput_rps']:.2f} -> {row['throughput_rps']:.2f} req/s")
+            if row["error_rate"] > before["error_rate"] + 0.02:
+                problems.append(f"{label}: error rate {before['error_rate']:.1%} -> {row['error_rate']:.1%}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", default="1,2,4", help="offered request rates (req/s), one step each")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per rate step")
+    parser.add_argument("--mix", default="academic=0.4,live=0.2,direct=0.3,experts=0.1", help="route=weight, comma-separated")
+    parser.add_argument("--unique", type=float, default=1.0,
+                        help="fraction of requests with a never-seen question (lower it to exercise the caches)")
+    parser.add_argument("--no-cache", action="store_true", help="send use_cache=false with every request")
+    parser.add_argument("--workers", type=int, default=1, help="trackB_api worker processes")
+    parser.add_argument("--latency", default="", help="mock latency, upstream=median[:p95] seconds (see mock_upstreams.py)")
+    parser.add_argument("--errors", default="", help="mock failure fraction, upstream=fraction")
+    parser.add_argument("--target", help="load an already running API at this URL instead of starting one")
+    parser.add_argument("--api-port", type=int, default=5098)
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--timeout", type=float, default=120, help="client timeout per request (seconds)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="earlier --json result to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed relative p95 / throughput change")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    rates = [float(rate) for rate in args.rates.split(",") if rate.strip()]
+    rng = random.Random(args.seed)
+
+    processes = []
+    if args.target:
+        url = args.target.rstrip("/")
+    else:
+        url, processes = start_stack(args)
+    try:
+        steps = []
+        for rate in rates:
+            step = asyncio.run(run_step(url, rate, args.duration, mix, args.unique, not args.no_cache, rng, args.timeout))
+            print_step(step)
+            steps.append(step)
+        try:
+            server_stats = httpx.get(f"{url}/stats", params={"scope": "all"}, timeout=10).json()
+        except (httpx.HTTPError, ValueError):
+            server_stats = None
+    finally:
+        stop_stack(processes)
+
+    result = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {"rates": rates, "duration_s": args.duration, "mix": mix, "unique": args.unique,
+                   "use_cache": not args.no_cache, "workers": args.workers, "latency": args.latency,
+                   "errors": args.errors, "target": args.target, "seed": args.seed},
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "steps": steps,
+        "server_stats": server_stats,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(result, json.load(f), args.max_regression)
+        if problems:
+            print("\nRegressions against the baseline:")
+            for problem in problems:
+                print(f"  - {problem}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
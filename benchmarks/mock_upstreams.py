@@ -0,0 +1,283 @@
+"""
+Local stand-ins for every upstream Track B calls: Semantic Scholar, OpenAlex,
+CrossRef, Valyu and the Holistic AI Bedrock proxy.
+
+One FastAPI app serves all five under path prefixes. Responses are synthetic
+but shaped like the real APIs (and deterministic per query). OpenAlex honours
+`select` and the `authorships.institutions.country_code` filter (other filters
+are ignored); Semantic Scholar honours `fields`. Each upstream's
+latency is drawn from a log-normal distribution fitted to a given median and
+p95, and a given fraction of calls fail (HTTP 500, or 429 with Retry-After).
+
+Usage:
+    python benchmarks/mock_upstreams.py --port 8900
+    python benchmarks/mock_upstreams.py --latency openalex=0.3:1.2 --errors bedrock=0.05
+
+Point Track B at it with the variables printed by `upstream_env(base_url)`.
+"""
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import sys
+from typing import Dict, Tuple
+
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse
+
+UPSTREAMS = ("semantic_scholar", "openalex", "crossref", "valyu", "bedrock")
+
+# upstream -> (median seconds, p95 seconds), roughly what the real services show
+DEFAULT_LATENCY: Dict[str, Tuple[float, float]] = {
+    "semantic_scholar": (0.35, 1.5),
+    "openalex": (0.25, 0.8),
+    "crossref": (0.4, 1.6),
+    "valyu": (0.8, 2.5),
+    "bedrock": (2.5, 6.0),
+}
+# upstream -> fraction of calls that fail
+DEFAULT_ERRORS: Dict[str, float] = {name: 0.0 for name in UPSTREAMS}
+# Fraction of failures answered with 429 + Retry-After instead of 500
+THROTTLE_SHARE = 0.5
+
+_Z95 = 1.6449
+
+# (institution, country code) assigned to synthetic authors, so location filters have something to match
+INSTITUTIONS = (
+    ("University College London", "GB"), ("Francis Crick Institute", "GB"),
+    ("Massachusetts Institute of Technology", "US"), ("Stanford University", "US"),
+    ("ETH Zurich", "CH"), ("Sorbonne University", "FR"),
+    ("University of Tokyo", "JP"), ("National University of Singapore", "SG"),
+)
+# Candidate works scanned per requested result when a filter drops some
+_FILTER_SCAN = 50
+
+
+def parse_pairs(spec: str, parse) -> dict:
+    """'name=value,name=value' -> {name: parse(value)} (for --latency and --errors)."""
+    values = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        if name not in UPSTREAMS:
+            raise ValueError(f"unknown upstream {name!r}; expected one of {', '.join(UPSTREAMS)}")
+        values[name] = parse(value)
+    return values
+
+
+def parse_latency(value: str) -> Tuple[float, float]:
+    median, _, p95 = value.partition(":")
+    return float(median), float(p95 or median)
+
+
+def upstream_env(base_url: str) -> Dict[str, str]:
+    """Environment variables that point trackB_api at mocks served from `base_url`."""
+    return {
+        "TRACKB_SEMANTIC_SCHOLAR_URL": f"{base_url}/semantic_scholar",
+        "TRACKB_OPENALEX_URL": f"{base_url}/openalex",
+        "TRACKB_CROSSREF_URL": f"{base_url}/crossref",
+        "TRACKB_VALYU_URL": f"{base_url}/valyu",
+        "HOLISTIC_AI_API_ENDPOINT": f"{base_url}/bedrock/invoke",
+    }
+
+
+class Behaviour:
+    """Latency and error model for the mocks; `stats` counts calls and injected failures."""
+
+    def __init__(self, latency: Dict[str, Tuple[float, float]] = None, errors: Dict[str, float] = None,
+                 seed: int = None):
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.errors = dict(DEFAULT_ERRORS, **(errors or {}))
+        self.random = random.Random(seed)
+        self.stats = {name: {"calls": 0, "errors": 0} for name in UPSTREAMS}
+
+    def delay(self, name: str) -> float:
+        median, p95 = self.latency[name]
+        if median <= 0:
+            return 0.0
+        sigma = max(0.0, math.log(max(p95, median) / median) / _Z95)
+        return self.random.lognormvariate(math.log(median), sigma)
+
+    async def respond(self, name: str, body: dict):
+        self.stats[name]["calls"] += 1
+        await asyncio.sleep(self.delay(name))
+        if self.random.random() < self.errors[name]:
+            self.stats[name]["errors"] += 1
+            if self.random.random() < THROTTLE_SHARE:
+                return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": "1"})
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+        return body
+
+
+# --- SYNTHETIC RECORDS ---
+
+def _seed(query: str, i: int) -> str:
+    return hashlib.blake2b(f"{query}|{i}".encode(), digest_size=6).hexdigest()
+
+
+def _title(query: str, i: int) -> str:
+    return f"{query.strip().capitalize() or 'Untitled'}: study {i + 1}"
+
+
+def _authors(query: str, i: int):
+    seed = _seed(query, i)
+    return [f"Author {seed[j:j + 3].upper()}" for j in (0, 3, 6)]
+
+
+def _institution(query: str, i: int, j: int):
+    return INSTITUTIONS[int(_seed(query, i)[j * 2:j * 2 + 2], 16) % len(INSTITUTIONS)]
+
+
+def parse_filter(spec: str) -> Dict[str, set]:
+    """OpenAlex 'key:a|b,key:c' filter syntax -> {key: {values}}."""
+    filters = {}
+    for item in (part.strip() for part in spec.split(",")):
+        key, _, values = item.partition(":")
+        if key and values:
+            filters[key] = {value.upper() for value in values.split("|")}
+    return filters
+
+
+def select_fields(records: list, fields: str, always=()) -> list:
+    """Records reduced to the comma-separated `fields` (all fields when empty), like select / fields do."""
+    wanted = {field.strip() for field in fields.split(",") if field.strip()}
+    if not wanted:
+        return records
+    wanted.update(always)
+    return [{key: value for key, value in record.items() if key in wanted} for record in records]
+
+
+def semantic_scholar_body(query: str, limit: int, fields: str = "") -> dict:
+    return {"data": select_fields([{
+        "paperId": _seed(query, i),
+        "title": _title(query, i),
+        "authors": [{"name": name, "authorId": f"{i}{j}"} for j, name in enumerate(_authors(query, i))],
+        "year": 2015 + i % 10,
+        "venue": "Journal of Synthetic Results",
+        "citationCount": 100 // (i + 1),
+        "abstract": f"We study {query}. " * 8,
+        "url": f"https://example.org/s2/{_seed(query, i)}",
+        "externalIds": {"DOI": f"10.5555/{_seed(query, i)}"},
+        "fieldsOfStudy": ["Computer Science"],
+    } for i in range(limit)], fields, always=("paperId",))}
+
+
+def openalex_work(query: str, i: int) -> dict:
+    words = (query.split() or ["results"]) * 4
+    return {
+        "id": f"https://openalex.org/W{_seed(query, i)}",
+        "title": _title(query, i),
+        "doi": f"https://doi.org/10.5555/{_seed(query, i)}",
+        "publication_year": 2015 + i % 10,
+        "relevance_score": 100.0 / (i + 1),
+        "cited_by_count": 120 // (i + 1),
+        "open_access": {"is_oa": i % 2 == 0},
+        "primary_location": {"source": {"display_name": "Synthetic Letters"}},
+        "abstract_inverted_index": {word: [k] for k, word in enumerate(words)},
+        "concepts": [{"display_name": "Computer science"}, {"display_name": "Benchmarking"}],
+        "authorships": [
+            {"author": {"display_name": name, "id": f"https://openalex.org/A{j}{i}"},
+             "institutions": [{"display_name": institution, "country_code": country}]}
+            for j, name in enumerate(_authors(query, i))
+            for institution, country in [_institution(query, i, j)]
+        ],
+    }
+
+
+def openalex_body(query: str, limit: int, filters: str = "", select: str = "") -> dict:
+    countries = parse_filter(filters).get("authorships.institutions.country_code")
+    works = []
+    for i in range(limit * (_FILTER_SCAN if countries else 1)):
+        if len(works) == limit:
+            break
+        work = openalex_work(query, i)
+        if countries and not any(
+            institution["country_code"] in countries
+            for authorship in work["authorships"] for institution in authorship["institutions"]
+        ):
+            continue
+        works.append(work)
+    return {"results": select_fields(works, select)}
+
+
+def crossref_body(query: str, rows: int) -> dict:
+    return {"message": {"items": [{
+        "title": [_title(query, i)],
+        "DOI": f"10.5555/{_seed(query, i)}",
+        "author": [{"given": "A.", "family": name.split()[-1]} for name in _authors(query, i)],
+        "published": {"date-parts": [[2015 + i % 10]]},
+        "container-title": ["Synthetic Review"],
+        "publisher": "Mock Press",
+        "type": "journal-article",
+        "is-referenced-by-count": 90 // (i + 1),
+        "reference-count": 40,
+        "funder": [{"name": "Mock Foundation"}],
+    } for i in range(rows)]}}
+
+
+def valyu_body(query: str, limit: int) -> dict:
+    return {"success": True, "results": [{
+        "title": f"{query} - live result {i + 1}",
+        "url": f"https://example.org/news/{_seed(query, i)}",
+        "content": f"Recent coverage of {query}. " * 12,
+    } for i in range(limit)]}
+
+
+def bedrock_body(messages: list) -> dict:
+    prompt = str(messages[-1].get("content", "")) if messages else ""
+    return {"content": [{"type": "text", "text": f"Synthetic answer based on {len(prompt)} prompt characters."}]}
+
+
+def create_app(behaviour: Behaviour) -> FastAPI:
+    app = FastAPI(title="Track B mock upstreams")
+
+    @app.get("/semantic_scholar/graph/v1/paper/search")
+    async def semantic_scholar(query: str = "", limit: int = 5, fields: str = ""):
+        return await behaviour.respond("semantic_scholar", semantic_scholar_body(query, min(limit, 100), fields))
+
+    @app.get("/openalex/works")
+    async def openalex(search: str = "", per_page: int = 5, filters: str = Query("", alias="filter"), select: str = ""):
+        return await behaviour.respond("openalex", openalex_body(search, min(per_page, 200), filters, select))
+
+    @app.get("/crossref/works")
+    async def crossref(query: str = "", rows: int = 5):
+        return await behaviour.respond("crossref", crossref_body(query, min(rows, 100)))
+
+    @app.post("/valyu/v1/deepsearch")
+    async def valyu(request: Request):
+        body = await request.json()
+        return await behaviour.respond("valyu", valyu_body(body.get("query", ""), body.get("max_num_results", 5)))
+
+    @app.post("/bedrock/invoke")
+    async def bedrock(request: Request):
+        body = await request.json()
+        return await behaviour.respond("bedrock", bedrock_body(body.get("messages") or []))
+
+    @app.get("/stats")
+    async def stats():
+        return behaviour.stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="", help="upstream=median[:p95] seconds, comma-separated")
+    parser.add_argument("--errors", default="", help="upstream=failure fraction, comma-separated")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    behaviour = Behaviour(parse_pairs(args.latency, parse_latency), parse_pairs(args.errors, float), args.seed)
+    base_url = f"http://{args.host}:{args.port}"
+    print("Mock upstreams for Track B; point trackB_api at them with:", file=sys.stderr)
+    for name, value in upstream_env(base_url).items():
+        print(f"  export {name}={value}", file=sys.stderr)
+    uvicorn.run(create_app(behaviour), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+Shared pytest setup: the repository root on sys.path and a throwaway state directory.
+
+TRACKB_STATE_DIR is read when trackb_core.config is first imported, so it is set
+here, before any test module imports the core.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["TRACKB_STATE_DIR"] = tempfile.mkdtemp(prefix="trackb-tests-")
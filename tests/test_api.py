@@ -0,0 +1,47 @@
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import trackB_api
+from trackb_core.execution import BoundedExecutor
+from trackb_core.serving import get_worker_registry
+
+
+def test_chat_returns_503_with_retry_after_when_overloaded(monkeypatch):
+    full = BoundedExecutor(max_workers=1, max_in_flight=1, retry_after=7)
+    full.in_flight = full.max_in_flight
+    monkeypatch.setattr(trackB_api, "executor", full)
+
+    response = TestClient(trackB_api.app).post("/chat", json={"message": "Explain transformers."})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert response.json()["answer"].startswith("The server is busy")
+    assert full.rejected == 1
+    full.shutdown()
+
+
+def test_lifespan_publishes_stats_and_drains_on_shutdown(monkeypatch):
+    own = BoundedExecutor(max_workers=1)
+    stop = threading.Event()
+    monkeypatch.setattr(trackB_api, "executor", own)
+    monkeypatch.setattr(trackB_api, "_publisher_stop", stop)
+    registry = get_worker_registry()
+
+    with TestClient(trackB_api.app) as client:
+        deadline = time.time() + 5
+        while os.getpid() not in registry.snapshots():
+            assert time.time() < deadline, "the stats publisher never published"
+            time.sleep(0.02)
+        assert str(os.getpid()) in client.get("/stats", params={"scope": "all"}).json()["workers"]
+
+    assert stop.is_set()
+    with pytest.raises(RuntimeError):
+        own._pool.submit(print)  # the worker pool was shut down
+    deadline = time.time() + 5
+    while os.getpid() in registry.snapshots():
+        assert time.time() < deadline, "the worker was not retired"
+        time.sleep(0.02)
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import trackB_api
+from trackb_core.batch import BatchSearches, search_key, sharing_order
+from trackb_core.execution import BoundedExecutor
+
+
+def test_search_key_ignores_word_order_and_stopwords():
+    assert search_key("recent papers on graph neural networks") == search_key("graph neural networks: recent papers?")
+
+
+def test_first_occurrences_of_each_search_run_first():
+    messages = ["graph networks", "solar cells", "networks graph", "solar cells", "quantum dots"]
+    assert sharing_order(messages) == [0, 1, 4, 2, 3]
+
+
+def test_searches_run_once_per_key():
+    searches = BatchSearches()
+    calls = []
+    first = searches._once(("live", "k"), lambda: calls.append(1) or "result")
+    second = searches._once(("live", "k"), lambda: calls.append(1) or "other")
+    assert (first, second) == (("result", False), ("result", True))
+    assert calls == [1]
+    assert searches.stats() == {"searches": 1, "shared": 1}
+
+
+def test_waiters_get_the_leaders_cancellation():
+    searches = BatchSearches()
+    started, release = threading.Event(), threading.Event()
+    outcome = {}
+
+    def cancelled():
+        started.set()
+        release.wait(5)
+        raise KeyboardInterrupt  # any BaseException, e.g. a cancellation
+
+    def leader():
+        try:
+            searches._once(("academic", "k"), cancelled)
+        except BaseException as e:
+            outcome["leader"] = e
+
+    def waiter():
+        try:
+            searches._once(("academic", "k"), lambda: "unused")
+        except BaseException as e:
+            outcome["waiter"] = e
+
+    threads = [threading.Thread(target=leader)]
+    threads[0].start()
+    started.wait(5)
+    threads.append(threading.Thread(target=waiter))
+    threads[1].start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert isinstance(outcome["waiter"], KeyboardInterrupt)
+    assert isinstance(outcome["leader"], KeyboardInterrupt)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """trackB_api with its own 4-thread pool and a pipeline that records how many questions run at once."""
+    executor = BoundedExecutor(max_workers=4)
+    monkeypatch.setattr(trackB_api, "executor", executor)
+    monkeypatch.setattr(trackB_api, "_batch_workers", None)
+    lock, running = threading.Lock(), {"now": 0, "max": 0}
+
+    def pipeline(message, history, timings=None, searches=None, **kwargs):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        threading.Event().wait(0.02)
+        with lock:
+            running["now"] -= 1
+        return history + [[message, f"answer to {message}"]], "trace"
+
+    monkeypatch.setattr(trackB_api, "agent_chat_logic", pipeline)
+    yield TestClient(trackB_api.app), running
+    executor.shutdown()
+
+
+def test_empty_and_oversized_batches_are_rejected(api, monkeypatch):
+    client, _ = api
+    assert client.post("/chat/batch", json={"messages": []}).status_code == 400
+    monkeypatch.setattr(trackB_api, "BATCH_MAX_ITEMS", 2)
+    assert client.post("/chat/batch", json={"messages": ["a", "b", "c"]}).status_code == 413
+
+
+def test_batches_hold_at_most_their_share_of_the_workers(api):
+    client, running = api
+    body = client.post("/chat/batch", json={"messages": [f"question {i}" for i in range(12)], "concurrency": 50,
+                                            "stream": False}).json()
+    assert body["concurrency"] == 2  # half of the 4 worker threads
+    assert running["max"] <= 2
+    assert [result["answer"] for result in body["results"]] == [f"answer to question {i}" for i in range(12)]
+    assert body["errors"] == 0
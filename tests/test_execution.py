@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+import pytest
+
+from trackb_core.execution import BoundedExecutor, Overloaded
+
+
+def test_rejects_beyond_max_in_flight():
+    async def scenario():
+        executor = BoundedExecutor(max_workers=1, max_in_flight=2, retry_after=3)
+        release = threading.Event()
+        running = [executor.submit(release.wait, 5) for _ in range(2)]
+        with pytest.raises(Overloaded) as excinfo:
+            executor.submit(release.wait, 5)
+        assert excinfo.value.retry_after == 3
+        assert executor.queued == 1
+        release.set()
+        await asyncio.gather(*running)
+        assert executor.in_flight == 0
+        assert executor.stats()["rejected"] == 1
+        executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_request_keeps_its_slot_until_the_thread_finishes():
+    async def scenario():
+        executor = BoundedExecutor(max_workers=1, max_in_flight=1)
+        started, release = threading.Event(), threading.Event()
+
+        def work():
+            started.set()
+            release.wait(5)
+
+        task = asyncio.ensure_future(executor.run(work))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert executor.in_flight == 1
+        with pytest.raises(Overloaded):
+            executor.submit(work)
+        release.set()
+        await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+        assert executor.in_flight == 0
+
+    asyncio.run(scenario())
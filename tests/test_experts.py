@@ -0,0 +1,65 @@
+from trackb_core.experts import LOCATIONS, _location_matches, aggregate_candidates, score_candidates
+
+
+def record(name, url="", citations=10, affiliation="", country="", work="A work"):
+    return {"name": name, "url": url, "affiliation": affiliation, "country": country, "work": work,
+            "citations": citations, "relevance": 1.0, "areas": ["Physics"]}
+
+
+def test_namesakes_with_different_ids_stay_apart():
+    candidates = aggregate_candidates({"OpenAlex": [
+        record("Wei Zhang", "https://openalex.org/A1", 100),
+        record("Wei Zhang", "https://openalex.org/A2", 5),
+        record("Wei Zhang", "https://openalex.org/A1", 50, work="Another work"),
+    ]})
+    assert sorted((c.works, c.citations) for c in candidates) == [(1, 5), (2, 150)]
+
+
+def test_the_same_author_merges_across_sources_by_name():
+    candidates = aggregate_candidates({
+        "OpenAlex": [record("Ada Lovelace", "https://openalex.org/A1", 100, "UCL", "GB")],
+        "Semantic Scholar": [record("Ada  Lovelace", "https://www.semanticscholar.org/author/9", 40)],
+    })
+    assert len(candidates) == 1
+    ada = candidates[0]
+    assert ada.sources == ["OpenAlex", "Semantic Scholar"]
+    assert (ada.works, ada.citations, ada.affiliation) == (2, 140, "UCL")
+
+
+def test_ambiguous_names_are_not_merged_across_sources():
+    candidates = aggregate_candidates({
+        "OpenAlex": [record("Wei Zhang", "https://openalex.org/A1"), record("Wei Zhang", "https://openalex.org/A2")],
+        "Semantic Scholar": [record("Wei Zhang", "https://www.semanticscholar.org/author/7")],
+    })
+    assert len(candidates) == 3
+    assert all(len(c.sources) == 1 for c in candidates)
+
+
+def test_a_candidate_takes_one_namesake_per_source():
+    candidates = aggregate_candidates({
+        "OpenAlex": [record("Li Na", "https://openalex.org/A1")],
+        "Semantic Scholar": [record("Li Na", "https://www.semanticscholar.org/author/1"),
+                             record("Li Na", "https://www.semanticscholar.org/author/2")],
+    })
+    assert sorted(len(c.sources) for c in candidates) == [1, 2]
+
+
+def test_records_without_ids_group_by_name():
+    candidates = aggregate_candidates({"Local index": [record("Ada Lovelace"), record("ada lovelace")]})
+    assert len(candidates) == 1 and candidates[0].works == 2
+
+
+def test_scores_grow_with_citations():
+    low, high = aggregate_candidates({"OpenAlex": [
+        record("Low", "https://openalex.org/A1", 1), record("High", "https://openalex.org/A2", 1000),
+    ]})
+    low_score, high_score = score_candidates([low, high])
+    assert high_score > low_score > 0
+
+
+def test_location_filters():
+    assert _location_matches("London", "GB", "University College London")
+    assert not _location_matches("London", "GB", "University of Oxford")
+    assert _location_matches("Europe", "FR", "Sorbonne University")
+    assert not _location_matches("United States", "GB", "UCL")
+    assert LOCATIONS["Any"] is None
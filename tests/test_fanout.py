@@ -0,0 +1,30 @@
+import asyncio
+import threading
+
+from trackb_core.fanout import STATUS_ERROR, STATUS_OK, STATUS_TIMEOUT, fan_out
+
+
+def test_partial_results_at_the_deadline():
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "late"
+
+    def broken():
+        raise ValueError("upstream down")
+
+    seen = []
+    try:
+        results = asyncio.run(fan_out(
+            {"fast": lambda: "papers", "slow": slow, "broken": broken}, deadline=0.2, on_result=seen.append,
+        ))
+    finally:
+        release.set()
+
+    assert list(results) == ["fast", "slow", "broken"]
+    assert results["fast"].status == STATUS_OK and results["fast"].value == "papers"
+    assert results["broken"].status == STATUS_ERROR and "upstream down" in results["broken"].error
+    assert results["slow"].status == STATUS_TIMEOUT and results["slow"].partial
+    assert not results["fast"].partial
+    assert sorted(result.name for result in seen) == ["broken", "fast", "slow"]
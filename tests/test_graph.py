@@ -0,0 +1,93 @@
+import pytest
+
+pytest.importorskip("langgraph.graph")
+
+from trackb_core import graph  # noqa: E402
+from trackb_core.records import Paper  # noqa: E402
+
+
+class FakeValyu:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, query):
+        self.calls += 1
+        return "Live result paragraph."
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    """Two sources that report the same work (by DOI) and one that fails; counts calls per source."""
+    calls = {"Alpha": 0, "Beta": 0, "Gamma": 0}
+
+    def alpha(query, limit=2):
+        calls["Alpha"] += 1
+        return [Paper("Solid-state batteries", "Alpha", doi="10.1/ssb", year=2024)]
+
+    def beta(query, limit=2):
+        calls["Beta"] += 1
+        return [Paper("Solid-State Batteries", "Beta", doi="https://doi.org/10.1/SSB", citations=12),
+                Paper("Sodium-ion cells", "Beta", doi="10.1/na")]
+
+    def gamma(query, limit=2):
+        calls["Gamma"] += 1
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(graph, "ACADEMIC_SOURCES", [("Alpha", alpha), ("Beta", beta), ("Gamma", gamma)])
+    monkeypatch.setattr(graph, "get_index", lambda: None)
+    monkeypatch.setattr(graph, "get_valyu_tool", FakeValyu)
+    return calls
+
+
+def answer(messages):
+    return "answer"
+
+
+def test_source_branches_fan_in_to_one_merged_list(sources):
+    state = graph.run_graph(graph.build_graph(answer), "Research papers on solid-state batteries", use_cache=False)
+    assert state["route"] == "academic" and state["answer"] == "answer"
+    assert {name: entry["status"] for name, entry in state["sources"].items()} == {
+        "Alpha": "ok", "Beta": "ok", "Gamma": "error",
+    }
+    merged = {paper["doi"]: list(paper["sources"]) for paper in state["papers"]}
+    assert merged == {"10.1/ssb": ["Alpha", "Beta"], "10.1/na": ["Beta"]}
+    assert {"alpha", "beta", "gamma", "merge", "pack", "model"} <= set(state["timings"])
+
+
+def test_empty_academic_branches_fall_back_to_the_live_prefetch(sources, monkeypatch):
+    monkeypatch.setattr(graph, "ACADEMIC_SOURCES", [("Empty", lambda query, limit=2: [])])
+    state = graph.run_graph(graph.build_graph(answer), "Latest research papers on batteries", use_cache=False)
+    assert state["fallback"] and state["route"] == "live"
+    assert state["live_results"] == "Live result paragraph."
+    assert "Speculative Prefetch" in graph.describe_run(state)
+
+
+def test_runs_without_a_thread_id_leave_no_checkpoints(sources):
+    checkpointer = graph.make_checkpointer("memory")
+    state = graph.run_graph(graph.build_graph(answer, checkpointer), "Research papers on batteries", use_cache=False)
+    assert state["answer"] == "answer"
+    assert not checkpointer.storage
+
+
+def test_a_finished_thread_starts_a_new_run(sources):
+    compiled = graph.build_graph(lambda messages: messages[-1]["content"], graph.make_checkpointer("memory"))
+    graph.run_graph(compiled, "Research papers on batteries", use_cache=False, thread_id="t1")
+    state = graph.run_graph(compiled, "Explain entropy simply.", thread_id="t1")
+    assert state["route"] == "direct" and "entropy" in state["answer"]
+    assert not state["sources"] and not state["papers"]  # nothing carried over from the first run
+
+
+def test_an_interrupted_thread_resumes_from_its_last_finished_node(sources):
+    failures = [RuntimeError("model timed out")]
+
+    def flaky(messages):
+        if failures:
+            raise failures.pop()
+        return "answer"
+
+    compiled = graph.build_graph(flaky, graph.make_checkpointer("memory"))
+    with pytest.raises(RuntimeError):
+        graph.run_graph(compiled, "Research papers on batteries", use_cache=False, thread_id="t2")
+    state = graph.run_graph(compiled, "Research papers on batteries", use_cache=False, thread_id="t2")
+    assert state["answer"] == "answer"
+    assert sources == {"Alpha": 1, "Beta": 1, "Gamma": 1}  # the search branches were not re-run
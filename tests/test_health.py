@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from trackb_core.health import CLOSED, CONSECUTIVE_FAILURES, HALF_OPEN, OPEN, CircuitOpen, SourceHealth
+
+COOLDOWN = 0.05
+
+
+def trip(health: SourceHealth):
+    for _ in range(CONSECUTIVE_FAILURES):
+        health.before_call()
+        health.record(False, 0.1)
+
+
+def test_closed_open_half_open_closed():
+    health = SourceHealth("test", cooldown=COOLDOWN)
+    assert health.state == CLOSED
+
+    trip(health)
+    assert health.state == OPEN
+    with pytest.raises(CircuitOpen):
+        health.before_call()
+
+    time.sleep(COOLDOWN * 2)
+    assert health.state == HALF_OPEN
+    health.before_call()  # the probe
+    with pytest.raises(CircuitOpen):
+        health.before_call()  # only one probe at a time
+
+    health.record(True, 0.1)
+    assert health.state == CLOSED
+    health.before_call()
+    assert health.stats()["opened"] == 1
+
+
+def test_failed_probe_reopens():
+    health = SourceHealth("test", cooldown=COOLDOWN)
+    trip(health)
+    time.sleep(COOLDOWN * 2)
+    health.before_call()
+    health.record(False, 0.1)
+    assert health.state == OPEN
+    assert health.stats()["opened"] == 2
+
+
+def test_retry_after_opens_for_at_least_that_long():
+    health = SourceHealth("test", cooldown=COOLDOWN)
+    health.before_call()
+    health.record(False, 0.1, retry_after=60)
+    assert health.state == OPEN
+    assert health.stats()["open_for_s"] > 50
@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from trackb_core import hedging
+from trackb_core.hedging import BACKUP, MIN_SAMPLES, PRIMARY, Hedger
+from trackb_core.llm import MODEL_TIERS, LLMCall
+from trackb_core.llm_cache import CacheLookup
+
+
+def slow(value, seconds):
+    def call():
+        time.sleep(seconds)
+        return value
+    return call
+
+
+def test_delay_follows_the_recent_p95():
+    hedger = Hedger(default_delay=8, min_delay=0.5)
+    assert hedger.delay_for("model") == 8
+    for i in range(MIN_SAMPLES):
+        hedger.latency.observe("model", 1.0 + i / 10)
+    assert hedger.delay_for("model") == 1.0 + (MIN_SAMPLES - 1) / 10
+    for _ in range(200):
+        hedger.latency.observe("model", 0.01)
+    assert hedger.delay_for("model") == 0.5
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = Hedger(default_delay=1, min_delay=0)
+    assert hedger.call(("model", lambda: "a"), ("model", lambda: "b")) == ("a", "model", False, PRIMARY)
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_backup_wins_on_the_same_model():
+    hedger = Hedger(default_delay=0.05, min_delay=0)
+    value, name, hedged, winner = hedger.call(("model", slow("primary", 0.5)), ("model", lambda: "backup"))
+    assert (value, name, hedged, winner) == ("backup", "model", True, BACKUP)
+    assert hedger.stats()["hedge_wins"] == 1
+
+
+def test_hedges_are_capped_to_the_recent_rate():
+    hedger = Hedger(max_rate=0.1, default_delay=0.02, min_delay=0)
+    outcomes = [hedger.call(("model", slow("primary", 0.1)), ("model", lambda: "backup"))[2] for _ in range(3)]
+    assert outcomes == [True, False, False]
+    stats = hedger.stats()
+    assert stats["hedged"] == 1 and stats["suppressed"] == 2
+
+
+def test_failed_calls_do_not_count_towards_the_latency():
+    hedger = Hedger(enabled=False)
+    hedger.call(("model", lambda: "ERROR"), ok=lambda value: value != "ERROR")
+    hedger.call(("model", lambda: "fine"), ok=lambda value: value != "ERROR")
+    assert hedger.stats()["latency"]["model"]["samples"] == 1
+
+
+def test_time_queued_for_a_pool_thread_does_not_trigger_a_hedge(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(hedging, "_hedge_pool", pool)
+    release = threading.Event()
+    pool.submit(release.wait, 5)  # every pool thread busy
+    threading.Timer(0.2, release.set).start()
+
+    hedger = Hedger(default_delay=0.1, min_delay=0)
+    assert hedger.call(("model", lambda: "primary"), ("model", lambda: "backup"))[2:] == (False, PRIMARY)
+    pool.shutdown()
+
+
+def test_trace_reports_the_winning_attempt():
+    fast = MODEL_TIERS["fast"]
+    backup_won = LLMCall(CacheLookup("miss"), "fast", fast, hedged=True, latency_ms=900, winner=BACKUP)
+    primary_won = LLMCall(CacheLookup("miss"), "fast", fast, hedged=True, latency_ms=900, winner=PRIMARY)
+    assert "hedge won" in backup_won.describe()
+    assert "primary won" in primary_won.describe()
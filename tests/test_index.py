@@ -0,0 +1,94 @@
+import pytest
+
+from trackb_core import experts
+from trackb_core.fanout import STATUS_OK, SourceResult
+from trackb_core.index import LocalIndex
+from trackb_core.records import Paper
+from trackb_core.sources import LOCAL_INDEX
+
+QUERY = "graph neural networks"
+SOURCES = [name for name, _ in experts.EXPERT_SOURCES]
+
+
+def authorship(name, work, affiliation="", country="", citations=10):
+    return {"name": name, "url": f"https://openalex.org/{name.replace(' ', '')}", "affiliation": affiliation,
+            "country": country, "work": work, "citations": citations, "relevance": 1.0, "areas": ["Machine learning"]}
+
+
+@pytest.fixture
+def index(tmp_path):
+    return LocalIndex(str(tmp_path / "index.sqlite3"))
+
+
+@pytest.fixture
+def network(monkeypatch, index):
+    """find_experts wired to `index`, with the network search replaced by a recorder."""
+    calls = []
+
+    def search_network(query, countries, use_cache):
+        calls.append((query, countries))
+        record = authorship("Ada Network", "Graph neural networks at scale", "UCL", "GB")
+        return {"OpenAlex": SourceResult("OpenAlex", STATUS_OK, [record])}
+
+    monkeypatch.setattr(experts, "get_index", lambda: index)
+    monkeypatch.setattr(experts, "_search_network", search_network)
+    return calls
+
+
+def test_paper_lookups_need_min_hits(index):
+    index.add_papers([Paper("Graph neural networks for molecules", "OpenAlex", doi="10.5555/1")])
+    assert index.search_papers(QUERY, 5) == ([], None)
+    index.add_papers([Paper(f"Graph neural networks part {i}", "OpenAlex", doi=f"10.5555/p{i}") for i in range(3)])
+    papers, age = index.search_papers(QUERY, 5)
+    assert len(papers) == 4 and age is not None
+
+
+def test_papers_from_a_chat_search_do_not_answer_expert_lookups(index, network):
+    index.add_papers([
+        Paper(f"Graph neural networks study {i}", "Semantic Scholar", authors=[f"Author {i}"], doi=f"10.5555/{i}")
+        for i in range(3)
+    ])
+    found, meta = experts.find_experts(QUERY)
+    assert network == [(QUERY, None)]
+    assert list(meta["sources"]) == ["OpenAlex"]
+    assert found[0]["name"] == "Ada Network"
+
+
+def test_a_search_ingested_from_every_source_is_answered_locally(index, network):
+    for source in SOURCES:
+        index.add_authorships([authorship("Grace Local", "Graph neural networks revisited", "UCL", "GB")], source, QUERY)
+    found, meta = experts.find_experts("networks graph neural")  # same content terms, any order
+    assert network == []
+    assert list(meta["sources"]) == [LOCAL_INDEX]
+    assert found[0]["name"] == "Grace Local" and found[0]["affiliation"] == "UCL"
+
+
+def test_partial_or_differently_filtered_searches_go_to_the_network(index, network):
+    index.add_authorships([authorship("Grace Local", "Graph neural networks revisited", "UCL", "GB")], "OpenAlex", QUERY)
+    experts.find_experts(QUERY)
+    index.add_authorships([authorship("Grace Local", "Graph neural networks revisited")], "Semantic Scholar", QUERY)
+    experts.find_experts(QUERY, location="United Kingdom")
+    assert network == [(QUERY, None), (QUERY, {"GB"})]
+
+
+def test_country_filtered_searches_are_kept_apart(index):
+    records = [authorship("Grace Local", "Graph neural networks revisited", "UCL", "GB"),
+               authorship("Ken Remote", "Graph neural networks revisited", "MIT", "US")]
+    for source in SOURCES:
+        index.add_authorships(records, source, QUERY, {"GB"})
+    by_source, age = index.search_authorships(QUERY, SOURCES, {"GB"})
+    assert age is not None
+    assert {record["name"] for record in by_source["OpenAlex"]} == {"Grace Local"}
+    assert index.search_authorships(QUERY, SOURCES) == ({}, None)
+
+
+def test_network_results_are_ingested_as_that_search(monkeypatch, index):
+    record = authorship("Ada Network", "Graph neural networks at scale", "UCL", "GB")
+    monkeypatch.setattr(experts, "get_index", lambda: index)
+    monkeypatch.setattr(experts, "fan_out_sync", lambda calls, deadline: {
+        name: SourceResult(name, STATUS_OK, [record]) for name in calls
+    })
+    monkeypatch.setattr(experts, "run_in_background", lambda call: call())
+    experts._search_network(QUERY, {"GB"}, True)
+    by_source, age = index.search_authorships(QUERY, SOURCES, {"GB"})
+    assert age is not None and by_source["Semantic Scholar"][0]["name"] == "Ada Network"
@@ -0,0 +1,64 @@
+from trackb_core.llm_cache import ResponseCache
+
+MODEL = "test-model"
+CONTEXT = (
+    "Search results: graph neural networks learn representations of nodes by passing messages "
+    "between neighbours, and are used for molecules, social networks, traffic forecasting and "
+    "recommendation systems across many recent papers."
+)
+
+
+def messages(question: str):
+    return [{"role": "system", "content": CONTEXT}, {"role": "user", "content": question}]
+
+
+def cache():
+    return ResponseCache(near_duplicates=True, near_threshold=0.9)
+
+
+def test_exact_hit():
+    responses = cache()
+    question = "What are graph neural networks?"
+    responses.store(MODEL, messages(question), 256, "answer", question=question)
+    found = responses.lookup(MODEL, messages(question), 256, question=question)
+    assert found.kind == "exact" and found.answer == "answer"
+
+
+def test_near_hit_on_a_reworded_question():
+    responses = cache()
+    question = "What are graph neural networks?"
+    responses.store(MODEL, messages(question), 256, "answer", question=question)
+    reworded = "what are Graph Neural Networks"
+    found = responses.lookup(MODEL, messages(reworded), 256, question=reworded)
+    assert found.kind == "near" and found.answer == "answer"
+    assert found.similarity >= 0.9
+    assert responses.stats()["near_hits"] == 1
+
+
+def test_different_question_over_the_same_context_misses():
+    responses = cache()
+    question = "What are graph neural networks?"
+    responses.store(MODEL, messages(question), 256, "answer", question=question)
+    other = "Who invented graph neural networks?"
+    assert responses.lookup(MODEL, messages(other), 256, question=other).kind == "miss"
+
+
+def test_near_hits_need_the_same_model_and_max_tokens():
+    responses = cache()
+    question = "What are graph neural networks?"
+    responses.store(MODEL, messages(question), 256, "answer", question=question)
+    reworded = "what are graph neural networks"
+    assert responses.lookup("other-model", messages(reworded), 256, question=reworded).kind == "miss"
+    assert responses.lookup(MODEL, messages(reworded), 512, question=reworded).kind == "miss"
+
+
+def test_short_prompts_only_hit_exactly():
+    responses = cache()
+    responses.store(MODEL, [{"role": "user", "content": "hello there"}], 256, "hi")
+    assert responses.lookup(MODEL, [{"role": "user", "content": "hello there!"}], 256).kind == "miss"
+
+
+def test_expired_entries_miss():
+    responses = ResponseCache(ttl=-1)
+    responses.store(MODEL, messages("q"), 256, "answer")
+    assert responses.lookup(MODEL, messages("q"), 256).kind == "miss"
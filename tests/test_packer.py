@@ -0,0 +1,54 @@
+from trackb_core.packer import content_terms, context_budget, count_tokens, estimate_tokens, pack, split_snippets
+
+QUESTION = "perovskite solar cell stability"
+SNIPPETS = [
+    "A survey of wind turbine blade materials and their fatigue behaviour under cyclic loads.",
+    "Perovskite solar cell stability improves with encapsulation; perovskite degradation is driven by moisture.",
+    "Solar cell efficiency records for silicon tandem devices.",
+]
+
+
+def test_most_relevant_snippets_are_kept_first():
+    result = pack(QUESTION, SNIPPETS, budget=1000)
+    assert result.kept[0] == SNIPPETS[1]
+    assert result.kept[-1] == SNIPPETS[0]
+    assert not result.dropped
+
+
+def test_packed_context_stays_within_the_budget():
+    budget = count_tokens(SNIPPETS[1]) + 2
+    result = pack(QUESTION, SNIPPETS, budget=budget)
+    assert result.kept == [SNIPPETS[1]]
+    assert result.tokens <= budget
+    assert set(result.dropped) == {SNIPPETS[0], SNIPPETS[2]}
+    assert "kept 1 of 3 snippets" in result.describe()
+
+
+def test_smaller_items_still_fill_the_remaining_room():
+    big = "perovskite stability " * 200
+    small = "perovskite note"
+    result = pack(QUESTION, [big, small], budget=count_tokens(small) + 2)
+    assert result.kept == [small]
+    assert result.dropped == [big]
+
+
+def test_zero_budget_keeps_nothing():
+    result = pack(QUESTION, SNIPPETS, budget=0)
+    assert result.kept == [] and len(result.dropped) == 3
+
+
+def test_context_budget_shrinks_with_the_conversation():
+    alone = context_budget("What is a perovskite?", total=3000)
+    with_history = context_budget("What is a perovskite?", conversation="earlier turns " * 100, total=3000)
+    assert 0 < with_history < alone < 3000
+    assert context_budget("What is a perovskite?", total=10) == 0
+
+
+def test_estimate_counts_punctuation_and_long_words():
+    assert estimate_tokens("a, b.") == 4
+    assert estimate_tokens("internationalization") == 5
+
+
+def test_helpers():
+    assert content_terms("What are the papers on Graph Neural Networks?") == ["graph", "neural", "networks"]
+    assert split_snippets("first\n\n  \n\nsecond\n") == ["first", "second"]
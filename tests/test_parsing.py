@@ -0,0 +1,20 @@
+from trackb_core.parsing import rebuild_abstract
+
+
+def test_repeated_words_fill_every_position():
+    index = {"the": [0, 3], "model": [1, 4], "learns": [2]}
+    assert rebuild_abstract(index) == "the model learns the model"
+
+
+def test_gaps_are_skipped():
+    assert rebuild_abstract({"graphs": [0], "scale": [2], "well": [5]}) == "graphs scale well"
+
+
+def test_truncated_abstract_gets_an_ellipsis():
+    index = {"a": [0, 2, 4], "b": [1, 3]}
+    assert rebuild_abstract(index, max_words=3) == "a b a..."
+
+
+def test_missing_abstract():
+    assert rebuild_abstract(None) == "No abstract available."
+    assert rebuild_abstract({}) == "No abstract available."
@@ -0,0 +1,42 @@
+import pytest
+
+from trackb_core.ratelimit import RateLimited, RateLimiter
+
+
+def limiter(tmp_path, rate, burst, max_wait):
+    return RateLimiter(str(tmp_path / "ratelimit.sqlite3"), limits={"api.example.org": (rate, burst)}, max_wait=max_wait)
+
+
+def test_burst_then_wait(tmp_path):
+    limits = limiter(tmp_path, rate=10.0, burst=2.0, max_wait=1.0)
+    assert limits.acquire("api.example.org") == 0.0
+    assert limits.acquire("api.example.org") == 0.0
+    waited = limits.acquire("api.example.org")
+    assert 0.05 < waited <= 0.1
+    stats = limits.stats()
+    assert stats["acquired"] == 3
+    assert stats["waited"] == 1
+    assert stats["hosts"]["api.example.org"]["queued"] == 0
+
+
+def test_rejects_waits_beyond_the_maximum(tmp_path):
+    limits = limiter(tmp_path, rate=1.0, burst=1.0, max_wait=0.2)
+    limits.acquire("api.example.org")
+    with pytest.raises(RateLimited) as excinfo:
+        limits.acquire("api.example.org")
+    assert excinfo.value.wait > 0.2
+    assert limits.stats()["rejected"] == 1
+
+
+def test_unlimited_hosts_do_not_wait(tmp_path):
+    limits = limiter(tmp_path, rate=1.0, burst=1.0, max_wait=0.2)
+    for _ in range(5):
+        assert limits.acquire_url("https://other.example.org/search?q=x") == 0.0
+
+
+def test_buckets_are_shared_through_the_state_file(tmp_path):
+    first = limiter(tmp_path, rate=1.0, burst=1.0, max_wait=0.2)
+    second = limiter(tmp_path, rate=1.0, burst=1.0, max_wait=0.2)
+    first.acquire("api.example.org")
+    with pytest.raises(RateLimited):
+        second.acquire("api.example.org")
@@ -0,0 +1,38 @@
+from trackb_core.records import Paper, merge_papers
+
+
+def test_merge_on_doi():
+    s2 = Paper("Attention Is All You Need", "Semantic Scholar", doi="https://doi.org/10.5555/ABC", citations=90)
+    openalex = Paper("Attention is all you need (preprint)", "OpenAlex", doi="10.5555/abc", citations=120,
+                     open_access=True, venue="NeurIPS")
+    merged = merge_papers([[s2], [openalex]])
+    assert len(merged) == 1
+    paper = merged[0]
+    assert paper.sources == ("Semantic Scholar", "OpenAlex")
+    assert paper.citations == 120
+    assert paper.open_access is True
+    assert paper.venue == "NeurIPS"
+
+
+def test_merge_on_normalized_title():
+    first = Paper("Graph Neural Networks: A Review", "Semantic Scholar", year=2020)
+    second = Paper("graph neural networks - a review", "Crossref", doi="10.5555/gnn", publisher="ACM")
+    merged = merge_papers([[first], [second]])
+    assert len(merged) == 1
+    assert merged[0].doi == "10.5555/gnn"
+    assert merged[0].publisher == "ACM"
+    assert merged[0].year == 2020
+
+
+def test_same_title_with_different_dois_stays_separate():
+    first = Paper("Introduction", "OpenAlex", doi="10.5555/one")
+    second = Paper("Introduction", "Crossref", doi="10.5555/two")
+    assert len(merge_papers([[first], [second]])) == 2
+
+
+def test_inputs_are_not_modified():
+    first = Paper("Shared Paper", "Semantic Scholar", doi="10.5555/x", citations=1)
+    second = Paper("Shared Paper", "OpenAlex", doi="10.5555/x", citations=5)
+    merge_papers([[first], [second]])
+    assert first.citations == 1
+    assert first.sources == ("Semantic Scholar",)
@@ -0,0 +1,94 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from trackb_core.replay import CassetteWriter, RecordingAdapter, ReplayAdapter, load_cassettes, per_process_path
+
+
+class Upstream(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def session_with(adapter):
+    session = requests.Session()
+    session.mount("http://", adapter)
+    return session
+
+
+def test_recorded_traffic_replays_offline(tmp_path, upstream):
+    path = str(tmp_path / "run.jsonl.gz")
+    writer = CassetteWriter(per_process_path(path, 1))
+    recorder = session_with(RecordingAdapter(writer))
+    assert recorder.get(f"{upstream}/works", params={"search": "gnn", "per_page": 5}).json() == {
+        "path": "/works?search=gnn&per_page=5"
+    }
+    writer.close()
+
+    replay = ReplayAdapter(load_cassettes(path), latency_scale=0)
+    session = session_with(replay)
+    # Served from the cassette: parameter order does not matter
+    response = session.get(f"{upstream}/works?per_page=5&search=gnn")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/json"
+    assert response.json() == {"path": "/works?search=gnn&per_page=5"}
+    with pytest.raises(requests.ConnectionError):
+        session.get(f"{upstream}/works?search=other")
+    assert replay.stats() == {"replayed": 1, "loose": 0, "misses": 1, "recordings": 1}
+
+
+def entry(url, text, body=""):
+    return {"method": "POST", "url": url, "body": body, "status": 200, "headers": {}, "elapsed_ms": 1.0, "text": text}
+
+
+def test_repeated_recordings_are_served_in_turn():
+    session = session_with(ReplayAdapter([entry("http://llm/invoke", "first"), entry("http://llm/invoke", "second")],
+                                         latency_scale=0))
+    assert [session.post("http://llm/invoke").text for _ in range(3)] == ["first", "second", "first"]
+
+
+def test_loose_matching_falls_back_to_the_same_endpoint():
+    recordings = [entry("http://llm/invoke", "answer", body="a" * 32)]
+    exact = session_with(ReplayAdapter(recordings, latency_scale=0))
+    with pytest.raises(requests.ConnectionError):
+        exact.post("http://llm/invoke", data=b"a slightly different prompt")
+    loose_adapter = ReplayAdapter(recordings, latency_scale=0, match="loose")
+    assert session_with(loose_adapter).post("http://llm/invoke", data=b"a slightly different prompt").text == "answer"
+    assert loose_adapter.stats()["loose"] == 1
+
+
+def test_a_truncated_cassette_keeps_its_complete_lines(tmp_path):
+    path = tmp_path / "cut.jsonl.gz"
+    writer = CassetteWriter(str(path))
+    request = requests.Request("GET", "http://api/x").prepare()
+    response = requests.Response()
+    response.status_code, response._content = 200, b"ok"
+    writer.write(request, response, 0.01)
+    writer.close()
+    data = path.read_bytes()
+    path.write_bytes(data + data[:len(data) // 2])  # a second member cut off mid-write
+    assert [e["text"] for e in load_cassettes(str(path))] == ["ok"]
+
+
+def test_missing_cassettes_fail_loudly(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_cassettes(str(tmp_path / "none.jsonl.gz"))
@@ -0,0 +1,58 @@
+import threading
+
+from trackb_core import agent
+from trackb_core.llm import LLMCall
+from trackb_core.llm_cache import CacheLookup
+from trackb_core.router import IntentRouter
+
+
+def test_routes_by_priority_and_reports_the_runner_up():
+    router = IntentRouter()
+    decision = router.classify("Latest research papers on batteries")
+    assert decision.route == "academic"
+    assert decision.ambiguous and decision.runner_up == "live"
+    assert decision.matches["academic"] == ["research", "paper"]
+
+
+def test_unmatched_messages_take_the_default_route():
+    router = IntentRouter()
+    decision = router.classify("Explain entropy simply.")
+    assert decision.route == "direct" and not decision.candidates
+    assert router.stats()["routes"]["direct"]["hits"] == 1
+
+
+def test_longer_keywords_win_over_their_prefix():
+    router = IntentRouter([("a", ["news"]), ("b", ["newsletter"])])
+    assert router.classify("my newsletter").route == "b"
+
+
+class FakeSearches:
+    def __init__(self, papers=()):
+        self.papers = list(papers)
+        self.live_calls = []
+
+    def academic(self, user_message, on_result=None, use_cache=True):
+        return self.papers, {}
+
+    def live(self, user_message):
+        self.live_calls.append(threading.current_thread().name)
+        return "Live result paragraph."
+
+
+def fake_llm(messages, question=None, use_cache=True, tier="quality"):
+    return "answer", LLMCall(CacheLookup("miss"), tier, "model")
+
+
+def test_empty_academic_search_falls_back_to_the_prefetched_live_search(monkeypatch):
+    monkeypatch.setattr(agent, "invoke_holistic_llm_cached", fake_llm)
+    searches = FakeSearches()
+    events = []
+
+    history, trace = agent.agent_chat_logic(
+        "Latest research papers on batteries", [], on_event=lambda event, data: events.append((event, data)),
+        searches=searches,
+    )
+    assert history[-1][1] == "answer"
+    assert ("route", {"route": "live", "fallback": True}) in events
+    assert searches.live_calls and searches.live_calls[0].startswith("trackb-fanout")  # the prefetch, not a new call
+    assert "used the live search prefetched in parallel" in trace
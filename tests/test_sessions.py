@@ -0,0 +1,80 @@
+import sqlite3
+import time
+
+from trackb_core.sessions import SessionStore
+
+
+def store_at(tmp_path, **kwargs):
+    return SessionStore(str(tmp_path / "sessions.sqlite3"), **kwargs)
+
+
+def age(store: SessionStore, session_id: str, seconds: float):
+    with sqlite3.connect(store.path) as db:
+        db.execute("UPDATE sessions SET last_used = last_used - ? WHERE id = ?", (seconds, session_id))
+
+
+def test_new_sessions_are_written_on_their_first_turn(tmp_path):
+    store = store_at(tmp_path)
+    session = store.get_or_create()
+    assert store.stats()["active"] == 0
+    session.add_turn("What is a perovskite?", "A crystal structure.")
+    assert store.stats()["active"] == 1
+
+
+def test_one_turn_session_survives_a_slow_follow_up(tmp_path):
+    store = store_at(tmp_path, idle_ttl=1800)
+    session = store.get_or_create()
+    session.add_turn("What is a perovskite?", "A crystal structure.")
+    age(store, session.id, 400)
+    store._purge(time.time())
+
+    resumed = store.get_or_create(session.id)
+    assert resumed.id == session.id
+    assert resumed.turns == 1 and resumed.adopted
+    assert store.stats()["expired"] == 0
+
+
+def test_idle_sessions_expire(tmp_path):
+    store = store_at(tmp_path, idle_ttl=60)
+    session = store.get_or_create()
+    session.add_turn("q", "a")
+    age(store, session.id, 120)
+    assert store.get_or_create(session.id).id != session.id
+    store._purge(time.time())
+    assert store.stats()["expired"] == 1
+
+
+def test_unadopted_sessions_are_evicted_first(tmp_path):
+    store = store_at(tmp_path, max_sessions=2)
+    adopted = store.get_or_create()
+    adopted.add_turn("q", "a")
+    age(store, adopted.id, 100)  # the oldest, but resumed by its client
+    adopted = store.get_or_create(adopted.id)
+    age(store, adopted.id, 100)
+    for _ in range(2):
+        store.get_or_create().add_turn("q", "a")
+
+    store._purge(time.time())
+    assert store.stats()["evicted"] == 1
+    assert store.get_or_create(adopted.id).id == adopted.id
+
+
+def test_adoption_survives_later_turns(tmp_path):
+    store = store_at(tmp_path)
+    session = store.get_or_create()
+    session.add_turn("q1", "a1")
+    resumed = store.get_or_create(session.id)
+    resumed.add_turn("q2", "a2")
+    with sqlite3.connect(store.path) as db:
+        assert db.execute("SELECT adopted, turns FROM sessions WHERE id = ?", (session.id,)).fetchone() == (1, 2)
+
+
+def test_old_turns_fold_into_the_summary(tmp_path):
+    store = store_at(tmp_path)
+    session = store.get_or_create()
+    for i in range(5):
+        session.add_turn(f"question {i}", f"Answer {i}. More detail.", recent_turns=2)
+    assert [turn[0] for turn in session.history()] == ["question 3", "question 4"]
+    context = session.context()
+    assert "- Q: question 0 -> A: Answer 0." in context
+    assert "More detail" in context  # kept verbatim for recent turns only
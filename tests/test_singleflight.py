@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from trackb_core.singleflight import SingleFlight
+
+FOLLOWERS = 3
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def run_coalesced(flight: SingleFlight, fn):
+    """Start a leader blocked inside fn, queue FOLLOWERS callers behind it, and return every outcome."""
+    release = threading.Event()
+    calls = []
+    outcomes = []
+    lock = threading.Lock()
+
+    def leader_fn():
+        calls.append(1)
+        release.wait(5)
+        return fn()
+
+    def caller():
+        try:
+            outcome = flight.do("key", leader_fn)
+        except Exception as e:
+            outcome = e
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=caller)]
+    threads[0].start()
+    wait_for(lambda: flight.stats()["in_flight"] == 1)
+    threads += [threading.Thread(target=caller) for _ in range(FOLLOWERS)]
+    for thread in threads[1:]:
+        thread.start()
+    wait_for(lambda: flight.stats()["waiting"] == FOLLOWERS)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return calls, outcomes
+
+
+def test_identical_calls_are_coalesced():
+    flight = SingleFlight("test")
+    calls, outcomes = run_coalesced(flight, lambda: "answer")
+    assert len(calls) == 1
+    assert sorted(outcomes) == [("answer", False)] + [("answer", True)] * FOLLOWERS
+    stats = flight.stats()
+    assert stats["calls"] == 1
+    assert stats["coalesced"] == FOLLOWERS
+    assert stats["in_flight"] == 0
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight("test")
+
+    def fail():
+        raise ValueError("upstream down")
+
+    calls, outcomes = run_coalesced(flight, fail)
+    assert len(calls) == 1
+    assert len(outcomes) == FOLLOWERS + 1
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    # A failed call is not remembered: the next one runs again
+    assert flight.do("key", lambda: "retried") == ("retried", False)
+
+
+def test_different_keys_do_not_share():
+    flight = SingleFlight("test")
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.stats()["coalesced"] == 0
@@ -1,31 +1,56 @@
+import time
+_STARTED = time.perf_counter()  # measured before the heavy imports below
+
 import os
 import json
+import asyncio
+import threading
+from contextlib import asynccontextmanager
 from typing import Any, Dict, List, Optional
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import importlib.util
-import sys
-
-# Load the vers4 script as a module (file has no .py extension)
-PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
-VERS4_PATH = os.path.join(PROJECT_ROOT, "vers4")
+from trackb_core.agent import agent_chat_logic
+from trackb_core.batch import DEFAULT_CONCURRENCY as BATCH_CONCURRENCY, MAX_ITEMS as BATCH_MAX_ITEMS, BatchSearches, sharing_order, worker_cap
+from trackb_core.execution import BoundedExecutor, Overloaded
+from trackb_core.experts import find_experts
+from trackb_core.health import health_stats
+from trackb_core.hedging import get_hedger
+from trackb_core.http_pool import pool_stats
+from trackb_core.cache import get_search_cache
+from trackb_core.index import get_index
+from trackb_core.llm import is_error_answer
+from trackb_core.llm_cache import get_response_cache
+from trackb_core.metrics import Timings, get_metrics, merge_snapshots, render as render_metrics
+from trackb_core.ratelimit import get_rate_limiter
+from trackb_core.replay import replay_stats
+from trackb_core.router import get_router
+from trackb_core.runtime import rss_mb, startup_report
+from trackb_core.serving import get_worker_registry, uvicorn_options
+from trackb_core.sessions import get_session_store
+from trackb_core.singleflight import flight_stats
 
-# Read and execute the vers4 file with proper encoding
-vers4_namespace = {}
-with open(VERS4_PATH, 'r', encoding='utf-8') as f:
-	exec(f.read(), vers4_namespace)
+# Bounded worker pool: agent_chat_logic is blocking, so it must never run on the event loop
+executor = BoundedExecutor()
 
-# Create a simple module-like object
-class Vers4Module:
-	def __init__(self, namespace):
-		for key, value in namespace.items():
-			setattr(self, key, value)
+# Publishes this worker's stats to the shared registry, so any worker can report all of them
+_publisher_stop = threading.Event()
 
-vers4 = Vers4Module(vers4_namespace)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	"""Worker start-up (report, stats publisher) and shutdown (stop publishing, drain the worker pool)."""
+	print(f"[trackB_api] worker {STARTUP['pid']} ready: startup {STARTUP['startup_ms']} ms, RSS {STARTUP['rss_mb']} MB")
+	threading.Thread(
+		target=get_worker_registry().run_publisher, args=(publish_snapshot, time.time(), _publisher_stop),
+		name="trackb-stats", daemon=True,
+	).start()
+	yield
+	_publisher_stop.set()
+	executor.shutdown(wait=True)
 
 # FastAPI app
-app = FastAPI(title="Track B API")
+app = FastAPI(title="Track B API", lifespan=lifespan)
 app.add_middleware(
 	CORSMiddleware,
 	allow_origins=["*"],
@@ -34,44 +59,99 @@ app.add_middleware(
 	allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+	started = time.perf_counter()
+	response = await call_next(request)
+	# Label by route template, not raw path, to keep the series count bounded
+	route = request.scope.get("route")
+	path = getattr(route, "path", "unmatched")
+	metrics = get_metrics()
+	metrics.observe("trackb_request_seconds", time.perf_counter() - started, path=path, status=response.status_code)
+	metrics.inc("trackb_requests_total", path=path, status=response.status_code)
+	return response
+
+def overloaded_response(e: Overloaded):
+	return JSONResponse(
+		status_code=503,
+		content={"answer": "The server is busy, please retry shortly.", "trace_url": None, "trace_text": str(e)},
+		headers={"Retry-After": str(e.retry_after)},
+	)
+
 class ChatRequest(BaseModel):
 	message: str
-	history: Optional[List[Dict[str, Any]]] = None
+	session_id: Optional[str] = None  # server-side session; the client sends only the new message
+	history: Optional[List[Dict[str, Any]]] = None  # legacy clients: full history, used to seed a new session
+	use_cache: bool = True  # False bypasses cached search results and LLM responses for this request
+
+def to_history_list(history: Optional[List[Dict[str, Any]]]) -> List[List[str]]:
+	"""Convert chat messages to the [user, assistant] pairs agent_chat_logic expects."""
+	history_list = []
+	if history:
+		for msg in history:
+			role = msg.get("role", "")
+			content = msg.get("content", "")
+			if role == "user":
+				history_list.append([content, ""])
+			elif role == "assistant" and history_list:
+				history_list[-1][1] = content
+	return history_list
+
+def open_session(req: ChatRequest):
+	"""
+	Resume (or start) the request's session, seeding a new one from any history the client sent.
+	Blocking (SQLite): call it through asyncio.to_thread from handlers.
+	"""
+	session = get_session_store().get_or_create(req.session_id)
+	if session.turns == 0:
+		for user_message, answer in to_history_list(req.history):
+			session.add_turn(user_message, answer)
+	return session
+
+def queued_pipeline(timings: Timings):
+	"""agent_chat_logic, first recording how long the request waited for a worker thread as the 'queue' stage."""
+	def run(*args, **kwargs):
+		timings.add("queue", time.perf_counter() - timings.started)
+		return agent_chat_logic(*args, **kwargs)
+	return run
+
+def final_answer_from(new_history) -> str:
+	"""Extract the final answer (last assistant response)."""
+	final_answer = ""
+	if new_history and len(new_history) > 0:
+		final_answer = new_history[-1][1]
+	if not final_answer:
+		final_answer = "The agent did not provide a final answer."
+	return final_answer
 
 @app.post("/chat")
 async def chat(req: ChatRequest):
 	"""
-	Call the agent logic from vers4 and return answer and trace.
+	Call the agent logic and return answer and trace.
 	"""
 	try:
-		# Convert history format if needed (vers4 expects list of [user, assistant] pairs)
-		history_list = []
-		if req.history:
-			for msg in req.history:
-				role = msg.get("role", "")
-				content = msg.get("content", "")
-				if role == "user":
-					history_list.append([content, ""])
-				elif role == "assistant" and history_list:
-					history_list[-1][1] = content
-		
-		# Call the vers4 agent logic
-		new_history, trace_text = vers4.agent_chat_logic(req.message, history_list)
+		session = await asyncio.to_thread(open_session, req)
+		timings = Timings()
 		
-		# Extract the final answer (last assistant response)
-		final_answer = ""
-		if new_history and len(new_history) > 0:
-			final_answer = new_history[-1][1]
-		
-		if not final_answer:
-			final_answer = "The agent did not provide a final answer."
+		# Call the agent logic on the worker pool
+		new_history, trace_text = await executor.run(
+			queued_pipeline(timings), req.message, session.history(), use_cache=req.use_cache,
+			conversation=session.context(), timings=timings
+		)
+		answer = final_answer_from(new_history)
+		if not is_error_answer(answer):
+			await asyncio.to_thread(session.add_turn, req.message, answer)
 		
 		# Return answer and trace info
 		return {
-			"answer": final_answer,
-			"trace_url": None,  # vers4 doesn't use LangSmith traces
-			"trace_text": trace_text
+			"answer": answer,
+			"trace_url": None,  # the core pipeline doesn't use LangSmith traces
+			"trace_text": trace_text,
+			"session_id": session.id,
+			"timings": timings.breakdown()
 		}
+	except Overloaded as e:
+		return overloaded_response(e)
 	except Exception as e:
 		return {
 			"answer": f"An error occurred: {e}",
@@ -79,10 +159,248 @@ async def chat(req: ChatRequest):
 			"trace_text": f"ERROR: {str(e)}"
 		}
 
+def sse(event: str, data: Dict[str, Any]) -> str:
+	return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+	"""
+	Server-sent-events variant of /chat. Emits stage events as the pipeline runs
+	(route, source, llm, chunk, trace) and finishes with a 'final' event carrying
+	the same payload /chat returns. The Bedrock proxy does not stream completions,
+	so the 'chunk' events re-chunk the finished answer after the 'llm' event.
+	"""
+	loop = asyncio.get_running_loop()
+	events: asyncio.Queue = asyncio.Queue()
+	session = await asyncio.to_thread(open_session, req)
+	timings = Timings()
+
+	def on_event(event, data):
+		# Called from the worker thread
+		loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+	def run_pipeline():
+		try:
+			return queued_pipeline(timings)(
+				req.message, session.history(), on_event=on_event, use_cache=req.use_cache,
+				conversation=session.context(), timings=timings
+			)
+		finally:
+			on_event(None, None)
+
+	try:
+		job = executor.submit(run_pipeline)
+	except Overloaded as e:
+		return overloaded_response(e)
+
+	async def event_stream():
+		# Flush headers and a first event straight away so the client sees bytes immediately
+		yield sse("accepted", {"queued": executor.queued, "session_id": session.id})
+		while True:
+			event, data = await events.get()
+			if event is None:
+				break
+			yield sse(event, data)
+		try:
+			new_history, trace_text = await job
+			answer = final_answer_from(new_history)
+			if not is_error_answer(answer):
+				await asyncio.to_thread(session.add_turn, req.message, answer)
+			yield sse("final", {"answer": answer, "trace_url": None, "trace_text": trace_text, "session_id": session.id, "timings": timings.breakdown()})
+		except Exception as e:
+			yield sse("final", {"answer": f"An error occurred: {e}", "trace_url": None, "trace_text": f"ERROR: {str(e)}", "session_id": session.id})
+
+	return StreamingResponse(
+		event_stream(),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
+
+class BatchRequest(BaseModel):
+	messages: List[str]
+	concurrency: Optional[int] = None  # questions running at once (default TRACKB_BATCH_CONCURRENCY)
+	use_cache: bool = True
+	stream: bool = True  # False waits for the whole batch and returns every result in one JSON body
+
+# Worker threads all running batches may hold together (created on first use, inside the event loop)
+_batch_workers: Optional[asyncio.Semaphore] = None
+
+def batch_worker_slots() -> asyncio.Semaphore:
+	global _batch_workers
+	if _batch_workers is None:
+		_batch_workers = asyncio.Semaphore(worker_cap(executor.max_workers))
+	return _batch_workers
+
+async def run_batch_item(index: int, message: str, searches: BatchSearches, use_cache: bool) -> Dict[str, Any]:
+	"""One batch question through the pipeline; waits out Overloaded instead of failing the item."""
+	while True:
+		timings = Timings()
+		try:
+			new_history, trace_text = await executor.run(
+				queued_pipeline(timings), message, [], use_cache=use_cache, timings=timings, searches=searches
+			)
+			break
+		except Overloaded as e:
+			await asyncio.sleep(e.retry_after)
+		except Exception as e:
+			return {"index": index, "answer": f"An error occurred: {e}", "trace_text": f"ERROR: {str(e)}", "error": True}
+	answer = final_answer_from(new_history)
+	return {"index": index, "answer": answer, "trace_text": trace_text, "timings": timings.breakdown(), "error": is_error_answer(answer)}
+
+@app.post("/chat/batch")
+async def chat_batch(req: BatchRequest):
+	"""
+	Answer many independent questions (no sessions) with bounded parallelism.
+	Each distinct search runs once for the whole batch, and identical prompts share
+	one LLM call. Streams an 'item' server-sent event per question as it completes
+	(in completion order, carrying its index) and a closing 'done' event with totals.
+	All batches together hold at most TRACKB_BATCH_WORKER_SHARE of the worker threads,
+	so interactive /chat requests keep the rest.
+	"""
+	if not req.messages:
+		return JSONResponse(status_code=400, content={"error": "A batch needs at least one message."})
+	if len(req.messages) > BATCH_MAX_ITEMS:
+		return JSONResponse(status_code=413, content={"error": f"A batch takes at most {BATCH_MAX_ITEMS} messages, got {len(req.messages)}."})
+	shared = batch_worker_slots()
+	concurrency = max(1, min(req.concurrency or BATCH_CONCURRENCY, worker_cap(executor.max_workers)))
+	searches = BatchSearches()
+	slots = asyncio.Semaphore(concurrency)
+	started = time.perf_counter()
+
+	async def run_item(i):
+		async with slots, shared:
+			return await run_batch_item(i, req.messages[i], searches, req.use_cache)
+
+	# Tasks queue on the semaphore in creation order: first occurrences of each search first
+	tasks = [asyncio.ensure_future(run_item(i)) for i in sharing_order(req.messages)]
+
+	def summary(results):
+		return {
+			"items": len(req.messages),
+			"errors": sum(1 for result in results if result["error"]),
+			"concurrency": concurrency,
+			"searches": searches.stats(),
+			"elapsed_ms": round((time.perf_counter() - started) * 1000),
+		}
+
+	if not req.stream:
+		results = sorted(await asyncio.gather(*tasks), key=lambda result: result["index"])
+		return {"results": results, **summary(results)}
+
+	async def event_stream():
+		results = []
+		try:
+			yield sse("accepted", {"items": len(req.messages), "concurrency": concurrency})
+			for next_done in asyncio.as_completed(tasks):
+				result = await next_done
+				results.append(result)
+				yield sse("item", result)
+			yield sse("done", summary(results))
+		finally:
+			# Client went away: questions that have not started yet are dropped
+			for task in tasks:
+				task.cancel()
+
+	return StreamingResponse(
+		event_stream(),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
+
+class ExpertsRequest(BaseModel):
+	category: str = ""
+	keywords: str = ""
+	location: str = "Any"
+	affiliation: str = ""
+	count: int = 5
+	summarize: bool = False  # optional one-sentence LLM summary per expert
+	use_cache: bool = True
+
+@app.post("/experts")
+async def experts(req: ExpertsRequest):
+	"""
+	Rank experts for a topic from OpenAlex / Semantic Scholar authorships (no LLM call
+	unless summarize is set).
+	"""
+	try:
+		found, meta = await executor.run(
+			find_experts, req.category, req.keywords, req.location, req.affiliation,
+			max(1, min(req.count, 50)), req.use_cache, req.summarize
+		)
+		return {"experts": found, "meta": meta}
+	except Overloaded as e:
+		return overloaded_response(e)
+	except Exception as e:
+		return {"experts": [], "error": str(e)}
+
+# Cold-start cost of this worker (no Gradio UI, optional tools load on first use)
+STARTUP = startup_report(_STARTED)
+
+@app.get("/health")
+async def health():
+	"""Liveness check with this worker's start-up time and resident memory."""
+	return {"status": "ok", "startup": STARTUP, "rss_mb": round(rss_mb(), 1)}
+
+def collect_stats() -> dict:
+	"""This worker's execution-layer, upstream connection-pool, record/replay, source-health, rate-limit, cache, local-index, hedging, request-coalescing, session and routing statistics."""
+	index = get_index()
+	return {
+		"executor": executor.stats(),
+		"http_pool": pool_stats(),
+		"replay": replay_stats(),
+		"source_health": health_stats(),
+		"rate_limits": get_rate_limiter().stats(),
+		"search_cache": get_search_cache().stats(),
+		"local_index": index.stats() if index is not None else None,
+		"llm_cache": get_response_cache().stats(),
+		"llm_hedging": get_hedger().stats(),
+		"singleflight": flight_stats(),
+		"sessions": get_session_store().stats(),
+		"router": get_router().stats(),
+	}
+
+def publish_snapshot() -> dict:
+	return {**collect_stats(), "metrics": get_metrics().snapshot()}
+
+@app.get("/stats")
+async def stats(scope: str = "worker"):
+	"""
+	Statistics of the worker that answers; scope=all adds the last published
+	snapshot of every live worker process.
+	"""
+	# The stores behind these are SQLite files; keep their I/O off the event loop
+	result = {"pid": os.getpid(), **(await asyncio.to_thread(collect_stats))}
+	if scope == "all":
+		workers = await asyncio.to_thread(get_worker_registry().snapshots)
+		for snapshot in workers.values():
+			snapshot["stats"].pop("metrics", None)
+		result["workers"] = workers
+	return result
+
+@app.get("/metrics")
+async def metrics(scope: str = "all"):
+	"""
+	Prometheus-style latency histograms and counters. Summed over every live worker
+	(this worker's series are current, the others' are from their last publication);
+	scope=worker reports this worker only.
+	"""
+	own = get_metrics().snapshot()
+	snapshots = [own]
+	if scope == "all":
+		for pid, worker in (await asyncio.to_thread(get_worker_registry().snapshots)).items():
+			if pid != os.getpid() and "metrics" in worker["stats"]:
+				snapshots.append(worker["stats"]["metrics"])
+	return PlainTextResponse(render_metrics(merge_snapshots(snapshots)), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
 	import uvicorn
-	print("Starting Track B API on http://127.0.0.1:5000")
-	print("Using vers4 backend with Holistic AI Bedrock Proxy")
+	options = uvicorn_options()
+	print(f"Starting Track B API on http://{options['host']}:{options['port']} with {options['workers']} worker(s)")
+	print("Using trackb_core backend with Holistic AI Bedrock Proxy")
 	print("Academic APIs: Semantic Scholar + OpenAlex + CrossRef")
-	uvicorn.run(app, host="127.0.0.1", port=5000)
-
+	print(f"Worker threads: {executor.max_workers} | Max in-flight requests: {executor.max_in_flight}")
+	if options["workers"] > 1:
+		# Worker processes import the app themselves, so uvicorn needs its import path
+		uvicorn.run("trackB_api:app", app_dir=os.path.dirname(os.path.abspath(__file__)), **options)
+	else:
+		uvicorn.run(app, **options)
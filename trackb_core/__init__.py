@@ -0,0 +1,53 @@
+"""
+Track B core: the BotOrNot agent pipeline and its shared building blocks.
+
+Submodules are imported lazily on first attribute access, so importing the
+package is cheap and API workers load only what they actually use. Nothing
+here imports Gradio, numpy or the optional search tools.
+"""
+import importlib
+
+_EXPORTS = {
+    'agent_chat_logic': 'agent',
+    'BatchSearches': 'batch',
+    'find_experts': 'experts',
+    'SourceResult': 'fanout',
+    'fan_out': 'fanout',
+    'fan_out_sync': 'fanout',
+    'CircuitOpen': 'health',
+    'get_health': 'health',
+    'build_graph': 'graph',
+    'run_graph': 'graph',
+    'LocalIndex': 'index',
+    'get_index': 'index',
+    'format_lc_messages': 'llm',
+    'invoke_holistic_llm': 'llm',
+    'invoke_holistic_llm_cached': 'llm',
+    'invoke_holistic_llm_hedged': 'llm',
+    'choose_tier': 'llm',
+    'count_tokens': 'packer',
+    'pack': 'packer',
+    'RateLimited': 'ratelimit',
+    'get_rate_limiter': 'ratelimit',
+    'Paper': 'records',
+    'IntentRouter': 'router',
+    'get_router': 'router',
+    'merge_papers': 'records',
+    'SessionStore': 'sessions',
+    'get_session_store': 'sessions',
+    'search_academic_sources': 'sources',
+    'search_crossref': 'sources',
+    'search_openalex': 'sources',
+    'search_semantic_scholar': 'sources',
+    'get_valyu_tool': 'tools',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,200 @@
+"""
+Track B agent pipeline: route the question, run the search tools, call the LLM.
+"""
+import time
+
+from .batch import DirectSearches
+from .llm import choose_tier, format_lc_messages, invoke_holistic_llm_cached
+from .metrics import Timings
+from .fanout import run_in_background
+from .packer import context_budget, count_tokens, pack, split_snippets
+from .router import get_router
+from .sources import format_dedup_status, format_source_health, format_source_status, render_academic_results
+
+
+# --- STAGE EVENTS (consumed by the /chat/stream endpoint) ---
+
+def _source_event(result):
+    return {"source": result.name, "status": result.status, "latency_ms": round(result.latency_ms), "error": result.error}
+
+
+def answer_chunks(answer, chunk_words=3):
+    """
+    Split an answer into chunks of a few words that join back to the original text.
+    The Bedrock proxy returns the completion in one JSON body, so streaming
+    consumers get it re-chunked for progressive rendering.
+    """
+    words = answer.split(" ")
+    for i in range(0, len(words), chunk_words):
+        chunk = " ".join(words[i:i + chunk_words])
+        if i + chunk_words < len(words):
+            chunk += " "
+        yield chunk
+
+
+def emit_answer_chunks(answer, emit, chunk_words=3):
+    """
+    Emit the finished answer as a sequence of 'chunk' events (see answer_chunks).
+    These follow the LLM call, so they do not lower time to first token.
+    """
+    for chunk in answer_chunks(answer, chunk_words):
+        emit("chunk", {"text": chunk})
+
+
+# --- SPECULATIVE PREFETCH ---
+
+
+_DIRECT = DirectSearches()
+
+
+def _prefetch_search(route, user_message, use_cache, searches):
+    """Start the search behind `route` in the background; None for routes without a search."""
+    if route == "academic":
+        return run_in_background(lambda: searches.academic(user_message, use_cache=use_cache))
+    if route == "live":
+        return run_in_background(lambda: searches.live(user_message))
+    return None
+
+
+# --- AGENT LOGIC ---
+
+def agent_chat_logic(user_message, history_list, on_event=None, use_cache=True, conversation="", timings=None, searches=None):
+    """
+    Route the question, run the search tools and call the LLM.
+    `on_event(event, data)` is an optional callback that receives stage events as they
+    happen: 'route', 'source' (one per search source, with latency), 'llm', 'chunk' and 'trace'.
+    `use_cache=False` bypasses cached search results and LLM responses for this request.
+    `conversation` is the session context (see sessions.Session.context) added to the prompt.
+    `timings` (metrics.Timings) collects the per-stage breakdown: route, search, prompt, llm, assemble.
+    `searches` runs the academic and live searches (batch.BatchSearches shares them across a batch).
+    """
+    emit = on_event or (lambda event, data: None)
+    timings = timings or Timings()
+    searches = searches or _DIRECT
+    
+    trace_text = "ERROR: Trace not generated."
+    final_answer = "ERROR: Connection failed."
+    llm_call = None
+    started = time.perf_counter()
+
+    # Pick the route; when the message also matches another route, start that route's
+    # search now, so a fallback does not cost another round trip.
+    router = get_router()
+    with timings.span("route"):
+        decision = router.classify(user_message)
+    route = decision.route
+    speculative = _prefetch_search(decision.runner_up, user_message, use_cache, searches) if decision.ambiguous else None
+    if speculative is not None:
+        router.count("prefetch_started")
+    prefetch_note = ""
+    emit("route", {"route": route, "ambiguous": decision.ambiguous})
+
+    if route == "academic":
+        
+        # A. TRIPLE ACADEMIC SEARCH (Semantic Scholar + OpenAlex + CrossRef, queried concurrently)
+        try:
+            with timings.span("search"):
+                papers, source_results = searches.academic(
+                    user_message, on_result=lambda result: emit("source", _source_event(result)), use_cache=use_cache
+                )
+            if not papers and speculative is not None:
+                # Nothing usable from the academic sources: answer from the runner-up's prefetched search
+                route = decision.runner_up
+                emit("route", {"route": route, "fallback": True})
+            else:
+                # Keep the most relevant papers that fit the input-token budget
+                with timings.span("prompt"):
+                    frame_tokens = count_tokens(render_academic_results([], source_results))
+                    packed = pack(user_message, papers, context_budget(user_message, conversation) - frame_tokens, text_of=lambda paper: paper.render(0))
+                    messages = format_lc_messages(user_message, search_content=render_academic_results(packed.kept, source_results), conversation=conversation)
+                    tier = choose_tier(route, count_tokens(messages[0]["content"]))
+                emit("llm", {"status": "started", "tier": tier})
+                with timings.span("llm"):
+                    final_answer, llm_call = invoke_holistic_llm_cached(messages, user_message, use_cache, tier)
+                emit("llm", {"status": "done", "cache": llm_call.cache.kind, "model": llm_call.model, "hedged": llm_call.hedged})
+            
+                trace_text = f"### Academic Search Audit Log\n\n"
+                trace_text += f"**Action:** Executed comprehensive academic search across three databases.\n"
+                trace_text += f"**Tools:** Semantic Scholar + OpenAlex + CrossRef (official DOI registry)\n"
+                trace_text += f"**Sources:**\n{format_source_status(source_results)}\n"
+                trace_text += f"**Source Health:**\n{format_source_health()}\n"
+                trace_text += f"**Deduplication:** {format_dedup_status(papers, source_results)}\n"
+                trace_text += f"**Context:** {packed.describe('papers', lambda paper: paper.title)}\n"
+                trace_text += f"**Observation:** Answer synthesized from peer-reviewed research papers with citation counts, open access status, funding information, publisher metadata, and DOIs from authoritative sources."
+
+        except Exception as e:
+             final_answer = f"ERROR: The academic search failed: {e}"
+             trace_text = f"### Transparency Audit Log\n\n**Action:** Academic Search Failed. Result generated from internal knowledge."
+    
+    # Check if query needs current/live data
+    if route == "live":
+        
+        # B. VALYU SEARCH-AUGMENTED CALL (RAG/Valyu Prize)
+        try:
+            search_started = time.perf_counter()
+            with timings.span("search"):
+                if speculative is not None and decision.runner_up == "live":
+                    search_results = speculative.result()
+                    speculative = None
+                    router.count("prefetch_used")
+                    prefetch_note = f"{decision.route} search returned nothing; used the {route} search prefetched in parallel"
+                else:
+                    search_results = searches.live(user_message)
+            emit("source", {"source": "Valyu", "status": "ok", "latency_ms": round((time.perf_counter() - search_started) * 1000), "error": ""})
+            with timings.span("prompt"):
+                packed = pack(user_message, split_snippets(str(search_results)), context_budget(user_message, conversation))
+                messages = format_lc_messages(user_message, search_content="\n\n".join(packed.kept), conversation=conversation)
+                tier = choose_tier(route, count_tokens(messages[0]["content"]))
+            emit("llm", {"status": "started", "tier": tier})
+            with timings.span("llm"):
+                final_answer, llm_call = invoke_holistic_llm_cached(messages, user_message, use_cache, tier)
+            emit("llm", {"status": "done", "cache": llm_call.cache.kind, "model": llm_call.model, "hedged": llm_call.hedged})
+            
+            trace_text = f"### Search-Augmented Audit Log\n\n"
+            trace_text += f"**Action:** Executed Valyu Search Tool.\n"
+            trace_text += f"**Context:** {packed.describe('search snippets')}\n"
+            trace_text += f"**Observation:** Answer synthesized using real-time information (Valyu integration confirmed)."
+
+        except Exception as e:
+             emit("source", {"source": "Valyu", "status": "error", "latency_ms": round((time.perf_counter() - search_started) * 1000), "error": str(e)})
+             final_answer = f"ERROR: The search tool failed to run: {e}"
+             trace_text = f"### Transparency Audit Log\n\n**Action:** Valyu Search Failed. Result generated from internal knowledge."
+
+    elif route == "direct":
+        # C. SIMPLE LLM CALL (Baseline/Governance Check)
+        with timings.span("prompt"):
+            messages = format_lc_messages(user_message, conversation=conversation)
+            tier = choose_tier(route, count_tokens(messages[0]["content"]))
+        emit("llm", {"status": "started", "tier": tier})
+        with timings.span("llm"):
+            final_answer, llm_call = invoke_holistic_llm_cached(messages, user_message, use_cache, tier)
+        emit("llm", {"status": "done", "cache": llm_call.cache.kind, "model": llm_call.model, "hedged": llm_call.hedged})
+        
+        trace_text = "### Simple LLM Audit\n\n**Action:** No external tools required. Answer generated from the model's internal knowledge base."
+
+    if speculative is not None:
+        # The prefetch was not needed; its (cached) results are simply dropped
+        speculative.cancel()
+        router.count("prefetch_discarded")
+    router.observe(route, time.perf_counter() - started)
+    assemble_started = time.perf_counter()
+
+    trace_text += f"\n**Route:** {decision.describe()}"
+    if prefetch_note:
+        trace_text += f"\n**Speculative Prefetch:** {prefetch_note}"
+    if conversation:
+        trace_text += f"\n**Conversation Context:** {count_tokens(conversation)} tokens from earlier turns"
+    if llm_call is not None:
+        trace_text += f"\n**Model:** {llm_call.describe()}"
+        trace_text += f"\n**LLM Cache:** {llm_call.cache.describe()}"
+
+    if on_event is not None:
+        emit_answer_chunks(final_answer, emit)
+    timings.add("assemble", time.perf_counter() - assemble_started)
+    trace_text += f"\n**Timings:** {timings.describe()}"
+    if on_event is not None:
+        emit("trace", {"trace_text": trace_text})
+
+    # 3. Update the history and return
+    history_list.append([user_message, final_answer])
+    return history_list, trace_text
@@ -0,0 +1,114 @@
+"""
+Shared search work for a batch of questions.
+
+A batch (the /chat/batch endpoint) runs many independent questions through
+agent_chat_logic. Questions that differ only in wording ("recent papers on
+graph neural networks" / "graph neural networks: recent papers?") search for
+the same content terms, so each distinct search is run once per batch and its
+result is handed to every question that needs it, whether or not the search
+cache is on.
+"""
+import os
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple
+
+from .cache import normalize_query
+from .packer import content_terms
+from .sources import search_academic_sources
+from .tools import get_valyu_tool
+
+# Questions accepted in one batch request
+MAX_ITEMS = int(os.environ.get("TRACKB_BATCH_MAX_ITEMS", "500"))
+# Questions of one batch running at once (capped by worker_cap)
+DEFAULT_CONCURRENCY = int(os.environ.get("TRACKB_BATCH_CONCURRENCY", "8"))
+# Share of the API's worker threads that all running batches together may hold, so /chat keeps the rest
+WORKER_SHARE = float(os.environ.get("TRACKB_BATCH_WORKER_SHARE", "0.5"))
+
+
+def worker_cap(max_workers: int) -> int:
+    """Batch questions allowed to run at once across all batches, for a pool of `max_workers` threads."""
+    return max(1, int(max_workers * WORKER_SHARE))
+
+
+def search_key(message: str) -> str:
+    """Word-order-insensitive key of the content terms a question searches for."""
+    terms = sorted(set(content_terms(message)))
+    return " ".join(terms) if terms else normalize_query(message)
+
+
+def sharing_order(messages: List[str]) -> List[int]:
+    """
+    Indices of `messages` with the first question of each search key first and the
+    repeats after them, so repeats mostly find their search already finished instead
+    of holding a worker while they wait for it.
+    """
+    seen: Dict[str, int] = {}
+    rank = []
+    for i, message in enumerate(messages):
+        key = search_key(message)
+        rank.append(seen.get(key, 0))
+        seen[key] = rank[-1] + 1
+    return sorted(range(len(messages)), key=lambda i: (rank[i], i))
+
+
+class DirectSearches:
+    """The searches agent_chat_logic runs when it is not part of a batch."""
+
+    def academic(self, user_message, on_result=None, use_cache=True):
+        return search_academic_sources(user_message, limit=2, on_result=on_result, use_cache=use_cache)
+
+    def live(self, user_message):
+        return get_valyu_tool().run(user_message)
+
+
+class BatchSearches(DirectSearches):
+    """
+    Searches memoized for the lifetime of one batch, keyed by route and search_key.
+    The first question to need a search runs it; the others wait for (or reuse) its
+    result, including its failure or cancellation. Thread-safe.
+
+    Counters:
+        searches (run), shared (answered from another question's search).
+    """
+
+    def __init__(self):
+        self._results: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._counters = {"searches": 0, "shared": 0}
+
+    def _once(self, key: Tuple, fn: Callable):
+        with self._lock:
+            future = self._results.get(key)
+            leader = future is None
+            if leader:
+                future = self._results[key] = Future()
+                self._counters["searches"] += 1
+            else:
+                self._counters["shared"] += 1
+        if leader:
+            try:
+                future.set_result(fn())
+            finally:
+                if not future.done():
+                    # fn raised (cancellation and interrupts included): release the waiters with the same error
+                    future.set_exception(sys.exc_info()[1])
+        return future.result(), not leader
+
+    def academic(self, user_message, on_result=None, use_cache=True):
+        (papers, source_results), shared = self._once(
+            ("academic", search_key(user_message), use_cache),
+            lambda: super(BatchSearches, self).academic(user_message, on_result, use_cache),
+        )
+        if shared and on_result is not None:
+            for result in source_results.values():
+                on_result(result)
+        return papers, source_results
+
+    def live(self, user_message):
+        return self._once(("live", search_key(user_message)), lambda: super(BatchSearches, self).live(user_message))[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
@@ -0,0 +1,169 @@
+"""
+Two-tier cache for academic search results.
+
+Tier 1 is an in-process LRU with a TTL. Tier 2 is a SQLite file in the shared
+state directory, so entries survive restarts and are shared by every worker
+process. Keys combine the source, the normalized query and the result limit.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from .config import state_path
+
+DEFAULT_TTL = float(os.environ.get("TRACKB_SEARCH_CACHE_TTL", "21600"))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("TRACKB_SEARCH_CACHE_SIZE", "512"))
+DEFAULT_PATH = os.environ.get("TRACKB_SEARCH_CACHE_PATH") or None
+
+# Expired SQLite rows are purged once every this many writes
+_PURGE_EVERY = 200
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, collapse whitespace and strip surrounding punctuation."""
+    return " ".join(query.casefold().split()).strip(" .,;:!?\"'")
+
+
+class SearchCache:
+    """
+    LRU + SQLite cache. Values must be JSON-serializable.
+
+    Counters:
+        memory_hits, disk_hits, misses, writes, evictions (LRU evictions plus
+        expired entries dropped from either tier), bypassed.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.path = path or state_path("search_cache.sqlite3")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0, "bypassed": 0}
+        self._db().execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    @staticmethod
+    def make_key(source: str, query: str, limit: int) -> str:
+        return f"{source}|{normalize_query(query)}|{limit}"
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets several processes read while one writes.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+                self._counters["evictions"] += 1
+
+        try:
+            row = self._db().execute(
+                "SELECT value, expires_at FROM search_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+
+        if row is None:
+            self._count("misses")
+            return None
+
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        self._count("disk_hits")
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._remember(key, value, expires_at)
+        try:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+            with self._lock:
+                self._counters["writes"] += 1
+                purge = self._counters["writes"] % _PURGE_EVERY == 0
+            if purge:
+                purged = db.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+                self._count("evictions", max(purged, 0))
+        except sqlite3.Error:
+            pass  # the disk tier is best-effort; the memory tier still holds the value
+
+    def get_or_fetch(self, source: str, query: str, limit: int, fetch: Callable[[], Any], bypass: bool = False) -> Any:
+        """
+        Return the cached result for (source, query, limit), calling `fetch()` on a miss.
+        With `bypass=True` the cache is not read, but the fresh result still replaces
+        the stored entry. Exceptions from `fetch` propagate and nothing is cached.
+        """
+        key = self.make_key(source, query, limit)
+        if bypass:
+            self._count("bypassed")
+        else:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+
+        value = fetch()
+        self.set(key, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        self._db().execute("DELETE FROM search_cache")
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Process-wide SearchCache configured from the environment."""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache(DEFAULT_PATH)
+    return _search_cache
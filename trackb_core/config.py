@@ -0,0 +1,40 @@
+"""
+Shared configuration for the Track B core: credentials, endpoints and state paths.
+"""
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Load environment variables from the repository's .env (python-dotenv is optional)
+try:
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(PROJECT_ROOT, ".env"))
+except ImportError:
+    pass
+
+# The official API Endpoint
+API_ENDPOINT = os.environ.get("HOLISTIC_AI_API_ENDPOINT", "https://ctwa92wg1b.execute-api.us-east-1.amazonaws.com/prod/invoke")
+
+# Upstream base URLs; overridable so benchmarks and tests can point Track B at local stand-ins
+SEMANTIC_SCHOLAR_URL = os.environ.get("TRACKB_SEMANTIC_SCHOLAR_URL", "https://api.semanticscholar.org").rstrip("/")
+OPENALEX_URL = os.environ.get("TRACKB_OPENALEX_URL", "https://api.openalex.org").rstrip("/")
+CROSSREF_URL = os.environ.get("TRACKB_CROSSREF_URL", "https://api.crossref.org").rstrip("/")
+# When set, live search calls this Valyu-compatible endpoint over HTTP instead of langchain_valyu
+VALYU_URL = os.environ.get("TRACKB_VALYU_URL", "").rstrip("/")
+
+# Hardcoded credentials (fallback to environment variables)
+TEAM_ID = os.environ.get("HOLISTIC_AI_TEAM_ID", "team_the_great_hack_2025_035")
+API_TOKEN = os.environ.get("HOLISTIC_AI_API_TOKEN", "PTUUWey_QPVMbXUp96tEOQKyPT9mZpxGX2OxGYBPT9mZpxGX2OxGYB")
+VALYU_API_KEY = os.environ.get("VALYU_API_KEY", "ZQGxtquaju7zu8fWQXq176DO91AEesJX7nBMCDwB")
+
+# Set Valyu key in environment for the tool
+os.environ["VALYU_API_KEY"] = VALYU_API_KEY
+
+# Directory for on-disk state shared by every worker process (caches, indexes, ...)
+STATE_DIR = os.environ.get("TRACKB_STATE_DIR", os.path.join(PROJECT_ROOT, ".trackb_state"))
+
+
+def state_path(filename: str) -> str:
+    """Absolute path of `filename` inside STATE_DIR, creating the directory if needed."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, filename)
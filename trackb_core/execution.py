@@ -0,0 +1,92 @@
+"""
+Bounded execution layer for running the synchronous agent pipeline from async handlers.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Worker threads that actually run agent_chat_logic
+DEFAULT_WORKERS = int(os.environ.get("TRACKB_WORKER_THREADS", "16"))
+# Requests allowed in flight (running + queued) before new ones are rejected
+DEFAULT_MAX_IN_FLIGHT = int(os.environ.get("TRACKB_MAX_IN_FLIGHT", "64"))
+# Seconds advertised in the Retry-After header of a rejected request
+DEFAULT_RETRY_AFTER = int(os.environ.get("TRACKB_RETRY_AFTER", "2"))
+
+
+class Overloaded(Exception):
+    """Raised when the in-flight limit is reached; the caller should answer 503."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Server busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Thread pool with an admission limit.
+
+    Blocking work is moved off the event loop onto `max_workers` threads. At most
+    `max_in_flight` jobs may be running or queued at once; beyond that `run`
+    fails fast with `Overloaded` instead of letting the queue grow without bound.
+    A slot is released when the worker thread finishes, not when the awaiting task
+    goes away, so cancelled requests keep counting until their work is done.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 retry_after: int = DEFAULT_RETRY_AFTER):
+        self.max_workers = max_workers
+        self.max_in_flight = max(max_in_flight, max_workers)
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="trackb-chat")
+
+    @property
+    def queued(self) -> int:
+        """Admitted jobs still waiting for a worker thread."""
+        return max(0, self.in_flight - self.max_workers)
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> "asyncio.Future":
+        """
+        Admit `fn(*args, **kwargs)` and schedule it on the pool, returning an awaitable future.
+        Raises `Overloaded` immediately when the in-flight limit is reached. Must be called
+        from the event loop thread.
+        """
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise Overloaded(self.retry_after)
+            self.in_flight += 1
+
+        try:
+            work = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release(None)
+            raise
+        # Released by the worker thread itself: cancelling the asyncio wrapper does not stop the work
+        work.add_done_callback(self._release)
+        return asyncio.wrap_future(work)
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` on the pool, or raise `Overloaded` if the limit is reached."""
+        return await self.submit(fn, *args, **kwargs)
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
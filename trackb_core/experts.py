@@ -0,0 +1,329 @@
+"""
+Expert finder without an LLM in the loop.
+
+Works matching the topic are fetched from OpenAlex and Semantic Scholar (through
+the search cache), their authorships are aggregated into candidate experts, and
+candidates are ranked by relevance x citation impact. Location and affiliation
+filters use the institutions OpenAlex reports. Searches the local index has
+already ingested from every source (same topic and location filter) are answered
+from it without any network call. The LLM is only used for
+an optional one-line summary per expert.
+"""
+import math
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .cache import get_search_cache
+from .config import OPENALEX_URL, SEMANTIC_SCHOLAR_URL
+from .fanout import STATUS_OK, SourceResult, fan_out_sync, run_in_background
+from .index import get_index
+from .records import normalize_title
+from .singleflight import get_flight
+from .sources import LOCAL_INDEX, get_source_json
+
+# Works fetched per source for one expert search
+EXPERT_WORKS = int(os.environ.get("TRACKB_EXPERT_WORKS", "50"))
+# Authors considered per work (later authors on long author lists add noise)
+AUTHORS_PER_WORK = 8
+EXPERTS_DEADLINE = float(os.environ.get("TRACKB_EXPERTS_DEADLINE", "6"))
+
+EUROPE = {
+    "AT", "BE", "BG", "CH", "CY", "CZ", "DE", "DK", "EE", "ES", "FI", "FR", "GB", "GR", "HR", "HU", "IE", "IS",
+    "IT", "LT", "LU", "LV", "MT", "NL", "NO", "PL", "PT", "RO", "SE", "SI", "SK", "UA",
+}
+ASIA = {
+    "AE", "BD", "CN", "HK", "ID", "IL", "IN", "IR", "JP", "KR", "KZ", "MY", "PH", "PK", "QA", "SA", "SG", "TH",
+    "TR", "TW", "VN",
+}
+# UI location filter -> country codes (None = no filter)
+LOCATIONS: Dict[str, Optional[set]] = {
+    "Any": None,
+    "London": {"GB"},
+    "United Kingdom": {"GB"},
+    "United States": {"US"},
+    "Europe": EUROPE,
+    "Asia": ASIA,
+}
+COUNTRY_NAMES = {"GB": "United Kingdom", "US": "United States"}
+_LONDON_HINTS = ("london", "francis crick")
+
+
+def _location_matches(location: str, country: str, affiliation: str) -> bool:
+    countries = LOCATIONS.get(location)
+    if countries is None:
+        return location in LOCATIONS or location.casefold() in affiliation.casefold()
+    if country not in countries:
+        return False
+    if location == "London":
+        return any(hint in affiliation.casefold() for hint in _LONDON_HINTS)
+    return True
+
+
+# --- UPSTREAM AUTHORSHIP RECORDS ---
+# Each source yields flat, JSON-serializable authorship records (one per author
+# per work), so the cache stores exactly what the aggregation needs.
+
+def openalex_authorships(query: str, limit: int, countries: Optional[set] = None) -> List[dict]:
+    params = {
+        "search": query,
+        "per_page": limit,
+        "select": "id,title,relevance_score,cited_by_count,authorships,concepts",
+        "mailto": "research@trackb.ai",
+    }
+    if countries:
+        params["filter"] = "authorships.institutions.country_code:" + "|".join(sorted(countries))
+    data = get_source_json("OpenAlex", f"{OPENALEX_URL}/works", params)
+
+    works = data.get("results") or []
+    top = max([w.get("relevance_score") or 0 for w in works] + [0]) or 1.0
+    records = []
+    for rank, work in enumerate(works):
+        # OpenAlex relevance scores are unbounded; normalise to the best hit of this search
+        relevance = (work.get("relevance_score") or 0) / top if work.get("relevance_score") else 1.0 / (1 + rank)
+        areas = [c.get("display_name") for c in (work.get("concepts") or [])[:3] if c.get("display_name")]
+        for authorship in (work.get("authorships") or [])[:AUTHORS_PER_WORK]:
+            author = authorship.get("author") or {}
+            if not author.get("display_name"):
+                continue
+            institution = (authorship.get("institutions") or [{}])[0] or {}
+            records.append({
+                "name": author["display_name"],
+                "url": author.get("id") or "",
+                "affiliation": institution.get("display_name") or "",
+                "country": (institution.get("country_code") or "").upper(),
+                "work": work.get("title") or "",
+                "citations": work.get("cited_by_count") or 0,
+                "relevance": relevance,
+                "areas": areas,
+            })
+    return records
+
+
+def semantic_scholar_authorships(query: str, limit: int, countries: Optional[set] = None) -> List[dict]:
+    data = get_source_json("Semantic Scholar", f"{SEMANTIC_SCHOLAR_URL}/graph/v1/paper/search", {
+        "query": query,
+        "limit": min(limit, 100),
+        "fields": "title,citationCount,authors,fieldsOfStudy",
+    })
+    records = []
+    for rank, paper in enumerate(data.get("data") or []):
+        relevance = 1.0 / (1 + rank)  # S2 returns no score, only a relevance order
+        for author in (paper.get("authors") or [])[:AUTHORS_PER_WORK]:
+            if not author.get("name"):
+                continue
+            author_id = author.get("authorId")
+            records.append({
+                "name": author["name"],
+                "url": f"https://www.semanticscholar.org/author/{author_id}" if author_id else "",
+                "affiliation": "",
+                "country": "",
+                "work": paper.get("title") or "",
+                "citations": paper.get("citationCount") or 0,
+                "relevance": relevance,
+                "areas": list(paper.get("fieldsOfStudy") or [])[:3],
+            })
+    return records
+
+
+EXPERT_SOURCES = [
+    ("OpenAlex", openalex_authorships),
+    ("Semantic Scholar", semantic_scholar_authorships),
+]
+
+
+def _cached_authorships(name, fetch_fn, query, limit, countries, use_cache):
+    cache = get_search_cache()
+    source = f"experts:{name}:{','.join(sorted(countries)) if countries else 'any'}"
+    key = cache.make_key(source, query, limit) + ("" if use_cache else "|fresh")
+    value, _ = get_flight("search").do(
+        key, lambda: cache.get_or_fetch(source, query, limit, lambda: fetch_fn(query, limit, countries), bypass=not use_cache)
+    )
+    return value
+
+
+def _search_network(query, countries, use_cache):
+    calls = {
+        name: (lambda fn=fetch_fn, name=name: _cached_authorships(name, fn, query, EXPERT_WORKS, countries, use_cache))
+        for name, fetch_fn in EXPERT_SOURCES
+    }
+    results = fan_out_sync(calls, EXPERTS_DEADLINE)
+    index = get_index()
+    if index is not None:
+        for name, result in results.items():
+            if not result.partial and result.value:
+                run_in_background(
+                    lambda records=result.value, name=name: index.add_authorships(records, name, query, countries)
+                )
+    return results
+
+
+def _search_index(query, countries):
+    """
+    Authorships from the local index as a one-source result, or None when it cannot answer:
+    the same search must have been ingested from every expert source, so a few papers
+    indexed by a chat search never replace the EXPERT_WORKS-per-source network search.
+    """
+    index = get_index()
+    if index is None:
+        return None
+    started = time.perf_counter()
+    by_source, age = index.search_authorships(query, [name for name, _ in EXPERT_SOURCES], countries)
+    if age is None:
+        return None
+    if index.is_stale(age):
+        run_in_background(lambda: _search_network(query, countries, False))
+    records = [record for source_records in by_source.values() for record in source_records]
+    return {LOCAL_INDEX: SourceResult(LOCAL_INDEX, STATUS_OK, records, latency_ms=(time.perf_counter() - started) * 1000)}
+
+
+# --- AGGREGATION AND RANKING ---
+
+class Candidate:
+    """One author aggregated over every matching work, from any source."""
+
+    __slots__ = ("name", "url", "affiliation", "country", "citations", "relevance", "works", "areas", "top_work", "sources")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.url = ""
+        self.affiliation = ""
+        self.country = ""
+        self.citations = 0
+        self.relevance = 0.0
+        self.works = 0
+        self.areas: Dict[str, int] = {}
+        self.top_work: Tuple[int, str] = (-1, "")
+        self.sources: List[str] = []
+
+    def add(self, record: dict, source: str):
+        self.url = self.url or record["url"]
+        if record["affiliation"] and not self.affiliation:
+            self.affiliation = record["affiliation"]
+            self.country = record["country"]
+        self.citations += record["citations"]
+        self.relevance += record["relevance"]
+        self.works += 1
+        for area in record["areas"]:
+            self.areas[area] = self.areas.get(area, 0) + 1
+        self.top_work = max(self.top_work, (record["citations"], record["work"]))
+        if source not in self.sources:
+            self.sources.append(source)
+
+    def to_expert(self, score: float) -> dict:
+        areas = sorted(self.areas, key=lambda a: -self.areas[a])[:4]
+        citations, title = self.top_work
+        summary = f"{self.works} matching works ({self.citations} citations)."
+        if title:
+            summary += f" Most cited: \"{title}\" ({citations} citations)."
+        return {
+            "name": self.name,
+            "title": "Researcher",
+            "affiliation": self.affiliation,
+            "location": COUNTRY_NAMES.get(self.country, self.country),
+            "email": "",
+            "website": self.url,
+            "areas": areas,
+            "summary": summary,
+            "score": round(score, 3),
+            "sources": self.sources,
+        }
+
+
+def aggregate_candidates(records_by_source: Dict[str, List[dict]]) -> List[Candidate]:
+    """
+    Group authorship records into candidates. Within a source, records are grouped by the
+    author id (the profile URL; the name only when the source gives none), so namesakes stay
+    apart. Across sources, which share no ids, an author joins a candidate from an earlier
+    source by normalized name, and only when exactly one candidate there has that name.
+    """
+    candidates: List[Candidate] = []
+    by_name: Dict[str, List[Candidate]] = {}
+    for source, records in records_by_source.items():
+        by_id: Dict[str, Candidate] = {}
+        for record in records:
+            name = normalize_title(record["name"])
+            key = record["url"] or f"name:{name}"
+            candidate = by_id.get(key)
+            if candidate is None:
+                namesakes = by_name.setdefault(name, [])
+                earlier = [c for c in namesakes if source not in c.sources]
+                if len(namesakes) == 1 and earlier:
+                    candidate = earlier[0]
+                else:
+                    candidate = Candidate(record["name"])
+                    candidates.append(candidate)
+                    namesakes.append(candidate)
+                by_id[key] = candidate
+            candidate.add(record, source)
+    return candidates
+
+
+def score_candidates(candidates: List[Candidate]) -> List[float]:
+    """relevance x (1 + log(1 + citations)), over all candidates at once."""
+    try:
+        import numpy as np  # imported here so API workers do not pay for it at start-up
+    except ImportError:  # optional: ranking falls back to pure Python
+        np = None
+    if np is not None:
+        relevance = np.fromiter((c.relevance for c in candidates), dtype=float, count=len(candidates))
+        citations = np.fromiter((c.citations for c in candidates), dtype=float, count=len(candidates))
+        return (relevance * (1.0 + np.log1p(citations))).tolist()
+    return [c.relevance * (1.0 + math.log1p(c.citations)) for c in candidates]
+
+
+def find_experts(category: str = "", keywords: str = "", location: str = "Any", affiliation: str = "",
+                 count: int = 5, use_cache: bool = True, summarize: bool = False):
+    """
+    Rank experts for a topic. Returns (experts, meta) where experts are dicts in the
+    shape the web UI expects and meta reports per-source status and candidate counts.
+    """
+    query = " ".join(part for part in (keywords.strip(), category.strip()) if part)
+    if not query:
+        return [], {"query": "", "candidates": 0, "sources": {}}
+    countries = LOCATIONS.get(location)
+
+    results = _search_index(query, countries) if use_cache else None
+    if results is None:
+        results = _search_network(query, countries, use_cache)
+    records = {name: result.value for name, result in results.items() if not result.partial}
+    candidates = aggregate_candidates(records)
+
+    # Location and affiliation filters need an institution, which only OpenAlex reports
+    if location and location != "Any":
+        candidates = [c for c in candidates if _location_matches(location, c.country, c.affiliation)]
+    if affiliation:
+        wanted = affiliation.casefold()
+        candidates = [c for c in candidates if wanted in c.affiliation.casefold()]
+
+    scores = score_candidates(candidates)
+    ranked = sorted(range(len(candidates)), key=lambda i: -scores[i])[:max(1, count)]
+    experts = [candidates[i].to_expert(scores[i]) for i in ranked]
+    if summarize and experts:
+        summarize_experts(experts, query)
+
+    meta = {
+        "query": query,
+        "candidates": len(candidates),
+        "sources": {name: {"status": r.status, "latency_ms": round(r.latency_ms), "error": r.error} for name, r in results.items()},
+    }
+    return experts, meta
+
+
+def summarize_experts(experts: List[dict], query: str):
+    """Optional single LLM pass (fast tier) that rewrites each expert's summary in one sentence."""
+    from .llm import invoke_holistic_llm_cached, is_error_answer
+
+    lines = [f"{i}. {e['name']} ({e['affiliation'] or 'unknown affiliation'}): {e['summary']} Areas: {', '.join(e['areas'])}"
+             for i, e in enumerate(experts, 1)]
+    prompt = (
+        f"For each researcher below, write one sentence on their expertise relevant to '{query}'. "
+        f"Answer with exactly one line per researcher, formatted '<number>. <sentence>'.\n" + "\n".join(lines)
+    )
+    answer, _ = invoke_holistic_llm_cached([{"role": "user", "content": prompt}], tier="fast")
+    if is_error_answer(answer):
+        return
+    for line in answer.splitlines():
+        number, _, sentence = line.strip().partition(". ")
+        if number.isdigit() and 1 <= int(number) <= len(experts) and sentence:
+            experts[int(number) - 1]["summary"] = sentence.strip()
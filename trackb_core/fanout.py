@@ -0,0 +1,151 @@
+"""
+Concurrent fan-out over several upstream sources under one shared deadline.
+
+Every source call is started at once on a worker thread. When the deadline
+fires, whatever has arrived is returned; sources that are still running or
+that raised come back as partial results instead of blocking the others.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import get_metrics
+
+# Shared deadline for a whole fan-out, in seconds.
+DEFAULT_DEADLINE = float(os.environ.get("TRACKB_FANOUT_DEADLINE", "10"))
+
+# Source calls are blocking (requests), so they run on this pool. A source that
+# misses the deadline keeps its thread until its own HTTP timeout expires, so
+# the pool is sized well above the number of sources per fan-out.
+_source_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("TRACKB_FANOUT_THREADS", "32")),
+    thread_name_prefix="trackb-fanout",
+)
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+
+
+class SourceResult:
+    """Outcome of one source call inside a fan-out."""
+
+    __slots__ = ("name", "status", "value", "error", "latency_ms")
+
+    def __init__(self, name: str, status: str, value: Any = None, error: str = "", latency_ms: float = 0.0):
+        self.name = name
+        self.status = status
+        self.value = value
+        self.error = error
+        self.latency_ms = latency_ms
+
+    @property
+    def partial(self) -> bool:
+        """True when the source contributed nothing (timed out or failed)."""
+        return self.status != STATUS_OK
+
+    def __repr__(self) -> str:
+        return f"SourceResult({self.name!r}, {self.status!r}, latency_ms={self.latency_ms:.0f})"
+
+
+async def fan_out(
+    calls: Dict[str, Callable[[], Any]],
+    deadline: Optional[float] = None,
+    on_result: Optional[Callable[[SourceResult], None]] = None,
+) -> Dict[str, SourceResult]:
+    """
+    Run every call in `calls` concurrently and collect results until `deadline` seconds.
+
+    Args:
+        calls: Mapping of source name to a zero-argument callable.
+        deadline: Shared deadline for all sources (defaults to TRACKB_FANOUT_DEADLINE).
+        on_result: Optional callback invoked as each source finishes, fails or times out.
+
+    Returns:
+        dict: Source name -> SourceResult, in the same order as `calls`.
+    """
+    if deadline is None:
+        deadline = DEFAULT_DEADLINE
+
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    expires = started + deadline
+
+    names = {}
+    for name, call in calls.items():
+        names[loop.run_in_executor(_source_pool, call)] = name
+
+    results: Dict[str, SourceResult] = {}
+
+    def _finish(result: SourceResult):
+        results[result.name] = result
+        get_metrics().observe("trackb_source_seconds", result.latency_ms / 1000, source=result.name, status=result.status)
+        if on_result is not None:
+            on_result(result)
+
+    pending = set(names)
+    while pending:
+        remaining = expires - time.perf_counter()
+        if remaining <= 0:
+            break
+        done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            latency_ms = (time.perf_counter() - started) * 1000
+            error = future.exception()
+            if error is not None:
+                _finish(SourceResult(names[future], STATUS_ERROR, error=str(error), latency_ms=latency_ms))
+            else:
+                _finish(SourceResult(names[future], STATUS_OK, value=future.result(), latency_ms=latency_ms))
+
+    for future in pending:
+        # The worker thread cannot be interrupted; we only stop waiting for it.
+        future.cancel()
+        _finish(SourceResult(
+            names[future],
+            STATUS_TIMEOUT,
+            error=f"no response within {deadline:.1f}s",
+            latency_ms=deadline * 1000,
+        ))
+
+    return {name: results[name] for name in calls}
+
+
+def run_in_background(call: Callable[[], Any]) -> Future:
+    """Start `call` on the source pool without waiting for it (e.g. a speculative prefetch)."""
+    return _source_pool.submit(call)
+
+
+def fan_out_sync(
+    calls: Dict[str, Callable[[], Any]],
+    deadline: Optional[float] = None,
+    on_result: Optional[Callable[[SourceResult], None]] = None,
+) -> Dict[str, SourceResult]:
+    """
+    Blocking wrapper around `fan_out` for synchronous callers.
+
+    When the caller is already inside a running event loop (e.g. an async web
+    handler calling sync agent code) the fan-out runs on a helper thread with
+    its own loop, since `asyncio.run` cannot be nested.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(fan_out(calls, deadline, on_result))
+
+    outcome = {}
+
+    def _run():
+        try:
+            outcome["value"] = asyncio.run(fan_out(calls, deadline, on_result))
+        except BaseException as e:
+            outcome["error"] = e
+
+    runner = threading.Thread(target=_run, name="trackb-fanout-loop", daemon=True)
+    runner.start()
+    runner.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
@@ -0,0 +1,356 @@
+"""
+The Track B pipeline as a LangGraph state graph.
+
+    route -> local_index -> semantic_scholar --+
+                        \\-> openalex ---------+-> merge -> pack -> model
+                        \\-> crossref ---------+     ^
+                        \\-> valyu (prefetch) -+     |
+    route -> valyu --------------------------------+
+    route -> pack (direct questions)
+
+Each academic source is its own node, so the three run as parallel branches of
+one superstep and `merge` fans them back in (under the same shared deadline as
+search_academic_sources). When an academic question also matches the live
+route, the Valyu search runs as a fourth branch alongside them and is used if
+the sources return nothing. Every node records its wall time in the state's
+`timings` (and in the trackb_stage_seconds histogram as "graph:<node>").
+
+State values are plain JSON-friendly data, so any LangGraph checkpointer can
+persist them. With a checkpointer (TRACKB_GRAPH_CHECKPOINT=memory, or a SQLite
+path when langgraph-checkpoint-sqlite is installed), run_graph with a thread_id
+resumes an interrupted run on that thread from its last finished node; a thread
+whose last run finished starts a new run. Runs without a thread_id use a
+throwaway thread, so they need no id and leave no checkpoints behind.
+
+`model` may be a coroutine function; the model node then awaits it, and the
+graph is run with arun_graph (ainvoke), so an in-flight LLM call holds no thread.
+"""
+import inspect
+import os
+import time
+import uuid
+from typing import Annotated, Callable, Dict, List, Optional, TypedDict
+
+from langgraph.graph import END, StateGraph
+
+from .fanout import STATUS_OK, SourceResult, fan_out_sync, run_in_background
+from .index import get_index
+from .llm import choose_tier, format_lc_messages, invoke_holistic_llm_cached
+from .metrics import get_metrics
+from .packer import context_budget, count_tokens, pack, split_snippets
+from .records import Paper, merge_papers
+from .router import get_router
+from .sources import (
+    ACADEMIC_SEARCH_DEADLINE, ACADEMIC_SOURCES, LOCAL_INDEX, _checked_search, _search_network, format_dedup_status,
+    format_source_status, render_academic_results,
+)
+from .tools import get_valyu_tool
+
+# "" (no checkpointer), "memory", or the path of a SQLite checkpoint database
+CHECKPOINT = os.environ.get("TRACKB_GRAPH_CHECKPOINT", "")
+
+VALYU = "Valyu"
+
+
+def _merge(left: Optional[dict], right: Optional[dict]) -> dict:
+    """Reducer for state keys written by parallel branches; None (a new run's input) clears the key."""
+    if right is None:
+        return {}
+    return {**(left or {}), **right}
+
+
+class GraphState(TypedDict, total=False):
+    message: str
+    conversation: str
+    use_cache: bool
+    route: str
+    runner_up: Optional[str]
+    route_text: str
+    search_started: float  # time.time() the search branches started, for the shared deadline
+    sources: Annotated[Dict[str, dict], _merge]  # source name -> status, error, latency_ms, records
+    papers: List[dict]
+    live_results: str
+    fallback: bool
+    messages: List[dict]
+    context_text: str
+    answer: str
+    model_text: str
+    timings: Annotated[Dict[str, float], _merge]  # node -> milliseconds
+
+
+def _node_name(source: str) -> str:
+    return source.lower().replace(" ", "_")
+
+
+def _record(name: str, started: float, update: dict) -> dict:
+    seconds = time.perf_counter() - started
+    get_metrics().observe("trackb_stage_seconds", seconds, stage=f"graph:{name}")
+    update["timings"] = {name: round(seconds * 1000, 1)}
+    return update
+
+
+def _timed(name: str, fn: Callable[[GraphState], dict]) -> Callable[[GraphState], dict]:
+    if inspect.iscoroutinefunction(fn):
+        async def async_node(state: GraphState) -> dict:
+            started = time.perf_counter()
+            return _record(name, started, await fn(state))
+        return async_node
+
+    def node(state: GraphState) -> dict:
+        started = time.perf_counter()
+        return _record(name, started, fn(state))
+    return node
+
+
+def _source_entry(result: SourceResult, records=None) -> dict:
+    return {"status": result.status, "error": result.error, "latency_ms": round(result.latency_ms, 1), "records": records or []}
+
+
+def _source_results(sources: Dict[str, dict]) -> Dict[str, SourceResult]:
+    return {
+        name: SourceResult(name, entry["status"], entry["records"], entry["error"], entry["latency_ms"])
+        for name, entry in sources.items() if name != VALYU
+    }
+
+
+# --- NODES ---
+
+def route_node(state: GraphState) -> dict:
+    decision = get_router().classify(state["message"])
+    return {
+        "route": decision.route,
+        "runner_up": decision.runner_up if decision.ambiguous else None,
+        "route_text": decision.describe(),
+    }
+
+
+def local_index_node(state: GraphState) -> dict:
+    """Answer from the local index when it covers the question (see search_academic_sources)."""
+    index = get_index() if state.get("use_cache", True) else None
+    if index is None:
+        return {"search_started": time.time()}
+    started = time.perf_counter()
+    papers, age = index.search_papers(state["message"], 2 * len(ACADEMIC_SOURCES))
+    if not papers:
+        return {"search_started": time.time()}
+    if index.is_stale(age):
+        # Refresh through the regular fan-out; the graph run itself does not wait for it
+        run_in_background(lambda: _search_network(state["message"], 2, None, None, False))
+    result = SourceResult(LOCAL_INDEX, STATUS_OK, papers, latency_ms=(time.perf_counter() - started) * 1000)
+    records = [paper.to_dict() for paper in papers]
+    return {"papers": records, "sources": {LOCAL_INDEX: _source_entry(result, records)}}
+
+
+def _source_node(name: str, search_fn) -> Callable[[GraphState], dict]:
+    """One academic source as a branch; bounded by what is left of the shared deadline."""
+    def node(state: GraphState) -> dict:
+        query, use_cache = state["message"], state.get("use_cache", True)
+        remaining = max(0.0, ACADEMIC_SEARCH_DEADLINE - (time.time() - state["search_started"]))
+        result = fan_out_sync({name: lambda: _checked_search(name, search_fn, query, 2, use_cache)}, remaining)[name]
+        records = [paper.to_dict() for paper in result.value] if not result.partial else []
+        return {"sources": {name: _source_entry(result, records)}}
+    return node
+
+
+def valyu_node(state: GraphState) -> dict:
+    started = time.perf_counter()
+    try:
+        text = str(get_valyu_tool().run(state["message"]))
+        status, error = STATUS_OK, ""
+    except Exception as e:
+        text, status, error = "", "error", str(e)
+    result = SourceResult(VALYU, status, error=error, latency_ms=(time.perf_counter() - started) * 1000)
+    return {"live_results": text, "sources": {VALYU: _source_entry(result)}}
+
+
+def merge_node(state: GraphState) -> dict:
+    """Fan-in: merge the academic branches, or fall back to the prefetched live search."""
+    sources = state.get("sources") or {}
+    if state["route"] != "academic" or LOCAL_INDEX in sources:
+        return {}
+    results = _source_results(sources)
+    papers = merge_papers(
+        [Paper.from_dict(record) for record in result.value] for result in results.values() if not result.partial
+    )
+    if VALYU in sources:
+        if not papers and sources[VALYU]["status"] == STATUS_OK:
+            get_router().count("prefetch_used")
+            return {"route": "live", "fallback": True, "papers": []}
+        get_router().count("prefetch_discarded")
+    index = get_index()
+    if index is not None and papers:
+        run_in_background(lambda: index.add_papers(papers))
+    return {"papers": [paper.to_dict() for paper in papers]}
+
+
+def pack_node(state: GraphState) -> dict:
+    """Keep the most relevant search context that fits the input-token budget."""
+    message, conversation, route = state["message"], state.get("conversation", ""), state["route"]
+    if route == "academic":
+        papers = [Paper.from_dict(record) for record in state.get("papers") or []]
+        results = _source_results(state.get("sources") or {})
+        frame_tokens = count_tokens(render_academic_results([], results))
+        packed = pack(message, papers, context_budget(message, conversation) - frame_tokens, text_of=lambda paper: paper.render(0))
+        messages = format_lc_messages(message, search_content=render_academic_results(packed.kept, results), conversation=conversation)
+        context_text = (
+            f"**Sources:**\n{format_source_status(results)}\n"
+            f"**Deduplication:** {format_dedup_status(papers, results)}\n"
+            f"**Context:** {packed.describe('papers', lambda paper: paper.title)}"
+        )
+    elif route == "live":
+        packed = pack(message, split_snippets(state.get("live_results", "")), context_budget(message, conversation))
+        messages = format_lc_messages(message, search_content="\n\n".join(packed.kept), conversation=conversation)
+        valyu = (state.get("sources") or {}).get(VALYU, {})
+        context_text = (
+            f"**Sources:** Valyu {valyu.get('status', 'not run')} in {valyu.get('latency_ms', 0):.0f} ms {valyu.get('error', '')}\n"
+            f"**Context:** {packed.describe('search snippets')}"
+        )
+    else:
+        messages = format_lc_messages(message, conversation=conversation)
+        context_text = "**Context:** none (answered from the model's own knowledge)"
+    return {"messages": messages, "context_text": context_text}
+
+
+def _model_node(model: Optional[Callable[[List[dict]], str]]) -> Callable[[GraphState], dict]:
+    if inspect.iscoroutinefunction(model):
+        async def async_node(state: GraphState) -> dict:
+            return {"answer": await model(state["messages"]), "model_text": "caller-supplied model (async)"}
+        return async_node
+
+    def node(state: GraphState) -> dict:
+        messages = state["messages"]
+        if model is not None:
+            return {"answer": model(messages), "model_text": "caller-supplied model"}
+        tier = choose_tier(state["route"], count_tokens(messages[0]["content"]))
+        answer, llm_call = invoke_holistic_llm_cached(messages, state["message"], state.get("use_cache", True), tier)
+        return {"answer": answer, "model_text": f"{llm_call.describe()}; {llm_call.cache.describe()}"}
+    return node
+
+
+# --- EDGES ---
+
+def _after_route(state: GraphState):
+    if state["route"] == "academic":
+        return "local_index"
+    if state["route"] == "live":
+        return "valyu"
+    return "pack"
+
+
+def _after_local_index(state: GraphState):
+    if LOCAL_INDEX in (state.get("sources") or {}):
+        return "merge"
+    branches = [_node_name(name) for name, _ in ACADEMIC_SOURCES]
+    if state.get("runner_up") == "live":
+        get_router().count("prefetch_started")
+        branches.append("valyu")
+    return branches
+
+
+def build_graph(model: Optional[Callable[[List[dict]], str]] = None, checkpointer=None):
+    """
+    Compile the pipeline graph. `model(messages) -> answer` replaces the default
+    cached, tiered Holistic AI call (messages are format_lc_messages dicts); an
+    async `model` makes the graph async-only (see arun_graph).
+    """
+    workflow = StateGraph(GraphState)
+    workflow.add_node("route", _timed("route", route_node))
+    workflow.add_node("local_index", _timed("local_index", local_index_node))
+    source_nodes = []
+    for name, search_fn in ACADEMIC_SOURCES:
+        source_nodes.append(_node_name(name))
+        workflow.add_node(source_nodes[-1], _timed(source_nodes[-1], _source_node(name, search_fn)))
+    workflow.add_node("valyu", _timed("valyu", valyu_node))
+    workflow.add_node("merge", _timed("merge", merge_node))
+    workflow.add_node("pack", _timed("pack", pack_node))
+    workflow.add_node("model", _timed("model", _model_node(model)))
+
+    workflow.set_entry_point("route")
+    workflow.add_conditional_edges("route", _after_route, ["local_index", "valyu", "pack"])
+    workflow.add_conditional_edges("local_index", _after_local_index, ["merge", "valyu"] + source_nodes)
+    # Plain edges: branches started in the same superstep all finish before merge runs (once)
+    for node in source_nodes + ["valyu"]:
+        workflow.add_edge(node, "merge")
+    workflow.add_edge("merge", "pack")
+    workflow.add_edge("pack", "model")
+    workflow.add_edge("model", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def make_checkpointer(spec: str = CHECKPOINT):
+    """
+    Checkpointer for TRACKB_GRAPH_CHECKPOINT, or None when it is unset. A SQLite
+    checkpointer serves run_graph only; use "memory" with arun_graph.
+    """
+    if not spec:
+        return None
+    if spec == "memory":
+        from langgraph.checkpoint.memory import MemorySaver
+        return MemorySaver()
+    import sqlite3
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    return SqliteSaver(sqlite3.connect(spec, check_same_thread=False))
+
+
+def _fresh_input(message: str, conversation: str, use_cache: bool) -> dict:
+    """Input of a new run; clears whatever an earlier run on the same thread left in the state."""
+    return {
+        "message": message, "conversation": conversation, "use_cache": use_cache,
+        "route": "", "runner_up": None, "route_text": "", "search_started": 0.0, "sources": None, "papers": [],
+        "live_results": "", "fallback": False, "messages": [], "context_text": "", "answer": "", "model_text": "",
+        "timings": None,
+    }
+
+
+def _thread(graph, thread_id: Optional[str]):
+    """
+    (config, throwaway) for a run. A checkpointed graph needs a thread on every run;
+    without a caller-supplied id it gets a throwaway one that is deleted afterwards.
+    """
+    if graph.checkpointer is None:
+        return None, False
+    return {"configurable": {"thread_id": thread_id or uuid.uuid4().hex}}, not thread_id
+
+
+def run_graph(graph, message: str, conversation: str = "", use_cache: bool = True, thread_id: Optional[str] = None) -> GraphState:
+    """
+    Run `message` through a compiled graph and return the final state. With a
+    checkpointer and `thread_id`, an interrupted run on that thread is resumed from
+    its last finished node; otherwise the thread starts a new run with this input.
+    """
+    config, throwaway = _thread(graph, thread_id)
+    if config is None:
+        return graph.invoke(_fresh_input(message, conversation, use_cache))
+    try:
+        if not throwaway and graph.get_state(config).next:
+            return graph.invoke(None, config)
+        return graph.invoke(_fresh_input(message, conversation, use_cache), config)
+    finally:
+        if throwaway:
+            graph.checkpointer.delete_thread(config["configurable"]["thread_id"])
+
+
+async def arun_graph(graph, message: str, conversation: str = "", use_cache: bool = True, thread_id: Optional[str] = None) -> GraphState:
+    """run_graph for async callers and graphs with an async model (sync nodes run on LangGraph's thread pool)."""
+    config, throwaway = _thread(graph, thread_id)
+    if config is None:
+        return await graph.ainvoke(_fresh_input(message, conversation, use_cache))
+    try:
+        if not throwaway and (await graph.aget_state(config)).next:
+            return await graph.ainvoke(None, config)
+        return await graph.ainvoke(_fresh_input(message, conversation, use_cache), config)
+    finally:
+        if throwaway:
+            await graph.checkpointer.adelete_thread(config["configurable"]["thread_id"])
+
+
+def describe_run(state: GraphState) -> str:
+    """Audit-trace lines for a finished run: route, context, model and per-node timings."""
+    lines = [f"**Route:** {state.get('route_text', state.get('route', ''))}"]
+    if state.get("fallback"):
+        lines.append("**Speculative Prefetch:** academic search returned nothing; used the live search run in parallel")
+    lines.append(state.get("context_text", ""))
+    lines.append(f"**Model:** {state.get('model_text', '')}")
+    timings = state.get("timings") or {}
+    lines.append("**Graph Timings:** " + ", ".join(f"{node} {ms:.0f} ms" for node, ms in timings.items()))
+    return "\n".join(line for line in lines if line)
@@ -0,0 +1,169 @@
+"""
+Per-upstream health: rolling latency quantiles, error rates, adaptive timeouts
+and circuit breakers.
+
+Each upstream's timeout follows its recent p95 latency instead of a fixed 10 s.
+When an upstream keeps failing (or answers 429), its circuit opens and calls
+are skipped outright for a cool-down period; after that one probe request is
+let through, and its outcome closes or re-opens the circuit.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+MAX_TIMEOUT = float(os.environ.get("TRACKB_SOURCE_MAX_TIMEOUT", "10"))
+MIN_TIMEOUT = float(os.environ.get("TRACKB_SOURCE_MIN_TIMEOUT", "2"))
+# Timeout = p95 latency x this factor, clamped to [MIN_TIMEOUT, MAX_TIMEOUT]
+TIMEOUT_FACTOR = float(os.environ.get("TRACKB_SOURCE_TIMEOUT_FACTOR", "2"))
+# Open the circuit at this error rate over the window (once MIN_SAMPLES calls are seen) ...
+ERROR_RATE_THRESHOLD = float(os.environ.get("TRACKB_BREAKER_ERROR_RATE", "0.5"))
+# ... or after this many consecutive failures
+CONSECUTIVE_FAILURES = int(os.environ.get("TRACKB_BREAKER_FAILURES", "3"))
+COOLDOWN = float(os.environ.get("TRACKB_BREAKER_COOLDOWN", "30"))
+
+MIN_SAMPLES = 10
+_WINDOW = 100
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(RuntimeError):
+    """The upstream's circuit is open; the call was skipped."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} circuit open, skipped (retry in {retry_in:.0f} s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class SourceHealth:
+    """Rolling health window and circuit breaker for one upstream. Thread-safe."""
+
+    def __init__(self, name: str, cooldown: float = COOLDOWN):
+        self.name = name
+        self.cooldown = cooldown
+        self._latencies = deque(maxlen=_WINDOW)  # seconds, successful calls only
+        self._outcomes = deque(maxlen=_WINDOW)   # True for success
+        self._consecutive_failures = 0
+        self._state = CLOSED
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "failures": 0, "skipped": 0, "opened": 0}
+
+    def _p95(self) -> Optional[float]:
+        if len(self._latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def timeout(self) -> float:
+        """Request timeout from the recent p95 latency (MAX_TIMEOUT until there is enough history)."""
+        with self._lock:
+            p95 = self._p95()
+        if p95 is None:
+            return MAX_TIMEOUT
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, p95 * TIMEOUT_FACTOR))
+
+    def before_call(self):
+        """Raise CircuitOpen if the call must be skipped; let one probe through after the cool-down."""
+        now = time.time()
+        with self._lock:
+            if self._state == OPEN:
+                if now < self._open_until:
+                    self._counters["skipped"] += 1
+                    raise CircuitOpen(self.name, self._open_until - now)
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self._counters["skipped"] += 1
+                    raise CircuitOpen(self.name, 0)
+                self._probe_in_flight = True
+            self._counters["calls"] += 1
+
+    def abandon(self):
+        """The call was given up before reaching the upstream (e.g. rate-limited locally); record nothing."""
+        with self._lock:
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN:
+                self._state = OPEN
+
+    def record(self, ok: bool, seconds: float, retry_after: Optional[float] = None):
+        """Record a call outcome; `retry_after` (e.g. from a 429) opens the circuit for at least that long."""
+        with self._lock:
+            self._outcomes.append(ok)
+            probe = self._state == HALF_OPEN
+            self._probe_in_flight = False
+            if ok:
+                self._latencies.append(seconds)
+                self._consecutive_failures = 0
+                if probe:
+                    self._state = CLOSED
+                return
+            self._counters["failures"] += 1
+            self._consecutive_failures += 1
+            errors = self._outcomes.count(False)
+            too_many = (
+                probe
+                or retry_after is not None
+                or self._consecutive_failures >= CONSECUTIVE_FAILURES
+                or (len(self._outcomes) >= MIN_SAMPLES and errors / len(self._outcomes) >= ERROR_RATE_THRESHOLD)
+            )
+            if too_many:
+                self._state = OPEN
+                self._open_until = time.time() + max(self.cooldown, retry_after or 0)
+                self._counters["opened"] += 1
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.time() >= self._open_until:
+                return HALF_OPEN
+            return self._state
+
+    def stats(self) -> dict:
+        timeout = self.timeout()
+        state = self.state
+        with self._lock:
+            stats = dict(self._counters)
+            p95 = self._p95()
+            outcomes = len(self._outcomes)
+            stats.update({
+                "state": state,
+                "error_rate": round(self._outcomes.count(False) / outcomes, 3) if outcomes else 0.0,
+                "p95_ms": round(p95 * 1000) if p95 is not None else None,
+                "timeout_s": round(timeout, 2),
+                "open_for_s": round(max(0.0, self._open_until - time.time()), 1) if state == OPEN else 0.0,
+            })
+        return stats
+
+    def describe(self) -> str:
+        s = self.stats()
+        p95 = f"p95 {s['p95_ms']} ms" if s["p95_ms"] is not None else "p95 n/a"
+        text = f"{self.name}: circuit {s['state']} ({p95}, timeout {s['timeout_s']:.1f} s, errors {s['error_rate']:.0%})"
+        if s["state"] == OPEN:
+            text += f", skipped for another {s['open_for_s']:.0f} s"
+        return text
+
+
+_health: Dict[str, SourceHealth] = {}
+_health_lock = threading.Lock()
+
+
+def get_health(name: str) -> SourceHealth:
+    """Process-wide SourceHealth for the upstream called `name`."""
+    with _health_lock:
+        health = _health.get(name)
+        if health is None:
+            health = _health[name] = SourceHealth(name)
+        return health
+
+
+def health_stats() -> Dict[str, dict]:
+    with _health_lock:
+        entries = list(_health.values())
+    return {health.name: health.stats() for health in entries}
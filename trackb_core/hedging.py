@@ -0,0 +1,201 @@
+"""
+Hedged requests for slow upstream calls.
+
+The primary call starts at once. If it has not finished after a delay taken
+from the recent p95 latency of that upstream (counted from when the call starts
+running, not from when it was queued), a backup call is started and whichever
+succeeds first wins. Hedges are capped to a fraction of recent
+requests, so a slow spell cannot double the load on the upstream.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .execution import DEFAULT_WORKERS
+
+HEDGE_ENABLED = os.environ.get("TRACKB_HEDGE", "1") not in ("0", "false", "off")
+# Delay used until an upstream has MIN_SAMPLES latencies recorded (seconds)
+DEFAULT_DELAY = float(os.environ.get("TRACKB_HEDGE_DELAY", "8"))
+MIN_DELAY = float(os.environ.get("TRACKB_HEDGE_MIN_DELAY", "1"))
+# At most this fraction of recent requests may be hedged
+MAX_HEDGE_RATE = float(os.environ.get("TRACKB_HEDGE_MAX_RATE", "0.1"))
+
+MIN_SAMPLES = 20
+_WINDOW = 200
+
+PRIMARY = "primary"
+BACKUP = "backup"
+
+# Calls are blocking, so they run here; a losing call keeps its thread until its own timeout.
+# LLM calls are made from the API's worker threads (batches and expert summaries included), so
+# the default leaves room for every worker's primary plus as many backups or lingering losers.
+_hedge_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("TRACKB_HEDGE_THREADS") or 2 * DEFAULT_WORKERS),
+    thread_name_prefix="trackb-hedge",
+)
+
+
+class LatencyTracker:
+    """Rolling latency window per upstream name, for p50/p95 estimates. Thread-safe."""
+
+    def __init__(self, window: int = _WINDOW):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, name: str, q: float, min_samples: int = MIN_SAMPLES) -> Optional[float]:
+        """The q-quantile of recent latencies, or None while there are fewer than `min_samples`."""
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            names = list(self._samples)
+        return {
+            name: {
+                "samples": len(self._samples[name]),
+                "p50_ms": round(self.quantile(name, 0.5, 1) * 1000),
+                "p95_ms": round(self.quantile(name, 0.95, 1) * 1000),
+            }
+            for name in names
+        }
+
+
+class Hedger:
+    """
+    Runs primary calls with an optional hedged backup.
+
+    Counters:
+        requests, hedged, hedge_wins (backup answered first), primary_wins
+        (primary answered first after a hedge was sent), suppressed (a hedge
+        was due but the rate cap was reached).
+    """
+
+    def __init__(self, enabled: bool = HEDGE_ENABLED, max_rate: float = MAX_HEDGE_RATE,
+                 default_delay: float = DEFAULT_DELAY, min_delay: float = MIN_DELAY):
+        self.enabled = enabled
+        self.max_rate = max_rate
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.latency = LatencyTracker()
+        self._recent = deque(maxlen=_WINDOW)  # one [hedged] slot per recent request
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "hedged": 0, "hedge_wins": 0, "primary_wins": 0, "suppressed": 0}
+
+    def delay_for(self, name: str) -> float:
+        p95 = self.latency.quantile(name, 0.95)
+        return max(self.min_delay, p95 if p95 is not None else self.default_delay)
+
+    def _admit_hedge(self, slot: list) -> bool:
+        """Hedge the request owning `slot` if the recent hedge rate allows it."""
+        with self._lock:
+            allowed = sum(hedged for hedged, in self._recent) < max(1, int(self.max_rate * len(self._recent)))
+            if allowed:
+                slot[0] = True
+                self._counters["hedged"] += 1
+            else:
+                self._counters["suppressed"] += 1
+            return allowed
+
+    def _timed(self, name: str, call: Callable[[], Any], ok: Callable[[Any], bool]) -> Callable[[], Any]:
+        """`call` recording its latency; failures are not recorded (fast errors would drag the p95 down)."""
+        def run():
+            started = time.perf_counter()
+            value = call()
+            if ok(value):
+                self.latency.observe(name, time.perf_counter() - started)
+            return value
+        return run
+
+    def call(self, primary: Tuple[str, Callable[[], Any]], backup: Tuple[str, Callable[[], Any]] = None,
+             ok: Callable[[Any], bool] = lambda value: True) -> Tuple[Any, str, bool, str]:
+        """
+        Run `primary` = (name, fn), hedging with `backup` = (name, fn) after the primary's p95 delay.
+        `ok(value)` tells a usable answer from an error value; an unusable first answer waits for the other.
+
+        Returns:
+            tuple: (value, name of the call that produced it, whether a hedge was sent,
+            which attempt produced it: PRIMARY or BACKUP; the names may be the same model)
+        """
+        slot = [False]
+        with self._lock:
+            self._counters["requests"] += 1
+            self._recent.append(slot)
+
+        primary_name, primary_fn = primary
+        if not self.enabled or backup is None:
+            return self._timed(primary_name, primary_fn, ok)(), primary_name, False, PRIMARY
+
+        running = threading.Event()
+        timed_primary = self._timed(primary_name, primary_fn, ok)
+
+        def run_primary():
+            running.set()
+            return timed_primary()
+
+        first = _hedge_pool.submit(run_primary)
+        # Time spent queued for a pool thread is not the upstream being slow: start the clock when it runs
+        running.wait()
+        try:
+            return first.result(timeout=self.delay_for(primary_name)), primary_name, False, PRIMARY
+        except FutureTimeout:
+            pass
+        if not self._admit_hedge(slot):
+            return first.result(), primary_name, False, PRIMARY
+
+        backup_name, backup_fn = backup
+        second = _hedge_pool.submit(self._timed(backup_name, backup_fn, ok))
+        names = {first: primary_name, second: backup_name}
+        attempts = {first: PRIMARY, second: BACKUP}
+        pending = {first, second}
+        fallback = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    value = future.result()
+                except Exception as e:
+                    fallback = fallback or (e, future)
+                    continue
+                if ok(value):
+                    with self._lock:
+                        self._counters["hedge_wins" if future is second else "primary_wins"] += 1
+                    return value, names[future], True, attempts[future]
+                fallback = fallback or (value, future)
+        # Neither call produced a usable answer: surface the first failure
+        value, future = fallback
+        if isinstance(value, Exception):
+            raise value
+        return value, names[future], True, attempts[future]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["hedge_rate"] = round(stats["hedged"] / stats["requests"], 3) if stats["requests"] else 0.0
+        stats["latency"] = self.latency.stats()
+        return stats
+
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    """Process-wide Hedger configured from the environment."""
+    global _hedger
+    if _hedger is None:
+        with _hedger_lock:
+            if _hedger is None:
+                _hedger = Hedger()
+    return _hedger
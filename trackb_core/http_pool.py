@@ -0,0 +1,152 @@
+"""
+Shared keep-alive HTTP connection pool for every upstream client in Track B.
+
+All search APIs and the Bedrock proxy go through one `requests.Session`, so
+TCP+TLS connections are reused across requests instead of being re-opened
+on every call. Pool sizes can be tuned per host. Requests to rate-limited
+hosts first take a token from the shared per-host bucket (see ratelimit).
+TRACKB_RECORD / TRACKB_REPLAY swap the transport for recording or replaying
+all upstream traffic (see replay).
+
+Async callers use `http_post_async`: one pooled httpx.AsyncClient per event
+loop (httpx is imported on first use), under the same rate limits.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from typing import Dict, Optional
+
+import requests
+
+from .ratelimit import get_rate_limiter
+from .replay import make_adapter, mode as replay_mode
+
+# Connections kept alive per host
+DEFAULT_POOL_SIZE = int(os.environ.get("TRACKB_HTTP_POOL_SIZE", "10"))
+# Number of distinct hosts whose pools are cached by the default adapter
+DEFAULT_HOST_POOLS = int(os.environ.get("TRACKB_HTTP_HOST_POOLS", "16"))
+
+
+def _parse_host_sizes(spec: str) -> Dict[str, int]:
+    """Parse 'host=size,host=size' (TRACKB_HTTP_POOL_SIZES) into a dict."""
+    sizes = {}
+    for item in spec.split(","):
+        host, _, size = item.strip().partition("=")
+        if host and size.strip().isdigit():
+            sizes[host.strip()] = int(size)
+    return sizes
+
+
+# Per-host overrides, e.g. TRACKB_HTTP_POOL_SIZES="api.openalex.org=20,api.crossref.org=4"
+HOST_POOL_SIZES = _parse_host_sizes(os.environ.get("TRACKB_HTTP_POOL_SIZES", ""))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _mount_host(session: requests.Session, host: str, pool_size: int):
+    adapter = make_adapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount(f"https://{host}", adapter)
+    session.mount(f"http://{host}", adapter)
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                default_adapter = make_adapter(pool_connections=DEFAULT_HOST_POOLS, pool_maxsize=DEFAULT_POOL_SIZE)
+                session.mount("https://", default_adapter)
+                session.mount("http://", default_adapter)
+                for host, pool_size in HOST_POOL_SIZES.items():
+                    _mount_host(session, host, pool_size)
+                _session = session
+    return _session
+
+
+def configure_host(host: str, pool_size: int):
+    """Give `host` its own pool of `pool_size` keep-alive connections."""
+    HOST_POOL_SIZES[host] = pool_size
+    if _session is not None:
+        with _session_lock:
+            _mount_host(_session, host, pool_size)
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """`requests.get` over the shared pool, after the host's rate limit."""
+    get_rate_limiter().acquire_url(url)
+    return get_session().get(url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    """`requests.post` over the shared pool, after the host's rate limit."""
+    get_rate_limiter().acquire_url(url)
+    return get_session().post(url, **kwargs)
+
+
+# --- ASYNC CLIENT ---
+
+# event loop -> its httpx.AsyncClient (a client must not be shared across loops)
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """The pooled httpx.AsyncClient of the running event loop, creating it on first use."""
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    with _session_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=DEFAULT_HOST_POOLS * DEFAULT_POOL_SIZE, max_keepalive_connections=DEFAULT_POOL_SIZE,
+            ))
+    return client
+
+
+async def http_post_async(url: str, **kwargs):
+    """
+    `http_post` without holding a thread: the host's rate limit is awaited and the
+    request is sent on the loop's pooled async client. In record/replay mode the
+    shared session is used (on a worker thread), so cassettes cover every call.
+    """
+    if replay_mode() is not None:
+        return await asyncio.to_thread(http_post, url, **kwargs)
+    await get_rate_limiter().acquire_url_async(url)
+    return await get_async_client().post(url, **kwargs)
+
+
+def pool_stats() -> Dict[str, dict]:
+    """
+    Connection-reuse metrics per host.
+
+    Returns:
+        dict: host -> {"pool_size", "connections_opened", "requests", "reused"}
+    """
+    stats: Dict[str, dict] = {}
+    if _session is None:
+        return stats
+
+    adapters = {id(adapter): adapter for adapter in _session.adapters.values()}
+    for adapter in adapters.values():
+        if not hasattr(adapter, "poolmanager"):
+            continue  # replay adapter: no connections
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            try:
+                pool = pools[key]
+            except KeyError:
+                continue  # evicted while we were iterating
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            opened = pool.num_connections
+            served = pool.num_requests
+            stats[host] = {
+                "pool_size": pool.pool.maxsize if pool.pool is not None else 0,
+                "connections_opened": opened,
+                "requests": served,
+                "reused": max(0, served - opened),
+            }
+    return stats
@@ -0,0 +1,337 @@
+"""
+Local full-text index of the works and authors fetched from the scholarly APIs.
+
+Every paper record and authorship the sources return is written into a SQLite
+FTS5 index in the shared state directory: works (title, abstract, topics,
+authors), authors (affiliation, country) and author-to-topic postings.
+Updates are incremental: a work seen again is merged into its stored record.
+Paper and expert lookups are answered from the index first; the network is
+only needed for topics the index does not cover yet, or to refresh stale ones.
+Expert lookups are only answered for searches the index has ingested from
+every expert source (same topic and country filter), so papers picked up by a
+chat search never stand in for a full authorship search.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config import state_path
+from .packer import content_terms
+from .records import Paper, normalize_title
+
+INDEX_ENABLED = os.environ.get("TRACKB_INDEX", "1") not in ("0", "false", "off")
+DEFAULT_PATH = os.environ.get("TRACKB_INDEX_PATH") or None
+# Hits older than this (seconds) are still served, but trigger a background refresh
+FRESH_FOR = float(os.environ.get("TRACKB_INDEX_FRESH_FOR", "604800"))
+# Fewer matching works than this and a paper lookup goes to the network instead
+MIN_HITS = int(os.environ.get("TRACKB_INDEX_MIN_HITS", "3"))
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS works ("
+    " id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, title_key TEXT NOT NULL,"
+    " record TEXT NOT NULL, citations INTEGER NOT NULL DEFAULT 0, updated REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS works_title_key ON works (title_key)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS works_fts USING fts5(title, abstract, topics, authors)",
+    "CREATE TABLE IF NOT EXISTS authors ("
+    " id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, name TEXT NOT NULL, url TEXT NOT NULL DEFAULT '',"
+    " affiliation TEXT NOT NULL DEFAULT '', country TEXT NOT NULL DEFAULT '', updated REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS authorships ("
+    " work_id INTEGER NOT NULL, author_id INTEGER NOT NULL, PRIMARY KEY (work_id, author_id))",
+    "CREATE INDEX IF NOT EXISTS authorships_author ON authorships (author_id)",
+    "CREATE TABLE IF NOT EXISTS author_topics ("
+    " author_id INTEGER NOT NULL, topic TEXT NOT NULL, works INTEGER NOT NULL, PRIMARY KEY (author_id, topic))",
+    # Authorship searches ingested per (query key, country filter, source): the works in rank order
+    "CREATE TABLE IF NOT EXISTS expert_searches ("
+    " query TEXT NOT NULL, countries TEXT NOT NULL, source TEXT NOT NULL, works TEXT NOT NULL,"
+    " updated REAL NOT NULL, PRIMARY KEY (query, countries, source))",
+)
+
+
+def match_expression(query: str) -> str:
+    """FTS5 query requiring every content term of `query` (quoted, so user text is never parsed as syntax)."""
+    terms = list(dict.fromkeys(content_terms(query)))
+    return " AND ".join(f'"{term}"' for term in terms)
+
+
+def query_key(query: str) -> str:
+    """Word-order-insensitive key of a search (its content terms)."""
+    terms = sorted(set(content_terms(query)))
+    return " ".join(terms) if terms else normalize_title(query)
+
+
+def _countries_key(countries: Optional[Iterable[str]]) -> str:
+    return ",".join(sorted(countries)) if countries else ""
+
+
+class LocalIndex:
+    """
+    SQLite FTS5 index of works, authors and author-topic postings. Thread- and process-safe.
+
+    Counters (this process):
+        works_written, authors_written, lookups, hits (paper lookups with at
+        least MIN_HITS works, expert lookups for an ingested search), misses,
+        errors (SQLite failures; the caller then falls back to the network).
+    """
+
+    def __init__(self, path: Optional[str] = None, fresh_for: float = FRESH_FOR, min_hits: int = MIN_HITS):
+        self.path = path or state_path("index.sqlite3")
+        self.fresh_for = fresh_for
+        self.min_hits = min_hits
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"works_written": 0, "authors_written": 0, "lookups": 0, "hits": 0, "misses": 0, "errors": 0}
+        db = self._db()
+        for statement in _SCHEMA:
+            db.execute(statement)
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    # --- INGESTION ---
+
+    def _find_work(self, db, paper: Paper) -> Optional[tuple]:
+        row = db.execute("SELECT id, record FROM works WHERE key = ?", (paper.key,)).fetchone()
+        if row is None:
+            # Same rule as records.merge_papers: a title match only joins works that do not both have DOIs
+            for candidate in db.execute("SELECT id, record, key FROM works WHERE title_key = ?", (normalize_title(paper.title),)):
+                if not (paper.doi and candidate[2].startswith("doi:")):
+                    return candidate[:2]
+        return row
+
+    def _author_id(self, db, name: str, now: float, url: str = "", affiliation: str = "", country: str = "") -> int:
+        key = normalize_title(name)
+        db.execute(
+            "INSERT INTO authors (key, name, url, affiliation, country, updated) VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (key) DO UPDATE SET"
+            "  url = CASE WHEN excluded.url != '' THEN excluded.url ELSE url END,"
+            "  affiliation = CASE WHEN excluded.affiliation != '' THEN excluded.affiliation ELSE affiliation END,"
+            "  country = CASE WHEN excluded.affiliation != '' THEN excluded.country ELSE country END,"
+            "  updated = excluded.updated",
+            (key, name, url, affiliation, country, now),
+        )
+        return db.execute("SELECT id FROM authors WHERE key = ?", (key,)).fetchone()[0]
+
+    def _upsert(self, db, paper: Paper, now: float, authors: Iterable[dict] = ()) -> int:
+        """Insert or merge one work with its authorships; `authors` are {name, url, affiliation, country} dicts."""
+        found = self._find_work(db, paper)
+        if found is not None:
+            work_id, record = found
+            stored = Paper.from_dict(json.loads(record))
+            stored.merge(paper)
+            paper = stored
+            db.execute(
+                "UPDATE works SET record = ?, citations = ?, updated = ? WHERE id = ?",
+                (json.dumps(paper.to_dict()), paper.citations or 0, now, work_id),
+            )
+            db.execute("DELETE FROM works_fts WHERE rowid = ?", (work_id,))
+        else:
+            work_id = db.execute(
+                "INSERT INTO works (key, title_key, record, citations, updated) VALUES (?, ?, ?, ?, ?)",
+                (paper.key, normalize_title(paper.title), json.dumps(paper.to_dict()), paper.citations or 0, now),
+            ).lastrowid
+
+        people = {normalize_title(a["name"]): a for a in ({"name": name} for name in paper.authors) if a["name"]}
+        people.update({normalize_title(a["name"]): a for a in authors if a.get("name")})
+        for person in people.values():
+            author_id = self._author_id(db, person["name"], now, person.get("url", ""),
+                                        person.get("affiliation", ""), person.get("country", ""))
+            new = db.execute(
+                "INSERT OR IGNORE INTO authorships (work_id, author_id) VALUES (?, ?)", (work_id, author_id)
+            ).rowcount
+            if new:
+                # Postings only grow when the author gains a work, so re-ingesting a work is idempotent
+                db.executemany(
+                    "INSERT INTO author_topics (author_id, topic, works) VALUES (?, ?, 1)"
+                    " ON CONFLICT (author_id, topic) DO UPDATE SET works = works + 1",
+                    [(author_id, topic) for topic in paper.topics],
+                )
+                self._count("authors_written")
+
+        names = " ".join(person["name"] for person in people.values())
+        db.execute(
+            "INSERT INTO works_fts (rowid, title, abstract, topics, authors) VALUES (?, ?, ?, ?, ?)",
+            (work_id, paper.title, paper.abstract, " ".join(paper.topics), names),
+        )
+        self._count("works_written")
+        return work_id
+
+    def _write(self, items: List[Tuple[Paper, List[dict]]], search: Optional[Tuple[str, str, str]] = None):
+        """Upsert `items` in one transaction; `search` = (query key, countries key, source) records them as that search."""
+        if not items and search is None:
+            return
+        db = self._db()
+        now = time.time()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                work_ids = [self._upsert(db, paper, now, authors) for paper, authors in items]
+                if search is not None:
+                    db.execute(
+                        "INSERT OR REPLACE INTO expert_searches (query, countries, source, works, updated)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        search + (json.dumps(list(dict.fromkeys(work_ids))), now),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            self._count("errors")  # the index is best-effort; a failed write only costs future hits
+
+    def add_papers(self, papers: Iterable[Paper]):
+        """Ingest merged paper records (see sources.search_academic_sources)."""
+        self._write([(paper, []) for paper in papers])
+
+    def add_authorships(self, records: Iterable[dict], source: str, query: Optional[str] = None,
+                        countries: Optional[Iterable[str]] = None):
+        """
+        Ingest flat authorship records (see experts.openalex_authorships), grouped back into works.
+        With `query`, they are also recorded as the complete result of that search (and country
+        filter) from `source`, which is what search_authorships answers from.
+        """
+        works: Dict[str, Tuple[Paper, List[dict]]] = {}
+        for record in records:
+            key = normalize_title(record["work"])
+            if not key:
+                continue
+            if key not in works:
+                works[key] = (Paper(record["work"], source, citations=record["citations"], topics=record["areas"]), [])
+            works[key][1].append(record)
+        search = (query_key(query), _countries_key(countries), source) if query is not None else None
+        self._write(list(works.values()), search)
+
+    # --- LOOKUPS ---
+
+    def _matches(self, query: str, limit: int) -> List[tuple]:
+        expression = match_expression(query)
+        if not expression:
+            return []
+        return self._db().execute(
+            "SELECT works.id, works.record, works.updated FROM works_fts JOIN works ON works.id = works_fts.rowid"
+            " WHERE works_fts MATCH ? ORDER BY bm25(works_fts), works.citations DESC LIMIT ?",
+            (expression, limit),
+        ).fetchall()
+
+    def _lookup(self, query: str, limit: int) -> Tuple[List[tuple], Optional[float]]:
+        """Matching (id, record, updated) rows and the age of the newest one, or ([], None) on a miss."""
+        self._count("lookups")
+        try:
+            rows = self._matches(query, limit)
+        except sqlite3.Error:
+            self._count("errors")
+            return [], None
+        if len(rows) < min(self.min_hits, limit):
+            self._count("misses")
+            return [], None
+        self._count("hits")
+        return rows, time.time() - max(row[2] for row in rows)
+
+    def search_papers(self, query: str, limit: int) -> Tuple[List[Paper], Optional[float]]:
+        """
+        Best-matching works for `query`. Returns (papers, age): age is the seconds since the
+        newest hit was last ingested, or None when the index has too few matches to answer.
+        """
+        rows, age = self._lookup(query, limit)
+        return [Paper.from_dict(json.loads(record)) for _, record, _ in rows], age
+
+    def search_authorships(self, query: str, sources: Iterable[str],
+                           countries: Optional[set] = None) -> Tuple[Dict[str, List[dict]], Optional[float]]:
+        """
+        Authorship records (the shape experts.openalex_authorships returns) per source, for a
+        search ingested by add_authorships from every one of `sources` with the same query and
+        country filter; relevance comes from each work's rank in that search. Returns (records by
+        source, age of the oldest of those searches), or ({}, None) when any source is missing.
+        """
+        self._count("lookups")
+        sources = list(sources)
+        try:
+            db = self._db()
+            rows = db.execute(
+                "SELECT source, works, updated FROM expert_searches WHERE query = ? AND countries = ?",
+                (query_key(query), _countries_key(countries)),
+            ).fetchall()
+            searches = {source: (json.loads(works), updated) for source, works, updated in rows}
+            if not sources or any(source not in searches for source in sources):
+                self._count("misses")
+                return {}, None
+            records: Dict[str, List[dict]] = {}
+            for source in sources:
+                records[source] = self._authorships(db, searches[source][0], countries)
+        except sqlite3.Error:
+            self._count("errors")
+            return {}, None
+        self._count("hits")
+        return records, time.time() - min(searches[source][1] for source in sources)
+
+    def _authorships(self, db, work_ids: List[int], countries: Optional[set]) -> List[dict]:
+        records = []
+        for rank, work_id in enumerate(work_ids):
+            row = db.execute("SELECT record FROM works WHERE id = ?", (work_id,)).fetchone()
+            if row is None:
+                continue
+            paper = json.loads(row[0])
+            for name, url, affiliation, country in db.execute(
+                "SELECT authors.name, authors.url, authors.affiliation, authors.country FROM authorships"
+                " JOIN authors ON authors.id = authorships.author_id WHERE authorships.work_id = ?",
+                (work_id,),
+            ):
+                if countries and country not in countries:
+                    continue
+                records.append({
+                    "name": name, "url": url, "affiliation": affiliation, "country": country,
+                    "work": paper["title"], "citations": paper["citations"] or 0,
+                    "relevance": 1.0 / (1 + rank), "areas": list(paper["topics"] or ())[:3],
+                })
+        return records
+
+    def author_topics(self, name: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """An author's topics from the postings, as (topic, works) pairs, most frequent first."""
+        return self._db().execute(
+            "SELECT topic, works FROM author_topics JOIN authors ON authors.id = author_topics.author_id"
+            " WHERE authors.key = ? ORDER BY works DESC, topic LIMIT ?",
+            (normalize_title(name), limit),
+        ).fetchall()
+
+    def is_stale(self, age: Optional[float]) -> bool:
+        return age is not None and age > self.fresh_for
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        try:
+            db = self._db()
+            stats["works"] = db.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+            stats["authors"] = db.execute("SELECT COUNT(*) FROM authors").fetchone()[0]
+        except sqlite3.Error:
+            pass
+        return stats
+
+
+_index: Optional[LocalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[LocalIndex]:
+    """Process-wide LocalIndex, or None when TRACKB_INDEX is off or SQLite lacks FTS5."""
+    global _index
+    if _index is None and INDEX_ENABLED:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = LocalIndex(DEFAULT_PATH)
+                except sqlite3.Error:
+                    return None
+    return _index
@@ -0,0 +1,205 @@
+"""
+Holistic AI Bedrock-proxy invocation and prompt formatting.
+"""
+import os
+import time
+from typing import List
+
+from .config import API_ENDPOINT, API_TOKEN, TEAM_ID
+from .hedging import BACKUP, PRIMARY, get_hedger
+from .http_pool import http_post
+from .llm_cache import CacheLookup, get_response_cache
+from .metrics import get_metrics
+from .singleflight import get_flight
+
+
+# --- MODEL TIERS ---
+
+LLM_MODEL = "us.anthropic.claude-3-5-sonnet-20241022-v2:0"
+LLM_MAX_TOKENS = 1024
+
+MODEL_TIERS = {
+    "quality": os.environ.get("TRACKB_MODEL_QUALITY", LLM_MODEL),
+    "fast": os.environ.get("TRACKB_MODEL_FAST", "us.anthropic.claude-3-5-haiku-20241022-v1:0"),
+}
+# Direct (no search context) prompts up to this many tokens go to the fast tier; 0 disables
+FAST_TIER_MAX_TOKENS = int(os.environ.get("TRACKB_FAST_TIER_MAX_TOKENS", "600"))
+LLM_TIMEOUT = float(os.environ.get("TRACKB_LLM_TIMEOUT", "40"))
+
+
+def choose_tier(route: str, prompt_tokens: int) -> str:
+    """
+    Model tier for a request: short questions answered from the model's own knowledge
+    go to the fast tier; anything carrying search context or a long prompt gets the
+    quality tier.
+    """
+    if route == "direct" and prompt_tokens <= FAST_TIER_MAX_TOKENS:
+        return "fast"
+    return "quality"
+
+
+# Prefixes of the error texts the pipeline puts in place of an answer (LLM call, agent and API failures)
+ERROR_PREFIXES = ("ERROR", "Error", "An error occurred", "The agent did not provide")
+
+
+def is_error_answer(answer: str) -> bool:
+    """True for error texts standing in for an answer; they are never cached or kept in a session."""
+    return answer.startswith(ERROR_PREFIXES)
+
+
+class LLMCall:
+    """
+    How an answer was produced: cache outcome, tier and model, whether the call was hedged
+    and which attempt (hedging.PRIMARY or BACKUP) answered.
+    """
+
+    __slots__ = ("cache", "tier", "model", "hedged", "latency_ms", "winner")
+
+    def __init__(self, cache: CacheLookup, tier: str, model: str, hedged: bool = False, latency_ms: float = 0.0,
+                 winner: str = PRIMARY):
+        self.cache = cache
+        self.tier = tier
+        self.model = model
+        self.hedged = hedged
+        self.latency_ms = latency_ms
+        self.winner = winner
+
+    def describe(self) -> str:
+        if self.cache.hit:
+            return f"{self.tier} tier ({MODEL_TIERS[self.tier]}), answer from cache"
+        text = f"{self.tier} tier, answered by {self.model} in {self.latency_ms:.0f} ms"
+        if self.hedged:
+            won = "hedge won" if self.winner == BACKUP else "primary won"
+            text += f" (hedged to the fast tier, {won})"
+        return text
+
+
+# --- CUSTOM LLM INVOCATION FUNCTION ---
+
+def invoke_holistic_llm(messages: List[dict], model: str = LLM_MODEL) -> str:
+    # Credentials are checked at startup, so we use the global variables here.
+    headers = {
+        "Content-Type": "application/json",
+        "X-Team-ID": TEAM_ID,
+        "X-API-Token": API_TOKEN
+    }
+    
+    payload = {
+        "team_id": TEAM_ID,
+        "api_token": API_TOKEN, 
+        "model": model,
+        "messages": messages,
+        "max_tokens": LLM_MAX_TOKENS
+    }
+
+    try:
+        response = http_post(API_ENDPOINT, headers=headers, json=payload, timeout=LLM_TIMEOUT)
+        
+        if response.status_code == 200:
+            result = response.json()
+            if result.get("content") and isinstance(result["content"], list):
+                return result["content"][0].get("text", "Error: Model returned no text.")
+            return "Error: Invalid response structure from API."
+        
+        elif response.status_code == 401:
+            return "ERROR: Unauthorized (401). Your Team ID or API Token is invalid. Check credentials."
+        
+        elif response.status_code == 400:
+            return f"ERROR: API returned 400. Check console for full response details."
+
+        else:
+            return f"ERROR: API returned status {response.status_code}. Response: {response.text}"
+
+    except Exception as e:
+        return f"ERROR: An unknown connection error occurred: {e}"
+
+
+def invoke_holistic_llm_hedged(messages: List[dict], tier: str = "quality"):
+    """
+    Call the tier's model; if it is slower than its recent p95, send the same prompt to
+    the fast tier as well and keep whichever usable answer arrives first.
+    Returns (answer, model that answered, hedged, winning attempt).
+    """
+    primary = MODEL_TIERS[tier]
+    backup = MODEL_TIERS["fast"]
+    return get_hedger().call(
+        (primary, lambda: invoke_holistic_llm(messages, primary)),
+        (backup, lambda: invoke_holistic_llm(messages, backup)),
+        ok=lambda answer: not is_error_answer(answer),
+    )
+
+
+def invoke_holistic_llm_cached(messages: List[dict], question: str = None, use_cache: bool = True, tier: str = "quality"):
+    """
+    invoke_holistic_llm_hedged behind the response cache (exact + near-duplicate tiers).
+    `question` is the bare user question; near-duplicate hits require it to match too.
+    Identical prompts already in flight share that call instead of starting another.
+    Returns (answer, LLMCall); error answers are never cached.
+    """
+    cache = get_response_cache()
+    model = MODEL_TIERS[tier]
+    started = time.perf_counter()
+
+    def observed(answer, llm_call):
+        get_metrics().observe("trackb_llm_seconds", time.perf_counter() - started, tier=tier, cache=llm_call.cache.kind)
+        return answer, llm_call
+
+    def invoke():
+        started = time.perf_counter()
+        answer, answered_by, hedged, winner = invoke_holistic_llm_hedged(messages, tier)
+        return answer, answered_by, hedged, (time.perf_counter() - started) * 1000, winner
+
+    if not use_cache:
+        cache.note_bypass()
+        answer, answered_by, hedged, latency_ms, winner = invoke()
+        return observed(answer, LLMCall(CacheLookup("bypass"), tier, answered_by, hedged, latency_ms, winner))
+
+    def call():
+        lookup = cache.lookup(model, messages, LLM_MAX_TOKENS, question=question)
+        if lookup.hit:
+            return lookup.answer, LLMCall(lookup, tier, model)
+
+        answer, answered_by, hedged, latency_ms, winner = invoke()
+        if not is_error_answer(answer):
+            # Keyed by the requested tier's model, so a hedged answer is found by the same prompt next time
+            cache.store(model, messages, LLM_MAX_TOKENS, answer, question=question)
+        return answer, LLMCall(lookup, tier, answered_by, hedged, latency_ms, winner)
+
+    key = cache.make_key(model, messages, LLM_MAX_TOKENS)
+    (answer, llm_call), shared = get_flight("llm").do(key, call)
+    if shared:
+        return observed(answer, LLMCall(CacheLookup("coalesced", answer), tier, llm_call.model, llm_call.hedged,
+                                        llm_call.latency_ms, llm_call.winner))
+    return observed(answer, llm_call)
+
+
+# --- MESSAGE FORMATTING ---
+
+def format_lc_messages(user_message, search_content="", conversation=""):
+    """
+    Formats the final, simplified prompt required by the API.
+    This structure forces the model to perform RAG.
+    `conversation` is the bounded session context (rolling summary + recent turns).
+    """
+    SYSTEM_INSTRUCTION = (
+        "You are a helpful, efficient, and transparent information auditor. "
+        "Your primary goal is to answer the user's question accurately. "
+    )
+    
+    # Bundle System Prompt, Search Data, and User Question into the single content field.
+    combined_content = SYSTEM_INSTRUCTION
+    
+    if search_content and "Valyu Search Tool is currently offline" not in search_content:
+        combined_content += (
+            f"You MUST use the following search results to answer the question. "
+            f"If the results do not contain the answer, state that explicitly.\n"
+            f"--- SEARCH RESULTS ---\n{search_content}\n"
+        )
+        
+    if conversation:
+        combined_content += f"--- CONVERSATION SO FAR ---\n{conversation}\n"
+        
+    combined_content += f"--- USER QUESTION ---\n{user_message}"
+
+    # Return the simple, correct list of dictionaries for the API
+    return [{"role": "user", "content": combined_content}]
@@ -0,0 +1,262 @@
+"""
+Response cache for Bedrock-proxy LLM calls.
+
+Exact tier: keyed by a hash of model, messages and max_tokens.
+Near-duplicate tier (optional): bottom-k MinHash sketches over word shingles
+of the prompt, so a trivially re-worded question with the same search context
+can be answered from a previous response above a similarity threshold. When
+the caller passes the bare question, it must also match on its own, so a
+different question asked over the same long search context never hits.
+
+Exact-tier entries are also written to a SQLite file in the shared state
+directory, so every worker process serves answers any of them has paid for.
+The near-duplicate tier stays in process memory.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from .config import state_path
+
+DEFAULT_TTL = float(os.environ.get("TRACKB_LLM_CACHE_TTL", "1800"))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("TRACKB_LLM_CACHE_SIZE", "256"))
+NEAR_DUPLICATES = os.environ.get("TRACKB_LLM_CACHE_NEAR", "1") not in ("0", "false", "off")
+NEAR_THRESHOLD = float(os.environ.get("TRACKB_LLM_CACHE_NEAR_THRESHOLD", "0.9"))
+# Shared exact tier across worker processes; TRACKB_LLM_CACHE_SHARED=0 keeps the cache in memory only
+SHARED = os.environ.get("TRACKB_LLM_CACHE_SHARED", "1") not in ("0", "false", "off")
+DEFAULT_PATH = os.environ.get("TRACKB_LLM_CACHE_PATH") or None
+
+SHINGLE_SIZE = 3      # words per shingle
+SKETCH_SIZE = 128     # k in bottom-k MinHash
+MIN_SHINGLES = 8      # prompts shorter than this only use the exact tier
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def prompt_text(messages: List[dict]) -> str:
+    return "\n".join(str(m.get("content", "")) for m in messages)
+
+
+def minhash_sketch(text: str, k: int = SKETCH_SIZE) -> Tuple[frozenset, int]:
+    """
+    Bottom-k MinHash sketch of the word shingles of `text`.
+    Returns (sketch, number of distinct shingles).
+    """
+    words = _WORD_RE.findall(text.casefold())
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+    hashes = sorted(int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles)
+    return frozenset(hashes[:k]), len(shingles)
+
+
+def question_features(question: str) -> frozenset:
+    """Words and word bigrams of a (short) question, for exact Jaccard comparison."""
+    words = _WORD_RE.findall(question.casefold())
+    return frozenset(words) | frozenset(zip(words, words[1:]))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def estimate_similarity(a: frozenset, b: frozenset, k: int = SKETCH_SIZE) -> float:
+    """Jaccard estimate from two bottom-k sketches."""
+    if not a or not b:
+        return 0.0
+    union_bottom = sorted(a | b)[:k]
+    both = a & b
+    return sum(1 for h in union_bottom if h in both) / len(union_bottom)
+
+
+class CacheLookup:
+    """Result of a cache lookup: kind is 'exact', 'near', 'coalesced', 'bypass' or 'miss'."""
+
+    __slots__ = ("kind", "answer", "similarity")
+
+    def __init__(self, kind: str, answer: Optional[str] = None, similarity: float = 0.0):
+        self.kind = kind
+        self.answer = answer
+        self.similarity = similarity
+
+    @property
+    def hit(self) -> bool:
+        return self.answer is not None
+
+    def describe(self) -> str:
+        if self.kind == "exact":
+            return "exact hit (served from cache, no proxy call)"
+        if self.kind == "near":
+            return f"near-duplicate hit (similarity {self.similarity:.2f}, no proxy call)"
+        if self.kind == "coalesced":
+            return "shared an identical in-flight request (no extra proxy call)"
+        if self.kind == "bypass":
+            return "bypassed"
+        return "miss"
+
+
+class ResponseCache:
+    """
+    Size-bounded (LRU) response cache with a TTL and an optional near-duplicate tier.
+    Thread-safe; entries live in process memory, and with `shared` the exact tier is
+    also kept in a SQLite file read by every worker (disk_hits counts those hits).
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL,
+                 near_duplicates: bool = NEAR_DUPLICATES, near_threshold: float = NEAR_THRESHOLD,
+                 shared: bool = False, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.near_duplicates = near_duplicates
+        self.near_threshold = near_threshold
+        # key -> (expires_at, answer, model, max_tokens, sketch or None, question features or None)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"exact_hits": 0, "disk_hits": 0, "near_hits": 0, "misses": 0, "evictions": 0, "bypassed": 0, "disk_errors": 0}
+        self.path = None
+        if shared:
+            self.path = path or state_path("llm_cache.sqlite3")
+            self._local = threading.local()
+            self._db().execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, answer TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _disk_get(self, key: str, now: float) -> Optional[str]:
+        try:
+            row = self._db().execute(
+                "SELECT answer FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        except sqlite3.Error:
+            with self._lock:
+                self._counters["disk_errors"] += 1
+            return None
+        return row[0] if row else None
+
+    def _disk_put(self, key: str, answer: str, expires_at: float, now: float):
+        try:
+            db = self._db()
+            db.execute("INSERT OR REPLACE INTO llm_cache (key, answer, expires_at) VALUES (?, ?, ?)", (key, answer, expires_at))
+            db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        except sqlite3.Error:
+            with self._lock:
+                self._counters["disk_errors"] += 1
+
+    @staticmethod
+    def make_key(model: str, messages: List[dict], max_tokens: int) -> str:
+        blob = json.dumps({"model": model, "messages": messages, "max_tokens": max_tokens}, sort_keys=True)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def lookup(self, model: str, messages: List[dict], max_tokens: int, question: Optional[str] = None) -> CacheLookup:
+        key = self.make_key(model, messages, max_tokens)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._counters["exact_hits"] += 1
+                return CacheLookup("exact", entry[1], 1.0)
+
+        if self.path is not None:
+            answer = self._disk_get(key, now)
+            if answer is not None:
+                with self._lock:
+                    self._counters["disk_hits"] += 1
+                return CacheLookup("exact", answer, 1.0)
+
+        if self.near_duplicates:
+            sketch, size = minhash_sketch(prompt_text(messages))
+            features = question_features(question) if question else None
+            if size >= MIN_SHINGLES:
+                best_key, best_score = None, 0.0
+                with self._lock:
+                    candidates = list(self._entries.items())
+                for cand_key, (expires_at, _, cand_model, cand_max_tokens, cand_sketch, cand_features) in candidates:
+                    if expires_at <= now or cand_sketch is None:
+                        continue
+                    if cand_model != model or cand_max_tokens != max_tokens:
+                        continue
+                    if features is not None:
+                        if cand_features is None or jaccard(features, cand_features) < self.near_threshold:
+                            continue
+                    score = estimate_similarity(sketch, cand_sketch)
+                    if score > best_score:
+                        best_key, best_score = cand_key, score
+                if best_key is not None and best_score >= self.near_threshold:
+                    with self._lock:
+                        entry = self._entries.get(best_key)
+                        if entry is not None:
+                            self._entries.move_to_end(best_key)
+                            self._counters["near_hits"] += 1
+                            return CacheLookup("near", entry[1], best_score)
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return CacheLookup("miss")
+
+    def store(self, model: str, messages: List[dict], max_tokens: int, answer: str, question: Optional[str] = None):
+        key = self.make_key(model, messages, max_tokens)
+        sketch = None
+        if self.near_duplicates:
+            sketch, size = minhash_sketch(prompt_text(messages))
+            if size < MIN_SHINGLES:
+                sketch = None
+        now = time.time()
+        if self.path is not None:
+            self._disk_put(key, answer, now + self.ttl, now)
+        with self._lock:
+            features = question_features(question) if question and sketch is not None else None
+            self._entries[key] = (now + self.ttl, answer, model, max_tokens, sketch, features)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+            # Drop expired entries from the cold end so they do not crowd out live ones
+            while self._entries:
+                oldest_key, oldest = next(iter(self._entries.items()))
+                if oldest[0] > now:
+                    break
+                del self._entries[oldest_key]
+                self._counters["evictions"] += 1
+
+    def note_bypass(self):
+        with self._lock:
+            self._counters["bypassed"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        hits = stats["exact_hits"] + stats["disk_hits"] + stats["near_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide ResponseCache configured from the environment."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(shared=SHARED, path=DEFAULT_PATH)
+    return _response_cache
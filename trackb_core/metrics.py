@@ -0,0 +1,188 @@
+"""
+Latency histograms and counters for the hot path, in Prometheus text format.
+
+Stages of the agent pipeline (routing, search, prompt formatting, LLM call,
+response assembly), every upstream source call and every HTTP request feed
+cumulative histograms here. `Timings` also keeps a per-request breakdown
+that the API returns with each answer. Metrics are per process; snapshots
+are plain dicts, so the worker registry can publish them and /metrics can sum
+them over every worker.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds of the latency buckets, in seconds (+Inf is implicit)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# name -> (type, help text)
+METRICS = {
+    "trackb_stage_seconds": ("histogram", "Time spent in each stage of the agent pipeline."),
+    "trackb_source_seconds": ("histogram", "Latency of each upstream source call, by outcome."),
+    "trackb_llm_seconds": ("histogram", "Latency of LLM calls, by model tier and cache outcome."),
+    "trackb_request_seconds": ("histogram", "HTTP request latency, by path and status code."),
+    "trackb_requests_total": ("counter", "HTTP requests, by path and status code."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{key}="{_escape(value)}"' for key, value in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class MetricsRegistry:
+    """Counters and fixed-bucket histograms keyed by metric name and labels. Thread-safe."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [per-bucket counts (last one is +Inf), sum, count]
+        self._histograms: Dict[Tuple[str, Labels], list] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, _labels(labels))
+        slot = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                slot = i
+                break
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][slot] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    @contextmanager
+    def time(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> dict:
+        """JSON-serializable copy of every series (see merge_snapshots / render)."""
+        with self._lock:
+            return {
+                "buckets": list(self.buckets),
+                "counters": [[name, list(map(list, labels)), value] for (name, labels), value in self._counters.items()],
+                "histograms": [
+                    [name, list(map(list, labels)), list(h[0]), h[1], h[2]] for (name, labels), h in self._histograms.items()
+                ],
+            }
+
+
+def merge_snapshots(snapshots: Iterable[dict]) -> dict:
+    """Sum snapshots taken in several processes (counters and bucket counts add up)."""
+    counters: Dict[tuple, float] = {}
+    histograms: Dict[tuple, list] = {}
+    buckets: List[float] = list(LATENCY_BUCKETS)
+    for snapshot in snapshots:
+        buckets = snapshot.get("buckets", buckets)
+        for name, labels, value in snapshot.get("counters", ()):
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, counts, total, count in snapshot.get("histograms", ()):
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+    return {
+        "buckets": buckets,
+        "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+        "histograms": [[name, labels, h[0], h[1], h[2]] for (name, labels), h in histograms.items()],
+    }
+
+
+def render(snapshot: dict) -> str:
+    """Prometheus text exposition (version 0.0.4) of a snapshot."""
+    series: Dict[str, List[str]] = {}
+    for name, labels, value in sorted(snapshot["counters"], key=lambda s: (s[0], s[1])):
+        series.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value:g}")
+    bounds = [f"{b:g}" for b in snapshot["buckets"]] + ["+Inf"]
+    for name, labels, counts, total, count in sorted(snapshot["histograms"], key=lambda s: (s[0], s[1])):
+        lines = series.setdefault(name, [])
+        cumulative = 0
+        for bound, bucket_count in zip(bounds, counts):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{_format_labels(list(map(tuple, labels)) + [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    out = []
+    for name in sorted(series):
+        kind, text = METRICS.get(name, ("untyped", name))
+        out.append(f"# HELP {name} {text}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(series[name])
+    return "\n".join(out) + "\n"
+
+
+class Timings:
+    """
+    Per-request stage breakdown. Each span is also observed in the process-wide
+    `trackb_stage_seconds` histogram. Stages that run more than once add up.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or get_metrics()
+        self.started = time.perf_counter()
+        self._stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self._stages[stage] = self._stages.get(stage, 0.0) + seconds
+        self.registry.observe("trackb_stage_seconds", seconds, stage=stage)
+
+    @contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def breakdown(self) -> Dict[str, float]:
+        """Milliseconds per stage, plus 'total' since the Timings was created."""
+        with self._lock:
+            result = {stage: round(seconds * 1000, 1) for stage, seconds in self._stages.items()}
+        result["total"] = round((time.perf_counter() - self.started) * 1000, 1)
+        return result
+
+    def describe(self) -> str:
+        return ", ".join(f"{stage} {ms:.0f} ms" for stage, ms in self.breakdown().items())
+
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide MetricsRegistry."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = MetricsRegistry()
+    return _metrics
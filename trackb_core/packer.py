@@ -0,0 +1,146 @@
+"""
+Token-budget-aware context packing.
+
+Search snippets are scored against the question and added to the prompt from
+the most relevant down until the input-token budget is full. Tokens are counted
+with tiktoken when it is installed, otherwise with a calibrated estimate; both
+are scaled to err on the long side for Claude's tokenizer.
+"""
+import math
+import os
+import re
+from typing import Callable, List, Optional, Sequence
+
+# Total input tokens per LLM call (system text + search context + question)
+INPUT_TOKEN_BUDGET = int(os.environ.get("TRACKB_INPUT_TOKEN_BUDGET", "3000"))
+# Claude's tokenizer yields somewhat more tokens than cl100k for the same English text
+TOKEN_SCALE = float(os.environ.get("TRACKB_TOKEN_SCALE", "1.1"))
+# Characters per token inside a word, for the fallback estimate
+CHARS_PER_TOKEN = 4.0
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_TERM_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me of on or paper papers "
+    "research show tell the that this to was what when where which who why with about find".split()
+)
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """tiktoken's cl100k encoding, or None if tiktoken (or its BPE file) is unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        if os.environ.get("TRACKB_TOKENIZER", "auto") != "estimate":
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _encoding = None
+        _encoding_loaded = True
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Tokenizer-free estimate: every punctuation mark is one token and each word
+    costs one token per CHARS_PER_TOKEN characters (at least one).
+    """
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        tokens += max(1, math.ceil(len(piece) / CHARS_PER_TOKEN))
+    return tokens
+
+
+def count_tokens(text: str) -> int:
+    """Input tokens for `text`, scaled for Claude."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    raw = len(encoding.encode(text, disallowed_special=())) if encoding is not None else estimate_tokens(text)
+    return math.ceil(raw * TOKEN_SCALE)
+
+
+def content_terms(text: str) -> List[str]:
+    """Case-folded words of `text` that carry meaning (stopwords and single characters dropped)."""
+    return [t for t in _TERM_RE.findall(text.casefold()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def score_snippets(question: str, snippets: Sequence[str]) -> List[float]:
+    """
+    Relevance of each snippet to the question: question terms found in the snippet,
+    weighted by how rare they are across the snippets (idf) and dampened by term count.
+    """
+    terms = set(content_terms(question))
+    snippet_terms = [content_terms(s) for s in snippets]
+    n = len(snippets)
+    df = {t: sum(1 for st in snippet_terms if t in st) for t in terms}
+    scores = []
+    for st in snippet_terms:
+        counts = {}
+        for t in st:
+            if t in terms:
+                counts[t] = counts.get(t, 0) + 1
+        scores.append(sum((1 + math.log(c)) * math.log(1 + n / df[t]) for t, c in counts.items()))
+    return scores
+
+
+class PackResult:
+    """Items kept (most relevant first) and dropped by `pack`, with the token accounting."""
+
+    __slots__ = ("kept", "dropped", "tokens", "budget")
+
+    def __init__(self, kept: list, dropped: list, tokens: int, budget: int):
+        self.kept = kept
+        self.dropped = dropped
+        self.tokens = tokens
+        self.budget = budget
+
+    def describe(self, label: str = "snippets", name_of: Callable = None) -> str:
+        total = len(self.kept) + len(self.dropped)
+        text = f"kept {len(self.kept)} of {total} {label} ({self.tokens} of {self.budget} context tokens)"
+        if self.dropped:
+            names = [name_of(item) if name_of else _preview(item) for item in self.dropped]
+            text += "; dropped: " + "; ".join(names)
+        return text
+
+
+def _preview(item, width: int = 60) -> str:
+    text = " ".join(str(item).split())
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+
+def pack(question: str, items: Sequence, budget: int, text_of: Callable = str, separator_tokens: int = 2) -> PackResult:
+    """
+    Greedily fill `budget` tokens with the items most relevant to `question`.
+    Items that do not fit are skipped, so a smaller, less relevant one can still
+    use the remaining room. Ties keep the original (source rank) order.
+    """
+    texts = [text_of(item) for item in items]
+    scores = score_snippets(question, texts)
+    order = sorted(range(len(items)), key=lambda i: (-scores[i], i))
+
+    kept, dropped, used = [], [], 0
+    for i in order:
+        cost = count_tokens(texts[i]) + separator_tokens
+        if used + cost <= budget:
+            kept.append(items[i])
+            used += cost
+        else:
+            dropped.append(items[i])
+    return PackResult(kept, dropped, used, budget)
+
+
+def context_budget(user_message: str, conversation: str = "", total: Optional[int] = None) -> int:
+    """Tokens left for search context once the fixed prompt text, conversation and question are counted."""
+    from .llm import format_lc_messages
+
+    frame = format_lc_messages(user_message, search_content="-", conversation=conversation)[0]["content"]
+    return max(0, (INPUT_TOKEN_BUDGET if total is None else total) - count_tokens(frame))
+
+
+def split_snippets(text: str) -> List[str]:
+    """Split free-text search results into paragraph snippets."""
+    return [part.strip() for part in re.split(r"\n\s*\n", text) if part.strip()]
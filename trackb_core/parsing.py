@@ -0,0 +1,62 @@
+"""
+Lean request fields and linear-time parsing for the scholarly APIs.
+
+Each source is asked only for the fields we render, responses are decoded
+with orjson when it is installed, and OpenAlex abstracts are rebuilt from
+their inverted index in one pass, keeping only the words we show.
+"""
+import json
+from typing import Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+# Fields we actually render, per source
+SEMANTIC_SCHOLAR_FIELDS = "title,authors,year,citationCount,abstract,url,venue,externalIds"
+OPENALEX_SELECT = (
+    "id,doi,title,publication_year,cited_by_count,authorships,"
+    "primary_location,open_access,concepts,abstract_inverted_index"
+)
+CROSSREF_SELECT = (
+    "DOI,title,author,published,publisher,container-title,type,"
+    "is-referenced-by-count,reference-count,funder"
+)
+
+# Words of an OpenAlex abstract kept in the prompt
+OPENALEX_ABSTRACT_WORDS = 50
+
+
+def decode_json(content: bytes):
+    """Decode a JSON response body, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def rebuild_abstract(inverted_index: Optional[Dict[str, List[int]]], max_words: int = OPENALEX_ABSTRACT_WORDS) -> str:
+    """
+    Rebuild the first `max_words` words of an OpenAlex abstract.
+
+    The inverted index maps each word to every position it occupies, so words
+    are placed directly into their slots: one pass over the postings, no sort,
+    and repeated words land in the right places. Positions past the truncation
+    limit are only used to decide whether to append an ellipsis.
+    """
+    if not inverted_index:
+        return "No abstract available."
+
+    slots: List[Optional[str]] = [None] * max_words
+    truncated = False
+    for word, positions in inverted_index.items():
+        for position in positions:
+            if position < max_words:
+                slots[position] = word
+            else:
+                truncated = True
+
+    abstract = " ".join(word for word in slots if word is not None)
+    if truncated:
+        abstract += "..."
+    return abstract
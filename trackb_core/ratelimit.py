@@ -0,0 +1,199 @@
+"""
+Per-host token buckets shared by every worker process.
+
+Bucket state lives in a SQLite file in the shared state directory, so all
+uvicorn workers draw from the same budget for each public API. A request that
+finds the bucket empty reserves the next token and waits its turn (first come,
+first served) instead of failing, unless the wait would exceed the maximum,
+in which case RateLimited is raised.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .config import state_path
+
+# host -> (requests per second, burst)
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "api.semanticscholar.org": (1.0, 1.0),
+    "api.openalex.org": (10.0, 10.0),
+    "api.crossref.org": (10.0, 10.0),
+}
+MAX_WAIT = float(os.environ.get("TRACKB_RATE_MAX_WAIT", "5"))
+DEFAULT_PATH = os.environ.get("TRACKB_RATE_LIMIT_PATH") or None
+
+_WINDOW = 512
+
+
+def _parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse 'host=rate[:burst],...' (TRACKB_RATE_LIMITS); a rate of 0 disables the host's limit."""
+    limits = {}
+    for item in spec.split(","):
+        host, _, value = item.strip().partition("=")
+        if not host or not value:
+            continue
+        rate, _, burst = value.partition(":")
+        try:
+            limits[host.strip()] = (float(rate), float(burst) if burst else max(1.0, float(rate)))
+        except ValueError:
+            continue
+    return limits
+
+
+class RateLimited(RuntimeError):
+    """The host's bucket would not have a token within the maximum wait."""
+
+    def __init__(self, host: str, wait: float, max_wait: float):
+        super().__init__(f"rate limit for {host}: next slot in {wait:.1f} s exceeds the {max_wait:.1f} s maximum wait")
+        self.host = host
+        self.wait = wait
+
+
+class RateLimiter:
+    """
+    Token buckets in SQLite, one row per host. Thread- and process-safe.
+
+    Counters (this process):
+        acquired, waited (requests that had to queue), rejected, errors
+        (SQLite failures, in which case the request is let through).
+    """
+
+    def __init__(self, path: Optional[str] = None, limits: Dict[str, Tuple[float, float]] = None,
+                 max_wait: float = MAX_WAIT):
+        self.path = path or state_path("ratelimit.sqlite3")
+        if limits is None:
+            limits = dict(DEFAULT_LIMITS)
+            limits.update(_parse_limits(os.environ.get("TRACKB_RATE_LIMITS", "")))
+        self.limits = dict(limits)
+        self.max_wait = max_wait
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._queued: Dict[str, int] = {}
+        self._max_queued: Dict[str, int] = {}
+        self._waits: Dict[str, deque] = {}
+        self._counters = {"acquired": 0, "waited": 0, "rejected": 0, "errors": 0}
+        self._db().execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " host TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _reserve(self, host: str, rate: float, burst: float) -> float:
+        """Take a token (possibly going into debt) and return how long to wait for it, or minus the wait if over max_wait."""
+        db = self._db()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT tokens, updated FROM buckets WHERE host = ?", (host,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if wait > self.max_wait:
+                db.execute("ROLLBACK")
+                return -wait
+            db.execute(
+                "INSERT OR REPLACE INTO buckets (host, tokens, updated) VALUES (?, ?, ?)", (host, tokens - 1, now)
+            )
+            db.execute("COMMIT")
+            return wait
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _admit(self, host: str) -> float:
+        """Reserve a token for `host` and return the seconds to wait for it (queued if > 0)."""
+        limit = self.limits.get(host)
+        if limit is None or limit[0] <= 0:
+            return 0.0
+        try:
+            wait = self._reserve(host, *limit)
+        except sqlite3.Error:
+            with self._lock:
+                self._counters["errors"] += 1
+            return 0.0  # the limiter is best-effort; never block traffic on a broken state file
+
+        if wait < 0:
+            with self._lock:
+                self._counters["rejected"] += 1
+            raise RateLimited(host, -wait, self.max_wait)
+
+        with self._lock:
+            self._counters["acquired"] += 1
+            if wait > 0:
+                self._counters["waited"] += 1
+                depth = self._queued[host] = self._queued.get(host, 0) + 1
+                self._max_queued[host] = max(self._max_queued.get(host, 0), depth)
+            self._waits.setdefault(host, deque(maxlen=_WINDOW)).append(wait)
+        return wait
+
+    def _dequeue(self, host: str):
+        with self._lock:
+            self._queued[host] -= 1
+
+    def acquire(self, host: str) -> float:
+        """Wait for a token for `host` (no-op for hosts without a limit). Returns the seconds waited."""
+        wait = self._admit(host)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._dequeue(host)
+        return wait
+
+    async def acquire_async(self, host: str) -> float:
+        """`acquire` for async callers: waits on the event loop instead of blocking a thread."""
+        wait = self._admit(host)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._dequeue(host)
+        return wait
+
+    def acquire_url(self, url: str) -> float:
+        return self.acquire(urlsplit(url).hostname or "")
+
+    async def acquire_url_async(self, url: str) -> float:
+        return await self.acquire_async(urlsplit(url).hostname or "")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            hosts = {}
+            for host, (rate, burst) in self.limits.items():
+                waits = sorted(self._waits.get(host, ()))
+                hosts[host] = {
+                    "rate_per_s": rate,
+                    "burst": burst,
+                    "queued": self._queued.get(host, 0),
+                    "max_queued": self._max_queued.get(host, 0),
+                    "wait_p50_ms": round(waits[len(waits) // 2] * 1000) if waits else 0,
+                    "wait_p95_ms": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000) if waits else 0,
+                }
+            stats["hosts"] = hosts
+        return stats
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide RateLimiter configured from the environment."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(DEFAULT_PATH)
+    return _rate_limiter
@@ -0,0 +1,175 @@
+"""
+Typed paper records shared by all academic sources.
+
+Sources return compact `Paper` records instead of pre-formatted markdown.
+Records for the same work are merged across sources by DOI (or normalized
+title when there is no DOI) and rendered into prompt text only at the end.
+"""
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Author names kept per record (the total count is kept separately)
+MAX_AUTHORS = 3
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_DOI_PREFIXES = ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:")
+
+
+def normalize_doi(doi: Optional[str]) -> str:
+    if not doi:
+        return ""
+    doi = doi.strip().lower()
+    for prefix in _DOI_PREFIXES:
+        if doi.startswith(prefix):
+            return doi[len(prefix):]
+    return doi
+
+
+def normalize_title(title: Optional[str]) -> str:
+    return _NON_ALNUM.sub(" ", (title or "").casefold()).strip()
+
+
+class Paper:
+    """One scholarly work, as reported by one or more sources."""
+
+    __slots__ = (
+        "title", "authors", "author_count", "year", "venue", "doi", "url", "abstract",
+        "citations", "open_access", "topics", "funders", "publisher", "pub_type",
+        "references", "sources",
+    )
+
+    def __init__(self, title: str, source: str, authors: Iterable[str] = (), author_count: int = 0,
+                 year: Optional[int] = None, venue: str = "", doi: str = "", url: str = "", abstract: str = "",
+                 citations: Optional[int] = None, open_access: Optional[bool] = None, topics: Iterable[str] = (),
+                 funders: Iterable[str] = (), publisher: str = "", pub_type: str = "",
+                 references: Optional[int] = None):
+        self.title = title or "N/A"
+        self.authors = tuple(authors)[:MAX_AUTHORS]
+        self.author_count = max(author_count, len(self.authors))
+        self.year = year
+        self.venue = venue or ""
+        self.doi = normalize_doi(doi)
+        self.url = url or ""
+        self.abstract = abstract or ""
+        self.citations = citations
+        self.open_access = open_access
+        self.topics = tuple(t for t in topics if t)
+        self.funders = tuple(f for f in funders if f)
+        self.publisher = publisher or ""
+        self.pub_type = pub_type or ""
+        self.references = references
+        self.sources = (source,)
+
+    @property
+    def key(self) -> str:
+        """Deduplication key: the DOI when known, otherwise the normalized title."""
+        return f"doi:{self.doi}" if self.doi else f"title:{normalize_title(self.title)}"
+
+    def merge(self, other: "Paper"):
+        """
+        Fold another source's record for the same work into this one.
+        Missing fields are filled in; citation counts take the highest reported
+        value (sources count the same citations, so they are not summed); the
+        work is open access if any source says so; topics, funders and sources
+        are combined.
+        """
+        for name in ("venue", "doi", "url", "abstract", "publisher", "pub_type"):
+            if not getattr(self, name) and getattr(other, name):
+                setattr(self, name, getattr(other, name))
+        if len(other.abstract) > len(self.abstract):
+            self.abstract = other.abstract
+        if not self.authors and other.authors:
+            self.authors = other.authors
+        self.author_count = max(self.author_count, other.author_count)
+        if self.year is None:
+            self.year = other.year
+        if other.citations is not None:
+            self.citations = other.citations if self.citations is None else max(self.citations, other.citations)
+        if other.references is not None:
+            self.references = other.references if self.references is None else max(self.references, other.references)
+        if other.open_access is not None:
+            self.open_access = bool(self.open_access) or other.open_access
+        self.topics = _union(self.topics, other.topics)
+        self.funders = _union(self.funders, other.funders)
+        self.sources = _union(self.sources, other.sources)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Paper":
+        paper = cls.__new__(cls)
+        for name in cls.__slots__:
+            value = data.get(name)
+            setattr(paper, name, tuple(value) if isinstance(value, list) else value)
+        return paper
+
+    def render(self, index: int) -> str:
+        lines = [f"{index}. **{self.title}**"]
+        if self.authors:
+            authors = ", ".join(self.authors)
+            if self.author_count > len(self.authors):
+                authors += " et al."
+            lines.append(f"   Authors: {authors}")
+        meta = [f"Year: {self.year if self.year is not None else 'N/A'}"]
+        if self.venue:
+            meta.append(f"Venue: {self.venue}")
+        if self.pub_type:
+            meta.append(f"Type: {self.pub_type}")
+        lines.append("   " + " | ".join(meta))
+        impact = [f"Citations: {self.citations if self.citations is not None else 'N/A'}"]
+        if self.references is not None:
+            impact.append(f"References: {self.references}")
+        if self.open_access is not None:
+            impact.append(f"Access: {'Open Access' if self.open_access else 'Closed Access'}")
+        lines.append("   " + " | ".join(impact))
+        if self.publisher:
+            lines.append(f"   Publisher: {self.publisher}")
+        if self.topics:
+            lines.append(f"   Topics: {', '.join(self.topics)}")
+        if self.funders:
+            lines.append(f"   Funding: {', '.join(self.funders)}")
+        lines.append(f"   Abstract: {self.abstract or 'No abstract available.'}")
+        if self.doi:
+            lines.append(f"   DOI: https://doi.org/{self.doi}")
+        if self.url:
+            lines.append(f"   URL: {self.url}")
+        lines.append(f"   Sources: {', '.join(self.sources)}")
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return f"Paper({self.title!r}, doi={self.doi!r}, sources={self.sources!r})"
+
+
+def _union(first: tuple, second: tuple) -> tuple:
+    return first + tuple(item for item in second if item not in first)
+
+
+def merge_papers(result_lists: Iterable[List[Paper]]) -> List[Paper]:
+    """
+    Merge per-source result lists into unique papers, keyed by DOI or normalized title.
+    Order follows first appearance. Records are copied, so the inputs (which may be
+    shared cache entries) are never modified.
+    """
+    merged: Dict[str, Paper] = {}
+    title_index: Dict[str, str] = {}
+    for papers in result_lists:
+        for paper in papers:
+            title_key = normalize_title(paper.title)
+            key = paper.key
+            if key not in merged and title_key in title_index:
+                # Same title as a paper already seen; two different DOIs stay separate works
+                seen_key = title_index[title_key]
+                if not (paper.doi and seen_key.startswith("doi:")):
+                    key = seen_key
+            if key in merged:
+                merged[key].merge(paper)
+            else:
+                merged[key] = Paper.from_dict(paper.to_dict())
+                if title_key:
+                    title_index.setdefault(title_key, key)
+    return list(merged.values())
+
+
+def render_papers(papers: List[Paper]) -> str:
+    return "\n\n".join(paper.render(i) for i, paper in enumerate(papers, 1))
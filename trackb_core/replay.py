@@ -0,0 +1,267 @@
+"""
+Record/replay of upstream HTTP traffic at the transport level.
+
+Every upstream call in Track B (academic sources, Valyu over HTTP, the
+Bedrock proxy) goes through the pooled `requests.Session` in http_pool, so
+swapping that session's transport adapter is enough to capture or serve all
+of them:
+
+- TRACKB_RECORD=<path>: each request and its response (status, content type,
+  body and latency) is appended to a gzipped JSON-lines cassette. Request
+  bodies are stored only as a hash, so credentials in them never reach disk.
+- TRACKB_REPLAY=<path>: responses are served from the cassette without any
+  network access. TRACKB_REPLAY_LATENCY scales the recorded latencies
+  (0 = answer at once, 1 = original timing). With TRACKB_REPLAY_MATCH=loose,
+  a request with no exact recording falls back to another recording of the
+  same method and path (e.g. an LLM prompt that differs slightly).
+
+Each process records to its own file (the pid is added to the name, e.g.
+run.1234.jsonl.gz); replay of run.jsonl.gz loads every run.*.jsonl.gz, and a
+glob pattern picks files explicitly.
+"""
+import atexit
+import base64
+import datetime
+import glob
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+RECORD_PATH = os.environ.get("TRACKB_RECORD") or None
+REPLAY_PATH = os.environ.get("TRACKB_REPLAY") or None
+REPLAY_LATENCY = float(os.environ.get("TRACKB_REPLAY_LATENCY", "1"))
+REPLAY_MATCH = os.environ.get("TRACKB_REPLAY_MATCH", "exact")
+
+CASSETTE_VERSION = 1
+# Response headers worth keeping; everything else is transport noise
+_KEPT_HEADERS = ("content-type", "retry-after")
+
+
+def canonical_url(url: str) -> str:
+    """URL with its query parameters sorted, so parameter order never breaks a match."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{parts.scheme}://{parts.netloc}{parts.path}" + (f"?{query}" if query else "")
+
+
+def body_hash(body) -> str:
+    if not body:
+        return ""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def _endpoint(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.netloc + parts.path
+
+
+def interaction_key(method: str, url: str, body) -> Tuple[str, str, str]:
+    return method.upper(), canonical_url(url), body_hash(body)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTPAdapter that appends every exchange to a cassette. Thread-safe."""
+
+    def __init__(self, cassette: "CassetteWriter", *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        started = time.perf_counter()
+        response = super().send(request, **kwargs)
+        # Read the body here: the latency then covers the whole response, and streamed ones become replayable
+        response.content
+        self.cassette.write(request, response, time.perf_counter() - started)
+        return response
+
+
+class CassetteWriter:
+    """Appends interactions to a gzipped JSON-lines file, one line each."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started = time.time()
+        self.recorded = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        self._file.write(json.dumps({"cassette": CASSETTE_VERSION, "started": self.started}) + "\n")
+        self._file.flush()
+
+    def write(self, request, response, seconds: float):
+        method, url, digest = interaction_key(request.method, request.url, request.body)
+        entry = {
+            "method": method,
+            "url": url,
+            "body": digest,
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers},
+            "elapsed_ms": round(seconds * 1000, 1),
+            "at_s": round(time.time() - self.started, 3),
+        }
+        content = response.content or b""
+        try:
+            entry["text"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["base64"] = base64.b64encode(content).decode("ascii")
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.recorded += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def per_process_path(path: str, pid="") -> str:
+    """`path` with a process id inserted before the extension ('x.jsonl.gz' -> 'x.<pid>.jsonl.gz')."""
+    pid = pid or os.getpid()
+    for ext in (".jsonl.gz", ".gz"):
+        if path.endswith(ext):
+            return f"{path[:-len(ext)]}.{pid}{ext}"
+    return f"{path}.{pid}"
+
+
+def load_cassettes(pattern: str) -> List[dict]:
+    """
+    Every interaction in the cassette files matching `pattern` (or, failing that, the
+    per-process files recorded under that name), in recording order per file.
+    """
+    paths = sorted(glob.glob(pattern)) or sorted(glob.glob(per_process_path(pattern, "*")))
+    if not paths:
+        raise FileNotFoundError(f"no cassette matches {pattern}")
+    entries = []
+    for path in paths:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    entry = json.loads(line)
+                    if "cassette" not in entry:
+                        entries.append(entry)
+            except (EOFError, ValueError):
+                pass  # the recording process was killed mid-write; keep what is complete
+    return entries
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves recorded responses; never touches the network. Thread-safe.
+    Several recordings of the same request are served in turn (then cycled).
+
+    Counters:
+        replayed, loose (served by the loose method+path fallback), misses
+        (raised ConnectionError).
+    """
+
+    def __init__(self, entries: List[dict], latency_scale: float = REPLAY_LATENCY, match: str = REPLAY_MATCH):
+        super().__init__()
+        self.latency_scale = latency_scale
+        self.match = match
+        self._exact: Dict[tuple, List[dict]] = {}
+        self._loose: Dict[tuple, List[dict]] = {}
+        for entry in entries:
+            self._exact.setdefault((entry["method"], entry["url"], entry["body"]), []).append(entry)
+            self._loose.setdefault((entry["method"], _endpoint(entry["url"])), []).append(entry)
+        self._served: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self._counters = {"replayed": 0, "loose": 0, "misses": 0}
+
+    def _next(self, table: Dict[tuple, List[dict]], key: tuple, counter: str) -> Optional[dict]:
+        recordings = table.get(key)
+        if not recordings:
+            return None
+        with self._lock:
+            served = self._served.get((counter, key), 0)
+            self._served[(counter, key)] = served + 1
+            self._counters[counter] += 1
+        return recordings[served % len(recordings)]
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = interaction_key(request.method, request.url, request.body)
+        entry = self._next(self._exact, key, "replayed")
+        if entry is None and self.match == "loose":
+            entry = self._next(self._loose, (key[0], _endpoint(key[1])), "loose")
+        if entry is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            raise requests.ConnectionError(f"no recorded response for {key[0]} {key[1]}", request=request)
+
+        elapsed = entry["elapsed_ms"] / 1000
+        if self.latency_scale > 0:
+            time.sleep(elapsed * self.latency_scale)
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry.get("headers") or {})
+        response._content = base64.b64decode(entry["base64"]) if "base64" in entry else entry.get("text", "").encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.reason = "Replayed"
+        response.elapsed = datetime.timedelta(seconds=elapsed)
+        return response
+
+    def close(self):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["recordings"] = sum(len(entries) for entries in self._exact.values())
+        return stats
+
+
+# --- SESSION WIRING (used by http_pool) ---
+
+_writer: Optional[CassetteWriter] = None
+_replay: Optional[ReplayAdapter] = None
+_lock = threading.Lock()
+
+
+def mode() -> Optional[str]:
+    """'replay', 'record' or None (replay wins if both are configured)."""
+    if REPLAY_PATH:
+        return "replay"
+    if RECORD_PATH:
+        return "record"
+    return None
+
+
+def make_adapter(pool_connections: int, pool_maxsize: int) -> BaseAdapter:
+    """The transport adapter for the configured mode (a plain HTTPAdapter when neither is set)."""
+    global _writer, _replay
+    current = mode()
+    with _lock:
+        if current == "replay":
+            if _replay is None:
+                _replay = ReplayAdapter(load_cassettes(REPLAY_PATH))
+            return _replay
+        if current == "record":
+            if _writer is None:
+                # One file per worker process, so concurrent appenders never interleave gzip members
+                _writer = CassetteWriter(per_process_path(RECORD_PATH))
+                atexit.register(_writer.close)
+            return RecordingAdapter(_writer, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    return HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+
+def replay_stats() -> Optional[dict]:
+    """Record/replay counters, or None when neither mode is active."""
+    if _replay is not None:
+        return {"mode": "replay", **_replay.stats()}
+    if _writer is not None:
+        return {"mode": "record", "path": _writer.path, "recorded": _writer.recorded}
+    return None
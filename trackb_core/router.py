@@ -0,0 +1,150 @@
+"""
+Intent routing for the agent pipeline.
+
+All route keywords are compiled into one regular expression, so a message is
+classified in a single scan. Routes are tried in table order; a message that
+matches several routes is ambiguous, which lets the agent start the runner-up's
+search speculatively. Per-route hit counts and latencies are recorded.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# (route name, keywords), in priority order. Keywords match as substrings of the
+# lower-cased message, as the original keyword lists did.
+DEFAULT_ROUTES: List[Tuple[str, List[str]]] = [
+    ("academic", ["paper", "research", "study", "publication", "author", "citation", "academic", "scholar", "journal", "article"]),
+    ("live", ["latest", "current", "2025", "news", "today", "recent"]),
+]
+DEFAULT_ROUTE = "direct"
+
+# Optional JSON route table: [{"name": "academic", "keywords": [...]}, ...]
+ROUTES_FILE = os.environ.get("TRACKB_ROUTES_FILE") or None
+
+# Latency samples kept per route for the quantiles in stats()
+_WINDOW = 512
+
+
+def load_routes(path: Optional[str] = ROUTES_FILE) -> List[Tuple[str, List[str]]]:
+    if not path:
+        return DEFAULT_ROUTES
+    with open(path, "r", encoding="utf-8") as f:
+        return [(entry["name"], list(entry["keywords"])) for entry in json.load(f)]
+
+
+def _quantile(samples: Sequence[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class RouteDecision:
+    """The chosen route, every route that matched (in priority order) and the matched keywords."""
+
+    __slots__ = ("route", "candidates", "matches", "classify_us")
+
+    def __init__(self, route: str, candidates: List[str], matches: Dict[str, List[str]], classify_us: float):
+        self.route = route
+        self.candidates = candidates
+        self.matches = matches
+        self.classify_us = classify_us
+
+    @property
+    def ambiguous(self) -> bool:
+        return len(self.candidates) > 1
+
+    @property
+    def runner_up(self) -> Optional[str]:
+        return self.candidates[1] if self.ambiguous else None
+
+    def describe(self) -> str:
+        if not self.candidates:
+            return f"{self.route} (no route keywords matched)"
+        matched = ", ".join(f"{name}: {', '.join(self.matches[name])}" for name in self.candidates)
+        return f"{self.route} (matched {matched})"
+
+
+class IntentRouter:
+    """Keyword router over a route table, compiled into a single regex. Thread-safe."""
+
+    def __init__(self, routes: Sequence[Tuple[str, Sequence[str]]] = None, default: str = DEFAULT_ROUTE):
+        self.routes = list(routes if routes is not None else load_routes())
+        self.default = default
+        self._order = {name: i for i, (name, _) in enumerate(self.routes)}
+        self._keyword_route: Dict[str, str] = {}
+        for name, keywords in self.routes:
+            for keyword in keywords:
+                self._keyword_route.setdefault(keyword.lower(), name)
+        # Longest keywords first, so a longer keyword wins over its own prefix
+        alternatives = sorted(self._keyword_route, key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(k) for k in alternatives)) if alternatives else None
+
+        self._lock = threading.Lock()
+        names = [name for name, _ in self.routes] + [default]
+        self._hits = {name: 0 for name in names}
+        self._latency = {name: deque(maxlen=_WINDOW) for name in names}
+        self._counters = {"classified": 0, "ambiguous": 0, "prefetch_started": 0, "prefetch_used": 0, "prefetch_discarded": 0}
+        self._classify_us = deque(maxlen=_WINDOW)
+
+    def classify(self, message: str) -> RouteDecision:
+        started = time.perf_counter()
+        matches: Dict[str, List[str]] = {}
+        if self._pattern is not None:
+            for m in self._pattern.finditer(message.lower()):
+                keyword = m.group(0)
+                keywords = matches.setdefault(self._keyword_route[keyword], [])
+                if keyword not in keywords:
+                    keywords.append(keyword)
+        candidates = sorted(matches, key=self._order.__getitem__)
+        route = candidates[0] if candidates else self.default
+        classify_us = (time.perf_counter() - started) * 1e6
+
+        with self._lock:
+            self._counters["classified"] += 1
+            if len(candidates) > 1:
+                self._counters["ambiguous"] += 1
+            self._hits[route] += 1
+            self._classify_us.append(classify_us)
+        return RouteDecision(route, candidates, matches, classify_us)
+
+    def observe(self, route: str, seconds: float):
+        """Record the end-to-end latency of a request handled by `route`."""
+        with self._lock:
+            self._latency.setdefault(route, deque(maxlen=_WINDOW)).append(seconds * 1000)
+
+    def count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["classify_p50_us"] = round(_quantile(self._classify_us, 0.5), 1)
+            stats["routes"] = {
+                name: {
+                    "hits": self._hits.get(name, 0),
+                    "p50_ms": round(_quantile(samples, 0.5), 1),
+                    "p95_ms": round(_quantile(samples, 0.95), 1),
+                }
+                for name, samples in self._latency.items()
+            }
+        return stats
+
+
+_router: Optional[IntentRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> IntentRouter:
+    """Process-wide IntentRouter built from TRACKB_ROUTES_FILE (or the default table)."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = IntentRouter()
+    return _router
@@ -0,0 +1,46 @@
+"""
+Start-up time and resident-memory reporting for API workers.
+"""
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Modules an API worker should never need to load at start-up
+HEAVY_MODULES = ("gradio", "numpy", "langchain_valyu", "langchain_core", "langgraph")
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (falls back to the peak where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def startup_report(started: float) -> dict:
+    """
+    Summarise worker start-up, given the `time.perf_counter()` value taken
+    before the application's imports.
+    """
+    return {
+        "pid": os.getpid(),
+        "startup_ms": round((time.perf_counter() - started) * 1000, 1),
+        "rss_mb": round(rss_mb(), 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "heavy_modules_loaded": sorted(m for m in HEAVY_MODULES if m in sys.modules),
+    }
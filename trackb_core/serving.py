@@ -0,0 +1,117 @@
+"""
+Multi-worker serving: uvicorn settings and the shared worker registry.
+
+Workers are separate processes, so everything that must be shared between
+them (search cache, local index, LLM exact cache, sessions, rate-limit
+buckets) lives in SQLite files in the shared state directory. Per-process
+counters are published to the registry below, so /stats can report every
+live worker, not just the one that happened to answer.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .config import state_path
+
+HOST = os.environ.get("TRACKB_HOST", "127.0.0.1")
+PORT = int(os.environ.get("TRACKB_PORT", "5000"))
+WORKERS = int(os.environ.get("TRACKB_WORKERS", "1"))
+# Seconds a stopping worker waits for in-flight requests (including streams) to finish
+DRAIN_TIMEOUT = float(os.environ.get("TRACKB_DRAIN_TIMEOUT", "30"))
+# Recycle a worker after this many requests (0 = never); the jitter staggers restarts
+MAX_REQUESTS = int(os.environ.get("TRACKB_MAX_REQUESTS", "0"))
+MAX_REQUESTS_JITTER = int(os.environ.get("TRACKB_MAX_REQUESTS_JITTER", "100"))
+# Seconds between stats publications; workers silent for 3 intervals are reported as gone
+STATS_INTERVAL = float(os.environ.get("TRACKB_STATS_INTERVAL", "5"))
+DEFAULT_PATH = os.environ.get("TRACKB_WORKERS_PATH") or None
+
+
+def uvicorn_options(workers: Optional[int] = None) -> dict:
+    """Keyword arguments for `uvicorn.run` from the TRACKB_* serving settings."""
+    options = {
+        "host": HOST,
+        "port": PORT,
+        "workers": max(1, workers if workers is not None else WORKERS),
+        "timeout_graceful_shutdown": DRAIN_TIMEOUT,
+    }
+    if MAX_REQUESTS > 0:
+        # With several workers, uvicorn's supervisor replaces a worker that exits at its limit;
+        # a single worker just exits, for the process manager (systemd, Docker, ...) to restart
+        options["limit_max_requests"] = MAX_REQUESTS
+        options["limit_max_requests_jitter"] = MAX_REQUESTS_JITTER
+    return options
+
+
+class WorkerRegistry:
+    """Latest stats snapshot of every worker process, in SQLite. Thread- and process-safe."""
+
+    def __init__(self, path: Optional[str] = None, interval: float = STATS_INTERVAL):
+        self.path = path or state_path("workers.sqlite3")
+        self.interval = interval
+        self._local = threading.local()
+        self._db().execute(
+            "CREATE TABLE IF NOT EXISTS workers ("
+            " pid INTEGER PRIMARY KEY, started REAL NOT NULL, heartbeat REAL NOT NULL, stats TEXT NOT NULL)"
+        )
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def publish(self, stats: dict, started: float, pid: Optional[int] = None):
+        now = time.time()
+        db = self._db()
+        db.execute(
+            "INSERT OR REPLACE INTO workers (pid, started, heartbeat, stats) VALUES (?, ?, ?, ?)",
+            (pid or os.getpid(), started, now, json.dumps(stats, default=str)),
+        )
+        db.execute("DELETE FROM workers WHERE heartbeat < ?", (now - 3 * self.interval,))
+
+    def retire(self, pid: Optional[int] = None):
+        self._db().execute("DELETE FROM workers WHERE pid = ?", (pid or os.getpid(),))
+
+    def snapshots(self) -> Dict[int, dict]:
+        """pid -> {"started", "heartbeat_age_s", "stats"} for every worker seen in the last 3 intervals."""
+        now = time.time()
+        rows = self._db().execute(
+            "SELECT pid, started, heartbeat, stats FROM workers WHERE heartbeat >= ? ORDER BY pid",
+            (now - 3 * self.interval,),
+        ).fetchall()
+        return {
+            pid: {"started": started, "heartbeat_age_s": round(now - heartbeat, 1), "stats": json.loads(stats)}
+            for pid, started, heartbeat, stats in rows
+        }
+
+    def run_publisher(self, collect: Callable[[], dict], started: float, stop: threading.Event):
+        """Publish `collect()` every interval until `stop` is set, then retire this worker."""
+        while not stop.is_set():
+            try:
+                self.publish(collect(), started)
+            except sqlite3.Error:
+                pass  # stats are best-effort
+            stop.wait(self.interval)
+        try:
+            self.retire()
+        except sqlite3.Error:
+            pass
+
+
+_registry: Optional[WorkerRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_worker_registry() -> WorkerRegistry:
+    """Process-wide WorkerRegistry configured from the environment."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = WorkerRegistry(DEFAULT_PATH)
+    return _registry
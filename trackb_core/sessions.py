@@ -0,0 +1,215 @@
+"""
+Server-side chat sessions.
+
+Clients send a session id and only the new message. Each session keeps its
+last few turns verbatim plus a rolling summary of older turns that is updated
+incrementally as turns age out, so the conversation context given to the LLM
+stays bounded however long the chat runs. Sessions are capped in number and
+evicted after a period of inactivity.
+
+Sessions are stored in a SQLite file in the shared state directory, so a chat
+can continue on any worker process. A new session is written on its first
+turn and is adopted once the client sends its id back; when the store is over
+its cap, sessions that were never adopted are evicted before adopted ones.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from .config import state_path
+from .packer import count_tokens
+
+MAX_SESSIONS = int(os.environ.get("TRACKB_SESSION_MAX", "1000"))
+IDLE_TTL = float(os.environ.get("TRACKB_SESSION_IDLE_TTL", "1800"))
+RECENT_TURNS = int(os.environ.get("TRACKB_SESSION_RECENT_TURNS", "3"))
+SUMMARY_TOKENS = int(os.environ.get("TRACKB_SESSION_SUMMARY_TOKENS", "300"))
+DEFAULT_PATH = os.environ.get("TRACKB_SESSION_PATH") or None
+
+# Idle and surplus sessions are purged once every this many new sessions
+_PURGE_EVERY = 50
+
+# Characters of a recent answer kept verbatim in the context
+RECENT_ANSWER_CHARS = 600
+# Characters of a question / answer kept in a summary line
+SUMMARY_QUESTION_CHARS = 120
+SUMMARY_ANSWER_CHARS = 160
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def _clip(text: str, width: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= width else text[:width - 3].rstrip() + "..."
+
+
+def summarize_turn(user_message: str, answer: str) -> str:
+    """One summary line for a turn: the question and the first sentence of the answer."""
+    first_sentence = _SENTENCE_END.split(answer.strip(), 1)[0] if answer.strip() else ""
+    return f"- Q: {_clip(user_message, SUMMARY_QUESTION_CHARS)} -> A: {_clip(first_sentence, SUMMARY_ANSWER_CHARS)}"
+
+
+class Session:
+    """One conversation: a rolling summary of older turns plus the most recent turns."""
+
+    __slots__ = ("id", "summary", "recent", "turns", "last_used", "adopted", "lock", "store")
+
+    def __init__(self, session_id: str, store: Optional["SessionStore"] = None):
+        self.id = session_id
+        self.summary: List[str] = []
+        self.recent: List[List[str]] = []  # [user, assistant] pairs, oldest first
+        self.turns = 0
+        self.last_used = time.time()
+        self.adopted = False  # the client has resumed it by id at least once
+        self.lock = threading.Lock()
+        self.store = store  # saved back to its store after every turn
+
+    def add_turn(self, user_message: str, answer: str, recent_turns: int = RECENT_TURNS,
+                 summary_tokens: int = SUMMARY_TOKENS):
+        """Append a turn; turns that age out of the recent window are folded into the summary."""
+        with self.lock:
+            self.recent.append([user_message, answer])
+            self.turns += 1
+            while len(self.recent) > recent_turns:
+                self.summary.append(summarize_turn(*self.recent.pop(0)))
+            # Keep the summary within its budget by dropping its oldest lines
+            while len(self.summary) > 1 and count_tokens("\n".join(self.summary)) > summary_tokens:
+                self.summary.pop(0)
+            if self.store is not None:
+                self.store.save(self)
+
+    def history(self) -> List[List[str]]:
+        with self.lock:
+            return [list(turn) for turn in self.recent]
+
+    def context(self) -> str:
+        """Conversation context for the prompt (empty for a new session)."""
+        with self.lock:
+            parts = []
+            if self.summary:
+                parts.append("Earlier in this conversation:\n" + "\n".join(self.summary))
+            if self.recent:
+                turns = "\n".join(
+                    f"User: {user}\nAssistant: {_clip(answer, RECENT_ANSWER_CHARS)}" for user, answer in self.recent
+                )
+                parts.append("Most recent turns:\n" + turns)
+            return "\n\n".join(parts)
+
+
+class SessionStore:
+    """
+    Session store in SQLite, shared by every worker process. Thread- and process-safe.
+    Concurrent turns of one session on two workers are last-writer-wins.
+
+    Counters (this process):
+        created, resumed, expired (idle eviction), evicted (over MAX_SESSIONS,
+        never-adopted sessions first).
+    """
+
+    def __init__(self, path: Optional[str] = None, max_sessions: int = MAX_SESSIONS, idle_ttl: float = IDLE_TTL):
+        self.path = path or state_path("sessions.sqlite3")
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"created": 0, "resumed": 0, "expired": 0, "evicted": 0}
+        self._db().execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " id TEXT PRIMARY KEY, summary TEXT NOT NULL, recent TEXT NOT NULL,"
+            " turns INTEGER NOT NULL, last_used REAL NOT NULL, adopted INTEGER NOT NULL DEFAULT 0)"
+        )
+        try:
+            self._db().execute("ALTER TABLE sessions ADD COLUMN adopted INTEGER NOT NULL DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass  # the column already exists
+        self._db().execute("CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used)")
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _purge(self, now: float):
+        db = self._db()
+        expired = db.execute("DELETE FROM sessions WHERE last_used <= ?", (now - self.idle_ttl,)).rowcount
+        evicted = db.execute(
+            "DELETE FROM sessions WHERE id IN"
+            " (SELECT id FROM sessions ORDER BY adopted DESC, last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        ).rowcount
+        self._count("expired", max(0, expired))
+        self._count("evicted", max(0, evicted))
+
+    def get_or_create(self, session_id: Optional[str] = None) -> Session:
+        """
+        Resume `session_id` if it is still live (which marks it adopted), otherwise start
+        a new session. A new session is only kept in memory until its first turn is added.
+        """
+        now = time.time()
+        db = self._db()
+        row = None
+        if session_id:
+            row = db.execute(
+                "SELECT summary, recent, turns FROM sessions WHERE id = ? AND last_used > ?",
+                (session_id, now - self.idle_ttl),
+            ).fetchone()
+        if row is not None:
+            session = Session(session_id, self)
+            session.summary, session.recent, session.turns = json.loads(row[0]), json.loads(row[1]), row[2]
+            session.adopted = True
+            db.execute("UPDATE sessions SET last_used = ?, adopted = 1 WHERE id = ?", (now, session_id))
+            self._count("resumed")
+            return session
+
+        session = Session(uuid.uuid4().hex, self)
+        self._count("created")
+        with self._lock:
+            purge = self._counters["created"] % _PURGE_EVERY == 0
+        if purge:
+            self._purge(now)
+        return session
+
+    def save(self, session: Session):
+        session.last_used = time.time()
+        self._db().execute(
+            "INSERT OR REPLACE INTO sessions (id, summary, recent, turns, last_used, adopted) VALUES (?, ?, ?, ?, ?, ?)",
+            (session.id, json.dumps(session.summary), json.dumps(session.recent), session.turns, session.last_used,
+             int(session.adopted)),
+        )
+
+    def drop(self, session_id: str) -> bool:
+        return self._db().execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["active"] = self._db().execute(
+            "SELECT COUNT(*) FROM sessions WHERE last_used > ?", (time.time() - self.idle_ttl,)
+        ).fetchone()[0]
+        return stats
+
+
+_session_store: Optional[SessionStore] = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Process-wide SessionStore configured from the environment."""
+    global _session_store
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                _session_store = SessionStore(DEFAULT_PATH)
+    return _session_store
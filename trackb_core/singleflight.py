@@ -0,0 +1,91 @@
+"""
+Single-flight coalescing of identical in-flight upstream calls.
+
+When several requests need the same upstream result at the same moment, only
+the first (the leader) performs the call; the others wait for it and receive
+the same result or exception.
+"""
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """A named group of coalesced calls; keys are compared exactly."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "coalesced": 0, "max_waiters": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run `fn()` unless an identical call is already in flight.
+
+        Returns:
+            tuple: (value, shared) where shared is True if this caller waited
+            on another caller's in-flight call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters["calls"] += 1
+            else:
+                call.waiters += 1
+                self._counters["coalesced"] += 1
+                self._counters["max_waiters"] = max(self._counters["max_waiters"], call.waiters)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._calls)
+            stats["waiting"] = sum(call.waiters for call in self._calls.values())
+        return stats
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    """Process-wide SingleFlight group called `name`."""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight(name)
+        return group
+
+
+def flight_stats() -> Dict[str, dict]:
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.stats() for group in groups}
@@ -0,0 +1,288 @@
+"""
+Academic search sources: Semantic Scholar, OpenAlex and CrossRef.
+
+Each source returns `Paper` records; the fan-out merges them across sources
+and the prompt text is rendered once, from the merged list.
+"""
+import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
+
+from .cache import get_search_cache
+from .config import CROSSREF_URL, OPENALEX_URL, SEMANTIC_SCHOLAR_URL
+from .fanout import STATUS_OK, SourceResult, fan_out_sync, run_in_background
+from .health import get_health
+from .http_pool import http_get
+from .index import get_index
+from .ratelimit import RateLimited
+from .parsing import CROSSREF_SELECT, OPENALEX_SELECT, SEMANTIC_SCHOLAR_FIELDS, decode_json, rebuild_abstract
+from .records import MAX_AUTHORS, Paper, merge_papers, render_papers
+from .singleflight import get_flight
+
+
+class SourceError(RuntimeError):
+    """An academic API answered with a non-200 status."""
+
+
+# An upstream cannot keep a circuit open for longer than this via Retry-After (seconds)
+_MAX_RETRY_AFTER = 600
+
+
+def _retry_after(response) -> Optional[float]:
+    """Seconds from the Retry-After header (delay or HTTP date), or None when it is missing or invalid."""
+    value = (response.headers.get("Retry-After") or "").strip()
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(0.0, seconds), _MAX_RETRY_AFTER)
+
+
+def get_source_json(name: str, url: str, params: dict):
+    """
+    GET a source's JSON through its circuit breaker, with a timeout adapted to the
+    source's recent latency. Raises CircuitOpen without a request while the circuit is open.
+    """
+    health = get_health(name)
+    health.before_call()
+    started = time.perf_counter()
+    try:
+        response = http_get(url, params=params, timeout=health.timeout())
+    except RateLimited:
+        health.abandon()  # our own limit, not an upstream failure
+        raise
+    except Exception:
+        health.record(False, time.perf_counter() - started)
+        raise
+    # Time on the wire only, excluding any wait for a rate-limit token
+    elapsed = response.elapsed.total_seconds()
+    if response.status_code != 200:
+        # A 429 with Retry-After opens the circuit for at least that long; a bare 429 is an ordinary failure
+        health.record(False, elapsed, _retry_after(response) if response.status_code == 429 else None)
+        raise SourceError(f"{name} API error: Status {response.status_code}")
+    try:
+        data = decode_json(response.content)
+    except ValueError:
+        health.record(False, elapsed)
+        raise
+    health.record(True, elapsed)
+    return data
+
+
+# --- SEMANTIC SCHOLAR API TOOL ---
+def search_semantic_scholar(query: str, limit: int = 5) -> List[Paper]:
+    """
+    Search Semantic Scholar API for academic papers and research.
+    Returns paper records with titles, authors, citations, abstracts and DOIs.
+    """
+    data = get_source_json("Semantic Scholar", f"{SEMANTIC_SCHOLAR_URL}/graph/v1/paper/search", {
+        "query": query,
+        "limit": limit,
+        "fields": SEMANTIC_SCHOLAR_FIELDS
+    })
+
+    papers = []
+    for paper in data.get("data") or []:
+        authors = paper.get("authors") or []
+        abstract = paper.get("abstract") or ""
+        if len(abstract) > 300:
+            abstract = abstract[:297] + "..."
+        papers.append(Paper(
+            paper.get("title"), "Semantic Scholar",
+            authors=[a.get("name") or "Unknown" for a in authors[:MAX_AUTHORS]],
+            author_count=len(authors),
+            year=paper.get("year"),
+            venue=paper.get("venue"),
+            doi=(paper.get("externalIds") or {}).get("DOI"),
+            url=paper.get("url"),
+            abstract=abstract,
+            citations=paper.get("citationCount"),
+        ))
+    return papers
+
+# --- OPENALEX API TOOL ---
+def search_openalex(query: str, limit: int = 5) -> List[Paper]:
+    """
+    Search OpenAlex API for scholarly works, with open access status and topics.
+    """
+    data = get_source_json("OpenAlex", f"{OPENALEX_URL}/works", {
+        "search": query,
+        "per_page": limit,
+        "select": OPENALEX_SELECT,
+        "mailto": "research@trackb.ai"
+    })
+
+    papers = []
+    for work in data.get("results") or []:
+        authorships = work.get("authorships") or []
+        source = (work.get("primary_location") or {}).get("source") or {}
+        inverted_index = work.get("abstract_inverted_index")
+        papers.append(Paper(
+            work.get("title"), "OpenAlex",
+            authors=[(a.get("author") or {}).get("display_name") or "Unknown" for a in authorships[:MAX_AUTHORS]],
+            author_count=len(authorships),
+            year=work.get("publication_year"),
+            venue=source.get("display_name"),
+            doi=work.get("doi"),
+            url=work.get("id"),
+            abstract=rebuild_abstract(inverted_index) if inverted_index else "",
+            citations=work.get("cited_by_count"),
+            open_access=(work.get("open_access") or {}).get("is_oa"),
+            topics=[c.get("display_name") for c in (work.get("concepts") or [])[:3]],
+        ))
+    return papers
+
+# --- CROSSREF API TOOL ---
+def search_crossref(query: str, limit: int = 5) -> List[Paper]:
+    """
+    Search CrossRef API for publication metadata including DOIs, publishers, funding.
+    """
+    data = get_source_json("CrossRef", f"{CROSSREF_URL}/works", {
+        "query": query,
+        "rows": limit,
+        "select": CROSSREF_SELECT,
+        "mailto": "research@trackb.ai"
+    })
+
+    papers = []
+    for item in (data.get("message") or {}).get("items") or []:
+        authors = item.get("author") or []
+        pub_date = ((item.get("published") or {}).get("date-parts") or [[None]])[0]
+        container = item.get("container-title") or []
+        funders = [f.get("name") or "Unknown" for f in (item.get("funder") or [])]
+        if len(funders) > 2:
+            funders = funders[:2] + [f"(+{len(funders) - 2} more)"]
+        papers.append(Paper(
+            (item.get("title") or [None])[0], "CrossRef",
+            authors=[f"{a.get('given', '')} {a.get('family', '')}".strip() for a in authors[:MAX_AUTHORS]],
+            author_count=len(authors),
+            year=pub_date[0] if pub_date else None,
+            venue=container[0] if container else "",
+            doi=item.get("DOI"),
+            citations=item.get("is-referenced-by-count"),
+            funders=funders,
+            publisher=item.get("publisher"),
+            pub_type=(item.get("type") or "").replace("-", " ").title(),
+            references=item.get("reference-count"),
+        ))
+    return papers
+
+
+# --- CONCURRENT ACADEMIC FAN-OUT ---
+
+# (source name, search function)
+ACADEMIC_SOURCES = [
+    ("Semantic Scholar", search_semantic_scholar),
+    ("OpenAlex", search_openalex),
+    ("CrossRef", search_crossref),
+]
+
+# Shared deadline for all academic sources together (seconds); the unprefixed name is still honoured
+ACADEMIC_SEARCH_DEADLINE = float(
+    os.environ.get("TRACKB_ACADEMIC_SEARCH_DEADLINE") or os.environ.get("ACADEMIC_SEARCH_DEADLINE") or "10"
+)
+
+LOCAL_INDEX = "Local index"
+
+# Cache entries are stored under "<source>@records", so entries written in an
+# older format are never read back as records.
+_CACHE_FORMAT = "records"
+
+
+def _checked_search(name, search_fn, query, limit, use_cache=True) -> List[Paper]:
+    """
+    Run one search function through the search cache. Failures raise and are never
+    cached. Concurrent identical lookups (same source, normalized query and limit)
+    share one in-flight call.
+    """
+    def fetch():
+        return [paper.to_dict() for paper in search_fn(query, limit=limit)]
+
+    cache = get_search_cache()
+    source = f"{name}@{_CACHE_FORMAT}"
+    key = cache.make_key(source, query, limit) + ("" if use_cache else "|fresh")
+    value, _ = get_flight("search").do(
+        key, lambda: cache.get_or_fetch(source, query, limit, fetch, bypass=not use_cache)
+    )
+    return [Paper.from_dict(record) for record in value]
+
+
+def search_academic_sources(query: str, limit: int = 2, deadline: float = None, on_result=None, use_cache=True):
+    """
+    Query Semantic Scholar, OpenAlex and CrossRef concurrently under one shared deadline.
+    Returns (papers, source_results): the records of all sources that answered, merged
+    by DOI or normalized title, and one SourceResult per source. Sources that timed out
+    or failed do not hold up the others.
+    `on_result` is called with each SourceResult as soon as that source settles.
+    `use_cache=False` skips cached results and refreshes them from the APIs.
+
+    Queries the local index covers are answered from it alone (source "Local index");
+    hits older than the index's freshness window are refreshed in the background.
+    """
+    index = get_index() if use_cache else None
+    if index is not None:
+        started = time.perf_counter()
+        papers, age = index.search_papers(query, limit * len(ACADEMIC_SOURCES))
+        if papers:
+            if index.is_stale(age):
+                run_in_background(lambda: _search_network(query, limit, deadline, None, False))
+            result = SourceResult(LOCAL_INDEX, STATUS_OK, papers, latency_ms=(time.perf_counter() - started) * 1000)
+            if on_result is not None:
+                on_result(result)
+            return papers, {LOCAL_INDEX: result}
+    return _search_network(query, limit, deadline, on_result, use_cache)
+
+
+def _search_network(query, limit, deadline, on_result, use_cache):
+    calls = {
+        name: (lambda fn=search_fn, name=name: _checked_search(name, fn, query, limit, use_cache))
+        for name, search_fn in ACADEMIC_SOURCES
+    }
+    source_results = fan_out_sync(calls, deadline if deadline is not None else ACADEMIC_SEARCH_DEADLINE, on_result)
+    papers = merge_papers(result.value for result in source_results.values() if not result.partial)
+    index = get_index()
+    if index is not None and papers:
+        run_in_background(lambda: index.add_papers(papers))
+    return papers, source_results
+
+
+def render_academic_results(papers: List[Paper], source_results) -> str:
+    """Prompt text for the merged papers, with a partial-result marker per missing source."""
+    sections = [
+        f"[PARTIAL RESULT] {result.name} returned no results ({result.status}: {result.error})."
+        for result in source_results.values() if result.partial
+    ]
+    if papers:
+        sources = ", ".join(result.name for result in source_results.values() if not result.partial)
+        sections.append(f"=== ACADEMIC SEARCH RESULTS ({len(papers)} unique papers from {sources}) ===\n{render_papers(papers)}")
+    else:
+        sections.append("=== ACADEMIC SEARCH RESULTS ===\nNo papers found.")
+    return "\n\n".join(sections)
+
+
+def format_dedup_status(papers: List[Paper], source_results) -> str:
+    """Audit-trace summary of how many source records were merged."""
+    records = sum(len(result.value) for result in source_results.values() if not result.partial)
+    return f"{records} records from the sources merged into {len(papers)} unique papers"
+
+
+def format_source_health():
+    """One markdown line per academic source with its circuit state, latency and timeout."""
+    return "\n".join(f"- {get_health(name).describe()}" for name, _ in ACADEMIC_SOURCES)
+
+
+def format_source_status(source_results):
+    """One markdown line per source for the audit trace."""
+    lines = []
+    for result in source_results.values():
+        if result.partial:
+            lines.append(f"- {result.name}: **{result.status}** after {result.latency_ms:.0f} ms (partial result, skipped)")
+        else:
+            lines.append(f"- {result.name}: ok in {result.latency_ms:.0f} ms")
+    return "\n".join(lines)
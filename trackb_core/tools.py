@@ -0,0 +1,61 @@
+"""
+Optional search tools, loaded on first use.
+
+`langchain_valyu` is only imported the first time a live-data question needs
+it, so API workers that never take that route never pay for the import.
+With TRACKB_VALYU_URL set, a plain HTTP client for that Valyu-compatible
+endpoint is used instead (e.g. the local stand-ins in benchmarks/).
+"""
+import threading
+
+from . import config  # noqa: F401  (exports VALYU_API_KEY to the environment)
+from .config import VALYU_API_KEY, VALYU_URL
+
+
+# This creates a dummy class to prevent crashes if the Valyu key is missing.
+class SafeValyuTool:
+    def run(self, query): return "Valyu Search Tool is currently offline for testing purposes."
+
+
+class ValyuHttpTool:
+    """Minimal Valyu deep-search client over the shared connection pool."""
+
+    def __init__(self, base_url: str, max_results: int = 5, timeout: float = 20):
+        self.url = f"{base_url}/v1/deepsearch"
+        self.max_results = max_results
+        self.timeout = timeout
+
+    def run(self, query):
+        from .http_pool import http_post
+
+        response = http_post(
+            self.url, headers={"x-api-key": VALYU_API_KEY},
+            json={"query": query, "max_num_results": self.max_results}, timeout=self.timeout,
+        )
+        response.raise_for_status()
+        results = response.json().get("results") or []
+        return "\n\n".join(f"{r.get('title', '')}\n{r.get('url', '')}\n{r.get('content', '')}" for r in results)
+
+
+_valyu_tool = None
+_valyu_lock = threading.Lock()
+
+
+def get_valyu_tool():
+    """Return the Valyu search tool, initialising it (or the offline dummy) on first call."""
+    global _valyu_tool
+    if _valyu_tool is None:
+        with _valyu_lock:
+            if _valyu_tool is None and VALYU_URL:
+                _valyu_tool = ValyuHttpTool(VALYU_URL)
+            if _valyu_tool is None:
+                try:
+                    # Attempt to initialize the real tool
+                    from langchain_valyu import ValyuSearchTool
+                    _valyu_tool = ValyuSearchTool()
+                    print("[OK] Valyu Search Tool Initialized.")
+                except Exception:
+                    # If the package or key is missing, use the dummy
+                    _valyu_tool = SafeValyuTool()
+                    print("[WARNING] Valyu Search Tool failed to initialize, using DUMMY mode.")
+    return _valyu_tool
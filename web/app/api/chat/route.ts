@@ -4,20 +4,31 @@ import { NextRequest } from "next/server"
 
 export async function POST(req: NextRequest) {
 	try {
-		const { message, history } = await req.json()
+		const { message, session_id, history, stream } = await req.json()
 		const backend = process.env.PY_BACKEND_URL || "http://127.0.0.1:5000"
-		const res = await fetch(`${backend}/chat`, {
+		const res = await fetch(`${backend}/chat${stream ? "/stream" : ""}`, {
 			method: "POST",
 			headers: { "Content-Type": "application/json" },
-			body: JSON.stringify({ message, history })
+			// Only the new message travels; the backend keeps the conversation under session_id
+			body: JSON.stringify({ message, session_id, history })
 		})
 		if (!res.ok) {
 			return new Response(JSON.stringify({ answer: `Backend error HTTP ${res.status}` }), { status: 200 })
 		}
+		if (stream && res.body) {
+			// Pass the server-sent events straight through without buffering
+			return new Response(res.body, {
+				status: 200,
+				headers: {
+					"Content-Type": "text/event-stream",
+					"Cache-Control": "no-cache, no-transform",
+					"X-Accel-Buffering": "no"
+				}
+			})
+		}
 		const data = await res.json()
 		return new Response(JSON.stringify(data), { status: 200, headers: { "Content-Type": "application/json" } })
 	} catch (e: any) {
 		return new Response(JSON.stringify({ answer: `Failed to contact backend: ${e?.message ?? String(e)}` }), { status: 200 })
 	}
 }
-
@@ -3,6 +3,7 @@
 import { useEffect, useMemo, useRef, useState } from "react"
 
 type ChatMessage = { role: "user" | "assistant", content: string }
+type ChatResponse = { answer: string, trace_url?: string | null, trace_text?: string, session_id?: string }
 type Expert = {
 	name: string
 	title?: string
@@ -22,6 +23,9 @@ export default function Page() {
 	const [traceText, setTraceText] = useState<string | null>(null)
 	const [highlightedSource, setHighlightedSource] = useState<string | null>(null)
 	const [sources, setSources] = useState<string[]>([])
+	const [streamingAnswer, setStreamingAnswer] = useState("")
+	const [stages, setStages] = useState<string[]>([])
+	const sessionId = useRef<string | null>(null)
 	const listRef = useRef<HTMLDivElement>(null)
 
 	// Experts search state on the same page
@@ -36,7 +40,7 @@ export default function Page() {
 		if (listRef.current) {
 			listRef.current.scrollTop = listRef.current.scrollHeight
 		}
-	}, [messages])
+	}, [messages, streamingAnswer])
 
 	const canSend = useMemo(() => input.trim().length > 0 && !loading, [input, loading])
 
@@ -67,14 +71,26 @@ export default function Page() {
 		setMessages(prev => [...prev, userMsg])
 		setInput("")
 		setLoading(true)
+		setStreamingAnswer("")
+		setStages([])
 		try {
 			const res = await fetch("/api/chat", {
 				method: "POST",
 				headers: { "Content-Type": "application/json" },
-				body: JSON.stringify({ message: userMsg.content, history: messages })
+				body: JSON.stringify({ message: userMsg.content, session_id: sessionId.current, stream: true })
 			})
 			if (!res.ok) throw new Error(`HTTP ${res.status}`)
-			const data = await res.json() as { answer: string, trace_url?: string, trace_text?: string }
+			let data: ChatResponse
+			if (res.body && (res.headers.get("Content-Type") || "").includes("text/event-stream")) {
+				data = await readChatStream(res.body, {
+					onToken: text => setStreamingAnswer(prev => prev + text),
+					onStage: stage => setStages(prev => [...prev, stage]),
+					onSession: id => { sessionId.current = id }
+				})
+			} else {
+				data = await res.json() as ChatResponse
+			}
+			if (data.session_id) sessionId.current = data.session_id
 			const aiMsg: ChatMessage = { role: "assistant", content: data.answer ?? "" }
 			setMessages(prev => [...prev, aiMsg])
 			setTraceUrl(data.trace_url ?? null)
@@ -91,6 +107,7 @@ export default function Page() {
 			setMessages(prev => [...prev, aiMsg])
 		} finally {
 			setLoading(false)
+			setStreamingAnswer("")
 		}
 	}
 
@@ -141,7 +158,7 @@ export default function Page() {
 						</div>
 					))}
 					{loading && (
-						<div className="bubble assistant">Thinking…</div>
+						<div className="bubble assistant">{streamingAnswer || "Thinking…"}</div>
 					)}
 				</div>
 				<div className="inputRow">
@@ -178,9 +195,15 @@ export default function Page() {
 								<div className="spinner"></div>
 								<p>Analyzing sources and generating transparent reasoning...</p>
 								<div className="loading-steps">
-									<div className="step">🔍 Searching academic databases</div>
-									<div className="step">📊 Extracting citations and metadata</div>
-									<div className="step">✓ Verifying source credibility</div>
+									{stages.length > 0 ? stages.map((stage, i) => (
+										<div key={i} className="step">{stage}</div>
+									)) : (
+										<>
+											<div className="step">🔍 Searching academic databases</div>
+											<div className="step">📊 Extracting citations and metadata</div>
+											<div className="step">✓ Verifying source credibility</div>
+										</>
+									)}
 								</div>
 							</div>
 						) : traceText ? (
@@ -327,6 +350,61 @@ function HighlightableText({ text, onHighlight, sources, experts }: {
 	)
 }
 
+// Read the server-sent events from /api/chat (stream mode) and resolve with the final payload
+async function readChatStream(body: ReadableStream<Uint8Array>, handlers: {
+	onToken: (text: string) => void,
+	onStage: (stage: string) => void,
+	onSession: (sessionId: string) => void
+}): Promise<ChatResponse> {
+	const reader = body.getReader()
+	const decoder = new TextDecoder()
+	let buffer = ""
+	let final: ChatResponse = { answer: "" }
+	while (true) {
+		const { value, done } = await reader.read()
+		if (done) break
+		buffer += decoder.decode(value, { stream: true })
+		let sep = buffer.indexOf("\n\n")
+		while (sep >= 0) {
+			const block = buffer.slice(0, sep)
+			buffer = buffer.slice(sep + 2)
+			sep = buffer.indexOf("\n\n")
+
+			let event = "message"
+			let data = ""
+			for (const line of block.split("\n")) {
+				if (line.startsWith("event:")) event = line.slice(6).trim()
+				else if (line.startsWith("data:")) data += line.slice(5).trim()
+			}
+			if (!data) continue
+			const payload = JSON.parse(data)
+			if (event === "chunk") {
+				handlers.onToken(payload.text ?? "")
+			} else if (event === "final") {
+				final = payload as ChatResponse
+			} else {
+				if (event === "accepted" && payload.session_id) handlers.onSession(payload.session_id)
+				const stage = describeStage(event, payload)
+				if (stage) handlers.onStage(stage)
+			}
+		}
+	}
+	return final
+}
+
+function describeStage(event: string, payload: any): string | null {
+	switch (event) {
+		case "accepted": return "⏳ Request accepted"
+		case "route": return `🧭 Route: ${payload.route}${payload.fallback ? " (fallback)" : ""}`
+		case "source": return `🔍 ${payload.source}: ${payload.status} (${payload.latency_ms} ms)`
+		case "llm":
+			if (payload.status !== "done") return "🤖 Generating answer"
+			if (["exact", "near", "coalesced"].includes(payload.cache)) return `⚡ Answer served from cache (${payload.cache})`
+			return payload.hedged ? `✅ Answer ready (hedged, from ${payload.model})` : "✅ Answer ready"
+		default: return null
+	}
+}
+
 function extractSourcesFromTrace(traceText: string): string[] {
 	const sources: string[] = []
 	